@@ -82,6 +82,27 @@ else:
         }
     }
 
+# Cache
+# Must be shared by every web worker and by management commands: store
+# access sets, analytics rollups and their invalidation (checklist.access,
+# checklist.analytics) go through it. A per-process LocMemCache would keep
+# serving revoked access in other workers. Create the database table with
+# `manage.py createcachetable` on deploy; set REDIS_URL to use Redis instead.
+if 'REDIS_URL' in os.environ:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
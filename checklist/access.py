@@ -0,0 +1,153 @@
+"""
+Store access resolution.
+
+accessible_store_ids(user) works out once which stores a user may see, from
+their role, Profile.stores, Profile.areas and the areas they are assigned to
+(Area.users). The result is memoized on the user object for the rest of the
+request and cached across requests; checklist.signals calls
+invalidate_store_access() whenever any of those assignments change. The
+cache must be shared between processes (settings.CACHES) so an invalidation
+in one worker or management command reaches every other worker.
+
+sync_profile_stores() rewrites Profile.stores in bulk from the area
+assignments (`manage.py sync_store_access`).
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Store
+
+# Roles that see every store
+ALL_STORES_ROLES = ('admin', 'area_management', 'store_selector')
+
+CACHE_TIMEOUT = 60 * 60
+GENERATION_KEY = 'store_access_generation'
+
+_MISSING = object()
+
+
+def invalidate_store_access():
+    """Drop every cached store set; the next lookup per user recomputes it"""
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def _resolve(user):
+    if not user.is_authenticated:
+        return frozenset()
+    if user.is_superuser:
+        return None
+    profile = getattr(user, 'profile', None)
+    if profile is None:
+        return frozenset()
+    if profile.role in ALL_STORES_ROLES:
+        return None
+    return frozenset(Store.objects.filter(
+        Q(id__in=profile.stores.values('id'))
+        | Q(area_id__in=profile.areas.values('id'))
+        | Q(area_id__in=user.assigned_areas.values('id'))
+    ).values_list('id', flat=True))
+
+
+def accessible_store_ids(user):
+    """Frozenset of store ids the user may access, or None for every store"""
+    try:
+        return user._accessible_store_ids
+    except AttributeError:
+        pass
+
+    ids = _MISSING
+    if user.is_authenticated:
+        generation = cache.get_or_set(GENERATION_KEY, time.time_ns, None)
+        key = f'store_access:{generation}:{user.pk}'
+        ids = cache.get(key, _MISSING)
+    if ids is _MISSING:
+        ids = _resolve(user)
+        if user.is_authenticated:
+            cache.set(key, ids, CACHE_TIMEOUT)
+
+    user._accessible_store_ids = ids
+    return ids
+
+
+def has_store_access(user, store_id):
+    ids = accessible_store_ids(user)
+    return ids is None or store_id in ids
+
+
+def accessible_stores(user, queryset=None):
+    """Narrow queryset (default: every store) to the stores the user may access"""
+    if queryset is None:
+        queryset = Store.objects.all()
+    ids = accessible_store_ids(user)
+    return queryset if ids is None else queryset.filter(id__in=ids)
+
+
+def derived_profile_stores(profiles):
+    """
+    The (profile_id, store_id) pairs Profile.stores should hold for profiles
+    (a Profile queryset): every active store for superusers, otherwise the
+    stores in the areas on Profile.areas or assigned through Area.users.
+    """
+    from users.models import Profile
+    from .models import Area
+
+    profiles = dict(profiles.values_list('id', 'user__is_superuser'))
+    area_stores = {}
+    for store_id, area_id in Store.objects.filter(area__isnull=False).values_list('id', 'area_id'):
+        area_stores.setdefault(area_id, []).append(store_id)
+    active = list(Store.objects.filter(is_active=True).values_list('id', flat=True))
+
+    profile_areas = set(Profile.areas.through.objects.filter(
+        profile_id__in=profiles
+    ).values_list('profile_id', 'area_id'))
+    profile_areas.update(Area.users.through.objects.filter(
+        user__profile__id__in=profiles
+    ).values_list('user__profile__id', 'area_id'))
+
+    desired = {(profile_id, store_id) for profile_id, is_superuser in profiles.items() if is_superuser
+               for store_id in active}
+    desired.update(
+        (profile_id, store_id)
+        for profile_id, area_id in profile_areas if not profiles[profile_id]
+        for store_id in area_stores.get(area_id, ())
+    )
+    return desired
+
+
+def sync_profile_stores(profiles=None, prune=True, dry_run=False):
+    """
+    Bring Profile.stores for profiles (default: every profile) in line with
+    derived_profile_stores(), inserting and deleting only the difference.
+    With prune=False stores assigned by hand are kept. Returns the
+    (profile_id, store_id) pairs (added, removed).
+    """
+    from users.models import Profile
+
+    if profiles is None:
+        profiles = Profile.objects.all()
+    through = Profile.stores.through
+    desired = derived_profile_stores(profiles)
+    current = {
+        (profile_id, store_id): link_id
+        for link_id, profile_id, store_id in through.objects.filter(
+            profile__in=profiles
+        ).values_list('id', 'profile_id', 'store_id')
+    }
+    added = desired - current.keys()
+    removed = current.keys() - desired if prune else set()
+    if dry_run or not (added or removed):
+        return added, removed
+
+    with transaction.atomic():
+        through.objects.bulk_create(
+            [through(profile_id=profile_id, store_id=store_id) for profile_id, store_id in added], batch_size=1000
+        )
+        if removed:
+            through.objects.filter(id__in=[current[pair] for pair in removed]).delete()
+    # Bulk writes skip m2m_changed. Run from manage.py this reaches the web
+    # workers only because the cache is shared (settings.CACHES)
+    invalidate_store_access()
+    return added, removed
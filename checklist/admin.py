@@ -3,7 +3,7 @@ from django.contrib.admin import AdminSite
 from django.contrib import messages
 from django.urls import path
 from django.utils.html import format_html
-from django.db.models import Count, Q
+from django.db.models import Count, Min, Q
 from django.utils import timezone
 from datetime import timedelta
 from django.shortcuts import render, redirect
@@ -12,10 +12,14 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User, Group
 
 from .models import (
-    Store, AreaManagerVisit, ChecklistItem, ActionPlanItem,
+    Store, AreaManagerVisit, ChecklistItem, ActionPlanItem, ActionItemStatusChange,
     ChecklistCategory, ChecklistQuestion, MaintenanceTicket,
     EquipmentCategory, Product, Area
 )
+from .analytics import get_area_kpis
+from .sla import latest_sla_rollup
+from .utils.question_import import QuestionImport, READ_ERRORS, read_question_rows, SESSION_KEY
+from .utils import store_import
 
 
 # -----------------------------
@@ -62,6 +66,8 @@ class CaribouAdminSite(AdminSite):
             'open_maintenance_tickets': MaintenanceTicket.objects.exclude(status='completed').count(),
             'avg_compliance': self.get_average_compliance(),
             'category_performance': self.get_category_performance(),
+            'maintenance_sla': latest_sla_rollup('area'),
+            'area_kpis': get_area_kpis()['areas'],
         }
         return render(request, 'admin/dashboard.html', context)
 
@@ -167,21 +173,26 @@ class StoreAdmin(admin.ModelAdmin):
             'fields': ('name', 'manager_name', 'phone', 'email')
         }),
         ('Address Details', {
-            'fields': ('address',)
+            'fields': ('address', ('latitude', 'longitude'))
         }),
         ('Status & Settings', {
             'fields': ('is_active',)
         })
     )
 
-    actions = ['export_as_csv', 'activate_stores', 'deactivate_stores']
+    actions = ['export_as_csv', 'export_as_xlsx', 'activate_stores', 'deactivate_stores']
 
     def get_queryset(self, request):
-        qs = super().get_queryset(request)
+        # Visit frequency inputs in the same query as the rows
+        qs = super().get_queryset(request).annotate(
+            submitted_visits=Count('visits', filter=Q(visits__is_draft=False)),
+            first_visit=Min('visits__date', filter=Q(visits__is_draft=False)),
+        )
         if request.user.is_superuser:
             return qs
-        # Limit non-superusers to stores they have visits in
-        return qs.filter(visits__manager=request.user).distinct()
+        # Limit non-superusers to stores they have visits in; a subquery
+        # rather than a join keeps the visit counts above intact
+        return qs.filter(id__in=AreaManagerVisit.objects.filter(manager=request.user).values('store_id'))
 
     def has_view_permission(self, request, obj=None):
         if request.user.is_superuser:
@@ -190,31 +201,65 @@ class StoreAdmin(admin.ModelAdmin):
             return True
         return obj.visits.filter(manager=request.user).exists()
 
+    EXPORT_HEADERS = [
+        'Name', 'Area', 'Manager', 'Phone', 'Email', 'Active', 'Visits', 'Last Visit',
+        'Avg Score', 'Open Actions', 'Pending Tickets', 'In Progress Tickets', 'Overdue Tickets'
+    ]
+
+    def export_rows(self, queryset):
+        """Yield export rows from a single annotated query"""
+        # Re-base on the selected ids so the visit aggregates are not limited
+        # by joins from the changelist queryset (e.g. visits__manager)
+        stores = Store.objects.filter(pk__in=queryset.values('pk')).with_stats().values_list(
+            'name', 'area__name', 'manager_name', 'phone', 'email', 'is_active', 'visit_count',
+            'last_visit', 'avg_score', 'open_actions', 'pending_tickets', 'in_progress_tickets',
+            'overdue_tickets'
+        ).order_by('name')
+
+        for row in stores.iterator(chunk_size=500):
+            row = list(row)
+            row[8] = round(row[8], 1) if row[8] is not None else None
+            yield row
+
     def export_as_csv(self, request, queryset):
         """Export selected stores to CSV"""
         import csv
-        from django.http import HttpResponse
+        from django.http import StreamingHttpResponse
 
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="stores_export.csv"'
+        class Echo:
+            def write(self, value):
+                return value
 
-        writer = csv.writer(response)
-        writer.writerow(['Name', 'Manager', 'Phone', 'Email', 'Active', 'Last Visit', 'Compliance Score'])
-
-        for store in queryset:
-            writer.writerow([
-                store.name,
-                store.manager_name,
-                store.phone,
-                store.email,
-                store.is_active,
-                self.last_visit_date(store),
-                self.compliance_score(store)
-            ])
+        writer = csv.writer(Echo())
+        def stream():
+            yield writer.writerow(self.EXPORT_HEADERS)
+            for row in self.export_rows(queryset):
+                yield writer.writerow(row)
+
+        response = StreamingHttpResponse(stream(), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="stores_export.csv"'
         return response
 
     export_as_csv.short_description = 'Export selected stores to CSV'
 
+    def export_as_xlsx(self, request, queryset):
+        """Export selected stores to Excel"""
+        from django.http import HttpResponse
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title='Stores')
+        sheet.append(self.EXPORT_HEADERS)
+        for row in self.export_rows(queryset):
+            sheet.append(row)
+
+        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        response['Content-Disposition'] = 'attachment; filename="stores_export.xlsx"'
+        workbook.save(response)
+        return response
+
+    export_as_xlsx.short_description = 'Export selected stores to Excel'
+
     def activate_stores(self, request, queryset):
         updated = queryset.update(is_active=True)
         self.message_user(request, f'{updated} store(s) activated.')
@@ -227,16 +272,70 @@ class StoreAdmin(admin.ModelAdmin):
 
     deactivate_stores.short_description = 'Deactivate selected stores'
 
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='checklist_store_import'),
+        ]
+        return custom_urls + urls
+
+    def import_view(self, request):
+        """Onboard stores from CSV or XLSX, showing a dry-run diff before commit"""
+        from django import forms
+
+        if not self.has_add_permission(request):
+            return redirect(f'{self.admin_site.name}:checklist_store_changelist')
+
+        class ImportForm(forms.Form):
+            file = forms.FileField(
+                label='CSV or XLSX File',
+                help_text='Columns: Name, Address and optionally Area, Manager, Phone, Email, Active, '
+                          'Equipment Categories (separated by ;), Latitude, Longitude'
+            )
+
+        preview = None
+        if request.method == 'POST' and 'confirm' in request.POST:
+            rows = request.session.pop(store_import.SESSION_KEY, None)
+            if rows:
+                summary = store_import.StoreImport(rows).apply()
+                messages.success(
+                    request,
+                    f"Stores imported: {summary['created']} created, {summary['updated']} updated, "
+                    f"{summary['unchanged']} unchanged."
+                )
+                return redirect(f'{self.admin_site.name}:checklist_store_changelist')
+            messages.error(request, 'Nothing to import. Please upload the file again.')
+            form = ImportForm()
+        elif request.method == 'POST':
+            form = ImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                try:
+                    rows = store_import.read_store_rows(request.FILES['file'], request.encoding or 'utf-8')
+                    preview = store_import.StoreImport(rows)
+                    request.session[store_import.SESSION_KEY] = rows
+                except READ_ERRORS as e:
+                    messages.error(request, f'Error importing stores: {str(e)}')
+        else:
+            request.session.pop(store_import.SESSION_KEY, None)
+            form = ImportForm()
+
+        return render(request, 'admin/checklist/import_stores.html', {
+            **self.admin_site.each_context(request),
+            'form': form,
+            'preview': preview,
+            'opts': self.model._meta,
+            'title': 'Import Stores'
+        })
+
     def visit_frequency(self, obj):
-        """Average visits per month"""
-        visits = obj.visits.filter(is_draft=False).count()
-        if visits > 0:
-            first_visit = obj.visits.earliest('date').date
-            months = (timezone.now().date() - first_visit).days // 30
-            return f"{visits/max(months,1):.1f}/month"
+        """Average visits per month, from the get_queryset annotations"""
+        if obj.submitted_visits:
+            months = (timezone.now().date() - obj.first_visit).days // 30
+            return f"{obj.submitted_visits/max(months,1):.1f}/month"
         return "No visits"
 
     visit_frequency.short_description = 'Visit Frequency'
+    visit_frequency.admin_order_field = 'submitted_visits'
 
     def maintenance_status(self, obj):
         """Show maintenance ticket status summary"""
@@ -413,6 +512,17 @@ class ChecklistItemAdmin(admin.ModelAdmin):
 # -----------------------------
 # Action Plan Item Admin
 # -----------------------------
+class ActionItemStatusChangeInline(admin.TabularInline):
+    model = ActionItemStatusChange
+    extra = 0
+    fields = ('from_status', 'to_status', 'changed_by', 'changed_at')
+    readonly_fields = ('from_status', 'to_status', 'changed_by', 'changed_at')
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 class ActionPlanItemAdmin(admin.ModelAdmin):
     list_display = [
         'visit', 'issue_description_preview', 'who',
@@ -425,6 +535,7 @@ class ActionPlanItemAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
 
     actions = ['mark_as_closed', 'mark_as_in_progress']
+    inlines = [ActionItemStatusChangeInline]
 
     fieldsets = (
         ('Action Item Details', {
@@ -462,14 +573,19 @@ class ActionPlanItemAdmin(admin.ModelAdmin):
 
     priority_display.short_description = 'Priority'
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'status' in form.changed_data:
+            ActionItemStatusChange.record([(obj.pk, form.initial.get('status'), obj.status)], request.user)
+
     def mark_as_closed(self, request, queryset):
-        updated = queryset.update(status='closed')
+        updated = queryset.set_status('closed', request.user)
         self.message_user(request, f'{updated} action item(s) marked as closed.')
 
     mark_as_closed.short_description = 'Mark selected items as closed'
 
     def mark_as_in_progress(self, request, queryset):
-        updated = queryset.update(status='in_progress')
+        updated = queryset.set_status('in_progress', request.user)
         self.message_user(request, f'{updated} action item(s) marked as in progress.')
 
     mark_as_in_progress.short_description = 'Mark selected items as in progress'
@@ -530,56 +646,62 @@ class ChecklistQuestionAdmin(admin.ModelAdmin):
 
     export_questions.short_description = 'Export selected questions to CSV'
 
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='checklist_checklistquestion_import'),
+        ]
+        return custom_urls + urls
+
     def import_questions(self, request, queryset=None):
-        """Import questions from CSV with error handling"""
+        """Send the user to the import page"""
+        return redirect(f'{self.admin_site.name}:checklist_checklistquestion_import')
+
+    def import_view(self, request):
+        """Import questions from CSV or XLSX, showing a dry-run diff before commit"""
         from django import forms
-        from django.db import transaction
 
         class ImportForm(forms.Form):
             file = forms.FileField(
-                label='CSV File',
+                label='CSV or XLSX File',
                 help_text='File must contain columns: Question Number, Category, Question Text, Is Active'
             )
 
-        if request.method == 'POST':
+        preview = None
+        if request.method == 'POST' and 'confirm' in request.POST:
+            rows = request.session.pop(SESSION_KEY, None)
+            if rows:
+                summary = QuestionImport(rows).apply()
+                messages.success(
+                    request,
+                    f"Questions imported: {summary['created']} created, {summary['updated']} updated, "
+                    f"{summary['unchanged']} unchanged."
+                )
+                return redirect(f'{self.admin_site.name}:checklist_checklistquestion_changelist')
+            messages.error(request, 'Nothing to import. Please upload the file again.')
+            form = ImportForm()
+        elif request.method == 'POST':
             form = ImportForm(request.POST, request.FILES)
             if form.is_valid():
                 try:
-                    import csv
-                    from io import TextIOWrapper
-
-                    with transaction.atomic():
-                        encoding = request.encoding or 'utf-8'
-                        file = TextIOWrapper(request.FILES['file'].file, encoding=encoding)
-                        reader = csv.DictReader(file)
-
-                        imported_count = 0
-                        for row_num, row in enumerate(reader, start=1):
-                            # Validate required fields
-                            if not all(key in row for key in ['Question Number', 'Category', 'Question Text', 'Is Active']):
-                                raise ValueError(f'Invalid CSV format - missing required columns at row {row_num}')
-
-                            category, _ = ChecklistCategory.objects.get_or_create(name=row['Category'].strip())
-                            ChecklistQuestion.objects.create(
-                                number=row['Question Number'],
-                                category=category,
-                                text=row['Question Text'],
-                                is_active=row['Is Active'].lower() in ('true', 'yes', '1', 'y')
-                            )
-                            imported_count += 1
-
-                    messages.success(request, f'Successfully imported {imported_count} questions!')
-                except Exception as e:
+                    rows = read_question_rows(request.FILES['file'], request.encoding or 'utf-8')
+                    preview = QuestionImport(rows)
+                    request.session[SESSION_KEY] = rows
+                except READ_ERRORS as e:
                     messages.error(request, f'Error importing questions: {str(e)}')
         else:
+            request.session.pop(SESSION_KEY, None)
             form = ImportForm()
 
         return render(request, 'admin/checklist/import_questions.html', {
+            **self.admin_site.each_context(request),
             'form': form,
+            'preview': preview,
+            'opts': self.model._meta,
             'title': 'Import Questions'
         })
 
-    import_questions.short_description = 'Import questions from CSV'
+    import_questions.short_description = 'Import questions from CSV or XLSX'
 
 
 # -----------------------------
@@ -652,7 +774,7 @@ class AreaAdmin(admin.ModelAdmin):
 
     fieldsets = (
         ('Area Information', {
-            'fields': ('name', 'description')
+            'fields': ('name', 'description', 'visit_frequency_days')
         }),
         ('User Access', {
             'fields': ('users',),
@@ -0,0 +1,197 @@
+"""
+Store and area analytics for the management pages and dashboards.
+
+Per-store figures come from one grouped query (Store.with_stats plus visit
+frequency annotations); area subtotals and network totals are summed from
+those rows. Area KPIs come from one grouped query per source table keyed by
+Store.area. Both results are cached; checklist.signals drops them when
+visits, actions, tickets, stores or areas change, and rebuilds them after a
+visit is submitted, so the pages read them from the cache.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Exists, Min, OuterRef, Q
+from django.utils import timezone
+
+from .models import (
+    ActionPlanItem, Area, AreaManagerVisit, ChecklistItem, MaintenanceTicket, MaintenanceTicketQuerySet, Store,
+)
+
+STORE_ANALYTICS_CACHE_KEY = 'store_analytics'
+# Signals and ActionPlanItemQuerySet.set_status() invalidate on change; this is a safety net
+STORE_ANALYTICS_CACHE_TIMEOUT = 15 * 60
+
+# Visit frequency is measured over this trailing window
+FREQUENCY_WINDOW_DAYS = 90
+
+AREA_KPI_CACHE_KEY = 'area_kpis'
+# Coverage and compliance look at visits in this trailing window
+AREA_KPI_WINDOW_DAYS = 30
+
+SUMMED_FIELDS = (
+    'visit_count', 'recent_visits', 'open_actions', 'pending_tickets', 'in_progress_tickets', 'overdue_tickets',
+)
+
+
+def _subtotal(label, rows):
+    total = {'label': label, 'stores': len(rows), 'active': sum(1 for row in rows if row['is_active'])}
+    for field in SUMMED_FIELDS:
+        total[field] = sum(row[field] for row in rows)
+    # Weight each store's average by the visits that carry a score
+    scored = sum(row['scored_visits'] for row in rows)
+    total['avg_score'] = (
+        round(sum(row['avg_score'] * row['scored_visits'] for row in rows if row['scored_visits']) / scored, 1)
+        if scored else None
+    )
+    total['visits_per_month'] = round(total['recent_visits'] * 30 / FREQUENCY_WINDOW_DAYS, 1)
+    total['last_visit'] = max((row['last_visit'] for row in rows if row['last_visit']), default=None)
+    total['open_tickets'] = total['pending_tickets'] + total['in_progress_tickets']
+    return total
+
+
+def compute_store_analytics(today=None):
+    """
+    Every store with visit count, average stored score, visit frequency,
+    last visit and maintenance backlog, plus per-area subtotals and totals.
+    """
+    today = today or timezone.localdate()
+    submitted = Q(visits__is_draft=False)
+    rows = list(
+        Store.objects.with_stats(today).annotate(
+            scored_visits=Count('visits__overall_score', filter=submitted),
+            recent_visits=Count('visits', filter=submitted & Q(
+                visits__date__gt=today - timedelta(days=FREQUENCY_WINDOW_DAYS)
+            )),
+            first_visit=Min('visits__date', filter=submitted),
+        ).values(
+            'id', 'name', 'manager_name', 'is_active', 'area_id', 'area__name', 'visit_count', 'scored_visits',
+            'recent_visits', 'avg_score', 'first_visit', 'last_visit', 'open_actions', 'pending_tickets',
+            'in_progress_tickets', 'overdue_tickets',
+        ).order_by('-is_active', 'name')
+    )
+
+    areas = {}
+    for row in rows:
+        row['visits_per_month'] = round(row['recent_visits'] * 30 / FREQUENCY_WINDOW_DAYS, 1)
+        # Mean gap between submitted visits over the store's whole history
+        row['days_between_visits'] = (
+            round((row['last_visit'] - row['first_visit']).days / (row['visit_count'] - 1), 1)
+            if row['visit_count'] > 1 else None
+        )
+        row['days_since_visit'] = (today - row['last_visit']).days if row['last_visit'] else None
+        row['open_tickets'] = row['pending_tickets'] + row['in_progress_tickets']
+        areas.setdefault((row['area__name'] or '', row['area_id']), []).append(row)
+
+    # Named areas first, unassigned stores last
+    subtotals = [
+        dict(_subtotal(name or 'Unassigned', area_rows), area_id=area_id)
+        for (name, area_id), area_rows in sorted(areas.items(), key=lambda item: (item[0][1] is None, item[0][0]))
+    ]
+    totals = _subtotal('All stores', rows)
+    for row in rows:
+        if row['avg_score'] is not None:
+            row['avg_score'] = round(row['avg_score'], 1)
+
+    with_visits = sum(1 for row in rows if row['visit_count'])
+    active = sum(1 for row in rows if row['is_active'])
+    return {
+        'stores': rows,
+        'areas': subtotals,
+        'totals': totals,
+        'stats': {
+            'total': len(rows),
+            'active': active,
+            'inactive': len(rows) - active,
+            'with_visits': with_visits,
+            'without_visits': len(rows) - with_visits,
+        },
+        'computed_at': timezone.now(),
+    }
+
+
+def get_store_analytics():
+    """Cached compute_store_analytics()"""
+    analytics = cache.get(STORE_ANALYTICS_CACHE_KEY)
+    if analytics is None:
+        analytics = refresh_store_analytics()
+    return analytics
+
+
+def refresh_store_analytics():
+    analytics = compute_store_analytics()
+    cache.set(STORE_ANALYTICS_CACHE_KEY, analytics, STORE_ANALYTICS_CACHE_TIMEOUT)
+    return analytics
+
+
+def compute_area_kpis(today=None):
+    """
+    Per area, over active stores: compliance (share of checklist answers
+    passed in the last AREA_KPI_WINDOW_DAYS), coverage (share of stores
+    visited in that window), overdue action items and open tickets. Stores
+    without an area form an 'Unassigned' row (area_id None). Returns
+    {'areas': [...], 'totals': {...}, 'computed_at': ...}.
+    """
+    today = today or timezone.localdate()
+    since = today - timedelta(days=AREA_KPI_WINDOW_DAYS)
+    recent_visit = AreaManagerVisit.objects.filter(store=OuterRef('pk'), is_draft=False, date__gte=since)
+
+    stores = Store.objects.filter(is_active=True).order_by().values('area_id').annotate(
+        stores=Count('id'), visited=Count('id', filter=Q(Exists(recent_visit))),
+    )
+    answers = ChecklistItem.objects.filter(
+        visit__is_draft=False, visit__date__gte=since, visit__store__is_active=True
+    ).order_by().values('visit__store__area_id').annotate(
+        answers=Count('id'), passed=Count('id', filter=Q(answer=True)),
+    )
+    actions = ActionPlanItem.objects.overdue(today).filter(visit__store__is_active=True).order_by().values('visit__store__area_id').annotate(overdue_actions=Count('id'))
+    tickets = MaintenanceTicket.objects.filter(
+        status__in=MaintenanceTicketQuerySet.OPEN_STATUSES, visit__store__is_active=True
+    ).order_by().values('visit__store__area_id').annotate(
+        open_tickets=Count('id'), overdue_tickets=Count('id', filter=MaintenanceTicketQuerySet.overdue_q(today)),
+    )
+
+    blank = {'stores': 0, 'visited': 0, 'answers': 0, 'passed': 0,
+             'overdue_actions': 0, 'open_tickets': 0, 'overdue_tickets': 0}
+    rows = {area_id: dict(blank, area_id=area_id, name=name) for area_id, name in Area.objects.values_list('id', 'name')}
+    for queryset, key in ((stores, 'area_id'), (answers, 'visit__store__area_id'),
+                          (actions, 'visit__store__area_id'), (tickets, 'visit__store__area_id')):
+        for row in queryset:
+            area_id = row.pop(key)
+            rows.setdefault(area_id, dict(blank, area_id=area_id, name='Unassigned')).update(row)
+
+    def finish(row):
+        row['coverage'] = round(100.0 * row['visited'] / row['stores'], 1) if row['stores'] else None
+        row['compliance'] = round(100.0 * row['passed'] / row['answers'], 1) if row['answers'] else None
+        return row
+
+    totals = dict(blank, area_id=None, name='All areas')
+    for row in rows.values():
+        for field in blank:
+            totals[field] += row[field]
+    return {
+        # Named areas first, unassigned stores last
+        'areas': [finish(row) for row in sorted(rows.values(), key=lambda row: (row['area_id'] is None, row['name']))],
+        'totals': finish(totals),
+        'computed_at': timezone.now(),
+    }
+
+
+def get_area_kpis():
+    """Cached compute_area_kpis()"""
+    kpis = cache.get(AREA_KPI_CACHE_KEY)
+    if kpis is None:
+        kpis = compute_area_kpis()
+        cache.set(AREA_KPI_CACHE_KEY, kpis, STORE_ANALYTICS_CACHE_TIMEOUT)
+    return kpis
+
+
+def refresh_store_analytics_if_stale():
+    """on_commit hook: a submission saves its visit more than once, rebuild only once"""
+    if cache.get(STORE_ANALYTICS_CACHE_KEY) is None:
+        refresh_store_analytics()
+    get_area_kpis()
+
+
+def invalidate_store_analytics():
+    cache.delete_many([STORE_ANALYTICS_CACHE_KEY, AREA_KPI_CACHE_KEY])
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ChecklistConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'checklist'
+
+    def ready(self):
+        # Import signals to keep the search index in sync
+        from . import signals  # noqa: F401
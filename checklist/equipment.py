@@ -0,0 +1,132 @@
+"""
+Equipment catalog matching and recurring failure detection for maintenance tickets.
+"""
+import re
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Max, Min, Q
+from django.db.models.functions import Lower, Trim
+from django.utils import timezone
+
+from .models import EquipmentCategory, MaintenanceTicket, MaintenanceTicketQuerySet, Product
+
+NON_WORD_RE = re.compile(r'[^\w]+', re.UNICODE)
+
+
+def normalize_equipment(text):
+    """'  Espresso-Machine ' -> 'espresso machine'"""
+    return ' '.join(NON_WORD_RE.sub(' ', (text or '').lower()).split())
+
+
+def _singular(key):
+    return key[:-1] if key.endswith('s') and not key.endswith('ss') else key
+
+
+class EquipmentMatcher:
+    """
+    Matches free-text equipment to the catalog.
+
+    Loads products (optionally limited to store_ids) and categories once, so
+    matching many tickets costs two queries in total. Products are matched
+    per store on name, "name model_number" or model_number; categories on
+    name (singular or plural), an alias, or the longest category name
+    contained in the text.
+    """
+
+    def __init__(self, store_ids=None, aliases=None):
+        products = Product.objects.all()
+        if store_ids is not None:
+            products = products.filter(store_id__in=store_ids)
+
+        self.products = {}
+        for product_id, store_id, name, model_number, category_id in products.values_list(
+            'id', 'store_id', 'name', 'model_number', 'category_id'
+        ).iterator():
+            for key in (name, f'{name} {model_number}', model_number):
+                key = normalize_equipment(key)
+                if key:
+                    self.products.setdefault((store_id, key), (product_id, category_id))
+
+        self.categories = {}
+        for category_id, name in EquipmentCategory.objects.values_list('id', 'name'):
+            key = normalize_equipment(name)
+            self.categories.setdefault(key, category_id)
+            self.categories.setdefault(_singular(key), category_id)
+        # Longest first so "espresso machine" wins over "machine"
+        self.contained = sorted(self.categories.items(), key=lambda item: -len(item[0]))
+
+        self.aliases = {}
+        for text, category_name in (aliases or {}).items():
+            category_id = self.categories.get(normalize_equipment(category_name))
+            if category_id:
+                self.aliases[normalize_equipment(text)] = category_id
+
+    def match(self, store_id, text):
+        """Return (product_id, category_id); either may be None"""
+        key = normalize_equipment(text)
+        if not key:
+            return None, None
+        if (store_id, key) in self.products:
+            return self.products[(store_id, key)]
+
+        category_id = self.aliases.get(key) or self.categories.get(key) or self.categories.get(_singular(key))
+        if category_id is None:
+            padded = f' {key} '
+            for name, candidate in self.contained:
+                if f' {name} ' in padded:
+                    category_id = candidate
+                    break
+        return None, category_id
+
+
+def recurring_failures(days=30, min_tickets=2, store_ids=None, today=None):
+    """
+    Equipment with at least min_tickets tickets created in the last days at
+    the same store. Linked tickets group by product, then by category;
+    unlinked ones by their normalized text. Three grouped queries.
+
+    Returns dicts sorted by ticket count (descending) with store, equipment,
+    level ('product', 'category' or 'text'), tickets, open, first and last.
+    """
+    now = timezone.now() if today is None else timezone.make_aware(
+        datetime.combine(today + timedelta(days=1), time.min)
+    )
+    since = now - timedelta(days=days)
+
+    tickets = MaintenanceTicket.objects.filter(created_date__gte=since)
+    if store_ids is not None:
+        tickets = tickets.filter(visit__store_id__in=store_ids)
+    figures = {
+        'tickets': Count('id'),
+        'open': Count('id', filter=Q(status__in=MaintenanceTicketQuerySet.OPEN_STATUSES)),
+        'first': Min('created_date'),
+        'last': Max('created_date'),
+    }
+
+    levels = [
+        ('product', tickets.filter(product__isnull=False), 'product__name'),
+        ('category', tickets.filter(product__isnull=True, equipment_category__isnull=False),
+         'equipment_category__name'),
+        ('text', tickets.filter(product__isnull=True, equipment_category__isnull=True).annotate(
+            equipment_key=Lower(Trim('equipment'))
+        ), 'equipment_key'),
+    ]
+
+    rows = []
+    for level, queryset, equipment_field in levels:
+        grouped = queryset.order_by().values(
+            'visit__store_id', 'visit__store__name', equipment_field
+        ).annotate(**figures).filter(tickets__gte=min_tickets)
+        for row in grouped:
+            rows.append({
+                'level': level,
+                'store_id': row['visit__store_id'],
+                'store': row['visit__store__name'],
+                'equipment': row[equipment_field],
+                'tickets': row['tickets'],
+                'open': row['open'],
+                'first': row['first'],
+                'last': row['last'],
+            })
+    rows.sort(key=lambda row: (-row['tickets'], row['store'], row['equipment'] or ''))
+    return rows
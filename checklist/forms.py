@@ -1,4 +1,5 @@
 from django import forms
+from django.urls import reverse_lazy
 from .models import ActionPlanItem, AreaManagerVisit, ChecklistItem, Store, ChecklistQuestion
 from .models import MaintenanceTicket  # Add this import at the top
 from .models import PriorityChoices  # Add this import
@@ -43,10 +44,30 @@ class StoreForm(forms.ModelForm):
         model = Store
         fields = '__all__'
 
+class VisitAutocompleteWidget(forms.Select):
+    """
+    Select that renders only the chosen visit; the rest are fetched from the
+    visit autocomplete endpoint as the user types (see new_maintenance.js).
+    """
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        ids = [v for v in value if str(v).isdigit()]
+        selected = choices.queryset.filter(pk__in=ids) if ids else []
+        self.choices = [('', choices.field.empty_label)] + [(visit.pk, str(visit)) for visit in selected]
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
+
+
 class MaintenanceTicketForm(forms.ModelForm):
     visit = forms.ModelChoiceField(
         queryset=AreaManagerVisit.objects.select_related('store').order_by('-date'),
-        widget=forms.Select(attrs={'class': 'form-select'}),
+        widget=VisitAutocompleteWidget(attrs={
+            'class': 'form-select',
+            'data-autocomplete-url': reverse_lazy('checklist:visit_autocomplete'),
+        }),
         required=False,
         empty_label="Select a visit..."
     )
@@ -62,10 +83,12 @@ class MaintenanceTicketForm(forms.ModelForm):
             'status': forms.Select(attrs={'class': 'form-select'}),
         }
         
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, store_ids=None, **kwargs):
         super().__init__(*args, **kwargs)
         # Always make visit required
         self.fields['visit'].required = True
+        if store_ids is not None:
+            self.fields['visit'].queryset = self.fields['visit'].queryset.filter(store_id__in=store_ids)
 
 class MaintenanceTicketEditForm(forms.ModelForm):
     class Meta:
@@ -1,17 +1,20 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
-from checklist.models import Store
+
+from checklist.access import sync_profile_stores
+from users.models import Profile
 
 class Command(BaseCommand):
-    help = 'Automatically assigns all stores to admin users'
+    help = ('Automatically assigns all stores to admin users (see sync_store_access for how the change '
+            'reaches running web workers)')
 
     def handle(self, *args, **options):
-        admins = User.objects.filter(is_superuser=True)
-        stores = Store.objects.filter(is_active=True)
-        
-        for admin in admins:
-            if hasattr(admin, 'profile'):
-                admin.profile.stores.set(stores)
-                self.stdout.write(self.style.SUCCESS(f'Assigned stores to {admin.username}'))
-            else:
-                self.stdout.write(self.style.WARNING(f'Admin {admin.username} has no profile'))
\ No newline at end of file
+        for admin in User.objects.filter(is_superuser=True, profile__isnull=True):
+            self.stdout.write(self.style.WARNING(f'Admin {admin.username} has no profile'))
+
+        # Only the missing/removed rows are written, see sync_store_access for everyone else
+        added, removed = sync_profile_stores(Profile.objects.filter(user__is_superuser=True))
+        admins = len({profile_id for profile_id, _ in added | removed})
+        self.stdout.write(self.style.SUCCESS(
+            f'Assigned stores to admins: {len(added)} added, {len(removed)} removed across {admins} admins'
+        ))
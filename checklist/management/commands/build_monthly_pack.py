@@ -0,0 +1,143 @@
+import calendar
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from checklist.models import ActionPlanItem, AreaManagerVisit, ChecklistItem, MaintenanceTicket, Store
+from checklist.utils.report_packs import render_store_workbook, safe_filename
+
+UNASSIGNED_AREA = 'Unassigned'
+
+
+class Command(BaseCommand):
+    help = 'Build per-store monthly workbooks and zip them per area into MEDIA_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', required=True, help='Month to report on, as YYYY-MM')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes used to render workbooks (default: CPU count)')
+        parser.add_argument('--output-dir', help='Override the output directory (default: MEDIA_ROOT/monthly_packs/YYYY-MM)')
+
+    def handle(self, *args, **options):
+        try:
+            month_start = datetime.strptime(options['month'], '%Y-%m').date()
+        except ValueError:
+            raise CommandError('--month must be in YYYY-MM format')
+        month_end = date(month_start.year, month_start.month,
+                         calendar.monthrange(month_start.year, month_start.month)[1])
+        label = month_start.strftime('%Y-%m')
+
+        payloads = self.collect(month_start, month_end, label)
+        if not payloads:
+            self.stdout.write(self.style.WARNING('No active stores found'))
+            return
+
+        output_dir = Path(options['output_dir'] or Path(settings.MEDIA_ROOT) / 'monthly_packs' / label)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        archives = {}
+        try:
+            for area_id, area, file_name, content in self.render_all(payloads, max(1, options['workers'])):
+                if area_id not in archives:
+                    # Keyed and named by area id: distinct area names can share a safe_filename()
+                    stem = safe_filename(area) if area_id is None else f'{safe_filename(area)}_{area_id}'
+                    path = output_dir / f'{stem}_{label}.zip'
+                    archives[area_id] = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+                archives[area_id].writestr(file_name, content)
+        finally:
+            for archive in archives.values():
+                archive.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Built {len(payloads)} store workbooks in {len(archives)} area packs under {output_dir}'
+        ))
+
+    def render_all(self, payloads, workers):
+        if workers == 1 or len(payloads) == 1:
+            yield from map(render_store_workbook, payloads)
+            return
+
+        chunksize = max(1, len(payloads) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(render_store_workbook, payloads, chunksize=chunksize)
+
+    def collect(self, month_start, month_end, label):
+        """Load every store's figures for the month in a fixed number of queries"""
+        stores = Store.objects.filter(is_active=True).values_list(
+            'id', 'name', 'area_id', 'area__name'
+        ).order_by('area__name', 'name')
+        payloads = {
+            store_id: {
+                'store_id': store_id,
+                'store': name,
+                'area_id': area_id,
+                'area': area or UNASSIGNED_AREA,
+                'month': label,
+                'visits': [],
+                'categories': [],
+                'actions': [],
+                'tickets': [],
+            }
+            for store_id, name, area_id, area in stores
+        }
+
+        visits = AreaManagerVisit.objects.filter(
+            store__is_active=True, is_draft=False, date__range=(month_start, month_end)
+        ).values_list(
+            'store_id', 'date', 'manager__first_name', 'manager__last_name', 'manager__username',
+            'time_in', 'time_out', 'overall_score'
+        ).order_by('store_id', 'date')
+        for store_id, visit_date, first, last, username, time_in, time_out, score in visits:
+            payloads[store_id]['visits'].append({
+                'date': visit_date,
+                'manager': f'{first} {last}'.strip() or username,
+                'time_in': time_in,
+                'time_out': time_out,
+                'score': score,
+            })
+
+        categories = ChecklistItem.objects.filter(
+            visit__store__is_active=True, visit__is_draft=False, visit__date__range=(month_start, month_end)
+        ).values('visit__store_id', 'question__category__name').annotate(
+            total=Count('id'),
+            compliant=Count('id', filter=Q(answer=True))
+        ).order_by('visit__store_id', 'question__category__name')
+        for row in categories:
+            payloads[row['visit__store_id']]['categories'].append({
+                'name': row['question__category__name'] or 'Uncategorized',
+                'total': row['total'],
+                'compliant': row['compliant'],
+            })
+
+        actions = ActionPlanItem.objects.filter(
+            visit__store__is_active=True, visit__is_draft=False, visit__date__range=(month_start, month_end)
+        ).values_list('visit__store_id', 'what', 'who', 'timeframe', 'status', 'priority').order_by('visit__store_id', 'timeframe')
+        for store_id, what, who, timeframe, status, priority in actions:
+            payloads[store_id]['actions'].append({
+                'what': what, 'who': who, 'timeframe': timeframe, 'status': status, 'priority': priority,
+            })
+
+        tickets = MaintenanceTicket.objects.filter(
+            visit__store__is_active=True, created_date__date__range=(month_start, month_end)
+        ).values_list(
+            'visit__store_id', 'equipment', 'issue_description', 'priority', 'status', 'due_date', 'created_date'
+        ).order_by('visit__store_id', 'created_date')
+        for store_id, equipment, issue, priority, status, due_date, created in tickets:
+            payloads[store_id]['tickets'].append({
+                'equipment': equipment,
+                'issue_description': issue,
+                'priority': priority,
+                'status': status,
+                'due_date': due_date,
+                # Excel cannot store timezone-aware datetimes
+                'created_date': timezone.localtime(created).replace(tzinfo=None) if created else None,
+            })
+
+        return list(payloads.values())
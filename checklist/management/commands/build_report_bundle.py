@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from checklist.models import AreaManagerVisit
+from checklist.views.checklist_views import ChecklistManager
+
+
+class Command(BaseCommand):
+    help = 'Render many visit reports into one print-ready HTML file under MEDIA_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', default='', help='Comma-separated visit ids')
+        parser.add_argument('--store', help='Store id')
+        parser.add_argument('--manager', help='Manager user id')
+        parser.add_argument('--date-from', help='First visit date, YYYY-MM-DD')
+        parser.add_argument('--date-to', help='Last visit date, YYYY-MM-DD')
+        parser.add_argument('--output', help='Output file (default: MEDIA_ROOT/report_bundles/visit_reports_<timestamp>.html)')
+
+    def handle(self, *args, **options):
+        params = QueryDict(mutable=True)
+        for key in ('ids', 'store', 'manager', 'date_from', 'date_to'):
+            if options.get(key):
+                params[key] = options[key]
+
+        try:
+            visits = ChecklistManager.filter_visits_for_print(
+                AreaManagerVisit.objects.filter(is_draft=False), params
+            )
+        except ValidationError as e:
+            raise CommandError(e.messages[0])
+
+        visits = list(ChecklistManager.get_printable_visits(visits.order_by('store__name', 'date')))
+        if not visits:
+            raise CommandError('No visits matched the selection')
+
+        now = timezone.now()
+        output = Path(options['output'] or Path(settings.MEDIA_ROOT) / 'report_bundles' /
+                      f"visit_reports_{now.strftime('%Y%m%d_%H%M%S')}.html")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(
+            render_to_string('checklist/print_visit_bundle.html', {'visits': visits, 'generated_at': now}),
+            encoding='utf-8'
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(visits)} visit reports to {output}'))
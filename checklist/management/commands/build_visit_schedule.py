@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from checklist.scheduling import build_visit_schedule
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the nightly visit schedule (next visit due per area manager and store)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Schedule as of YYYY-MM-DD (default: today)')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--date must be YYYY-MM-DD')
+
+        schedule = build_visit_schedule(today)
+        managers = len({row.manager_id for row in schedule})
+        overdue = sum(1 for row in schedule if row.due_date < row.computed_on)
+        self.stdout.write(self.style.SUCCESS(
+            f'Scheduled {len(schedule)} store visits for {managers} managers ({overdue} overdue)'
+        ))
@@ -0,0 +1,79 @@
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from checklist.models import Store
+
+COORDINATE_PLACES = Decimal('0.000001')
+
+
+def _coordinate(value, bound):
+    try:
+        number = Decimal(str(value).strip()).quantize(COORDINATE_PLACES)
+    except (InvalidOperation, ValueError):
+        return None
+    return number if -bound <= number <= bound else None
+
+
+class Command(BaseCommand):
+    help = ('Load store latitude/longitude from a CSV with an id or name column plus latitude and longitude '
+            '(e.g. a batch geocoder export); no network lookups are made')
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file')
+        parser.add_argument('--overwrite', action='store_true', help='Replace coordinates that are already set')
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without saving them')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as csv_file:
+                reader = csv.DictReader(csv_file)
+                fields = {name.strip().lower(): name for name in reader.fieldnames or ()}
+                rows = list(reader)
+        except OSError as exc:
+            raise CommandError(f'Cannot read {options["csv_file"]}: {exc}')
+
+        lat_field = fields.get('latitude') or fields.get('lat')
+        lon_field = fields.get('longitude') or fields.get('lon') or fields.get('lng')
+        if not lat_field or not lon_field or not ('id' in fields or 'name' in fields):
+            raise CommandError('CSV needs latitude and longitude columns and an id or name column')
+
+        stores = Store.objects.only('id', 'name', 'latitude', 'longitude')
+        by_id = {store.id: store for store in stores}
+        by_name = {store.name.strip().lower(): store for store in by_id.values()}
+
+        changed, skipped, errors = {}, 0, []
+        for line, row in enumerate(rows, start=2):
+            store = None
+            if 'id' in fields and (row[fields['id']] or '').strip().isdigit():
+                store = by_id.get(int(row[fields['id']]))
+            elif 'name' in fields:
+                store = by_name.get((row[fields['name']] or '').strip().lower())
+            if store is None:
+                errors.append(f'line {line}: unknown store')
+                continue
+
+            latitude = _coordinate(row[lat_field], 90)
+            longitude = _coordinate(row[lon_field], 180)
+            if latitude is None or longitude is None:
+                errors.append(f'line {line}: invalid coordinates for {store.name}')
+                continue
+            if store.latitude is not None and not options['overwrite']:
+                skipped += 1
+                continue
+            if (store.latitude, store.longitude) != (latitude, longitude):
+                store.latitude, store.longitude = latitude, longitude
+                changed[store.id] = store
+
+        for error in errors:
+            self.stderr.write(error)
+        summary = f'{len(changed)} stores ({skipped} already located, {len(errors)} rows rejected)'
+        if options['dry_run']:
+            self.stdout.write(f'Would update {summary}')
+            return
+
+        with transaction.atomic():
+            Store.objects.bulk_update(changed.values(), ['latitude', 'longitude'])
+        self.stdout.write(self.style.SUCCESS(f'Updated {summary}'))
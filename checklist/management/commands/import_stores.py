@@ -0,0 +1,45 @@
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from checklist.utils.question_import import READ_ERRORS
+from checklist.utils.store_import import StoreImport, read_store_rows
+
+
+class Command(BaseCommand):
+    help = ('Onboard stores from a CSV or XLSX sheet (Name, Address and optional Area, Manager, Phone, Email, '
+            'Active, Equipment Categories, Latitude, Longitude); re-runs update stores matched by name and address')
+
+    def add_arguments(self, parser):
+        parser.add_argument('file')
+        parser.add_argument('--encoding', default='utf-8-sig', help='CSV encoding (default: utf-8-sig)')
+        parser.add_argument('--dry-run', action='store_true', help='Show the changes without saving them')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['file'], 'rb') as handle:
+                rows = read_store_rows(File(handle, name=options['file']), options['encoding'])
+        except OSError as e:
+            raise CommandError(f'Cannot read {options["file"]}: {e}')
+        except READ_ERRORS as e:
+            raise CommandError(str(e))
+
+        store_import = StoreImport(rows)
+        for row in store_import.creates:
+            self.stdout.write(f'+ {row["name"]} ({row["address"]})')
+        for update in store_import.updates:
+            store = update['store']
+            for field, (before, after) in update['changes'].items():
+                self.stdout.write(f'~ {store.name}: {field} {before!r} -> {after!r}')
+        if store_import.new_areas:
+            self.stdout.write(f'New areas: {", ".join(store_import.new_areas)}')
+        if store_import.new_categories:
+            self.stdout.write(f'New equipment categories: {", ".join(store_import.new_categories)}')
+
+        summary = store_import.summary()
+        counts = (f"{summary['created']} created, {summary['updated']} updated, {summary['unchanged']} unchanged, "
+                  f"{summary['duplicates']} duplicate rows")
+        if options['dry_run'] or not store_import.has_changes:
+            self.stdout.write(f'Dry run: {counts}' if options['dry_run'] else 'Nothing to import')
+            return
+        store_import.apply()
+        self.stdout.write(self.style.SUCCESS(f'Stores imported: {counts}'))
@@ -0,0 +1,209 @@
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from checklist.models import (
+    ActionPlanItem, AreaManagerVisit, ChecklistItem, ChecklistQuestion, Store
+)
+from checklist.utils.visit_workbooks import normalize_key, parse_visit_workbook
+
+
+class Command(BaseCommand):
+    help = 'Backfill historical visits from filled copies of the "Area Manger Visit.xlsx" paper form'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directory searched recursively for .xlsx workbooks')
+        parser.add_argument('--manager', required=True, help='Username recorded as the manager of imported visits')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes used to parse workbooks (default: CPU count)')
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Number of workbooks written per transaction (default: 200)')
+        parser.add_argument('--dry-run', action='store_true', help='Parse and validate only, write nothing')
+        parser.add_argument('--report', help='Write a per-file CSV report to this path')
+
+    def handle(self, *args, **options):
+        directory = Path(options['directory'])
+        if not directory.is_dir():
+            raise CommandError(f'{directory} is not a directory')
+
+        try:
+            self.manager = User.objects.get(username=options['manager'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["manager"]}" does not exist')
+
+        paths = sorted(
+            p for p in directory.rglob('*.xlsx')
+            if p.is_file() and not p.name.startswith('~$')
+        )
+        if not paths:
+            self.stdout.write(self.style.WARNING(f'No workbooks found in {directory}'))
+            return
+
+        self.dry_run = options['dry_run']
+        self.batch_size = max(1, options['batch_size'])
+        self.manager_name = self.manager.get_full_name() or self.manager.username
+        self.report = []
+        self.totals = {'visits': 0, 'items': 0, 'actions': 0, 'skipped': 0, 'failed': 0}
+
+        # Cached lookups, one query each for the whole run
+        self.stores = {
+            normalize_key(name): store_id
+            for store_id, name in Store.objects.values_list('id', 'name')
+        }
+        self.questions = {
+            (normalize_key(category), number): question_id
+            for question_id, category, number in ChecklistQuestion.objects.values_list(
+                'id', 'category__name', 'number'
+            )
+        }
+
+        batch = []
+        for parsed in self.parse_all(paths, max(1, options['workers'])):
+            if 'error' in parsed:
+                self.record(parsed['path'], 'error', parsed['error'])
+                continue
+
+            store_id = self.stores.get(normalize_key(parsed['store']))
+            if store_id is None:
+                self.record(parsed['path'], 'error', f'Unknown store "{parsed["store"]}"')
+                continue
+
+            parsed['store_id'] = store_id
+            batch.append(parsed)
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+
+        if batch:
+            self.flush(batch)
+
+        if options['report']:
+            self.write_report(options['report'])
+
+        prefix = '[dry run] Would import' if self.dry_run else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {self.totals['visits']} visits, {self.totals['items']} checklist items and "
+            f"{self.totals['actions']} action items from {len(paths)} workbooks "
+            f"({self.totals['skipped']} already imported, {self.totals['failed']} failed)"
+        ))
+
+    def parse_all(self, paths, workers):
+        """Yield parsed workbooks, fanning the openpyxl work out across processes"""
+        if workers == 1 or len(paths) == 1:
+            yield from map(parse_visit_workbook, paths)
+            return
+
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(parse_visit_workbook, paths, chunksize=chunksize)
+
+    def flush(self, batch):
+        """Write one batch of parsed workbooks using bulk inserts"""
+        existing = set(
+            AreaManagerVisit.objects.filter(
+                manager=self.manager,
+                store_id__in={p['store_id'] for p in batch},
+                date__in={p['visit_date'] for p in batch},
+            ).values_list('store_id', 'date')
+        )
+
+        pending = []
+        for parsed in batch:
+            if (parsed['store_id'], parsed['visit_date']) in existing:
+                self.totals['skipped'] += 1
+                self.record(parsed['path'], 'skipped', 'A visit for this store and date already exists')
+                continue
+            existing.add((parsed['store_id'], parsed['visit_date']))
+
+            answers = []
+            unmatched = []
+            for answer in parsed['answers']:
+                question_id = self.questions.get((normalize_key(answer['category']), answer['number']))
+                if question_id is None:
+                    unmatched.append(f"{answer['category']} Q{answer['number']}")
+                else:
+                    answers.append((question_id, answer['answer']))
+
+            if not answers:
+                self.record(parsed['path'], 'error', 'No questions matched the current questionnaire')
+                continue
+
+            pending.append((parsed, answers))
+            message = f'Unmatched questions: {", ".join(unmatched)}' if unmatched else ''
+            self.record(parsed['path'], 'ok', message)
+
+        self.totals['visits'] += len(pending)
+        self.totals['items'] += sum(len(answers) for _, answers in pending)
+        self.totals['actions'] += sum(len(parsed['actions']) for parsed, _ in pending)
+
+        if self.dry_run or not pending:
+            return
+
+        with transaction.atomic():
+            visits = []
+            for parsed, answers in pending:
+                positive = sum(1 for _, answer in answers if answer)
+                visit_kwargs = {
+                    'store_id': parsed['store_id'],
+                    'manager': self.manager,
+                    'date': parsed['visit_date'],
+                    'month': parsed['month'],
+                    'day': parsed['visit_date'].day,
+                    'overall_score': round((positive / len(answers)) * 100),
+                    'notes': f"Imported from {Path(parsed['path']).name}",
+                }
+                if parsed['time_in']:
+                    visit_kwargs['time_in'] = parsed['time_in']
+                visits.append(AreaManagerVisit(**visit_kwargs))
+
+            AreaManagerVisit.objects.bulk_create(visits)
+
+            # date is auto_now_add, so bulk_create stamped today's date on every
+            # row; restore the historical dates in one UPDATE per batch
+            for visit, (parsed, _) in zip(visits, pending):
+                visit.date = parsed['visit_date']
+            AreaManagerVisit.objects.bulk_update(visits, ['date'])
+
+            items = []
+            # Historical actions were followed up on paper, so they are
+            # imported closed rather than flooding the open action plan
+            actions = []
+            for visit, (parsed, answers) in zip(visits, pending):
+                items.extend(
+                    ChecklistItem(visit=visit, question_id=question_id, answer=answer)
+                    for question_id, answer in answers
+                )
+                actions.extend(
+                    ActionPlanItem(
+                        visit=visit,
+                        what=action['what'],
+                        who=(action['who'] or self.manager_name)[:100],
+                        timeframe=action['timeframe'] or parsed['visit_date'] + timedelta(days=7),
+                        status='closed',
+                        priority='medium',
+                        remarks=action['remarks'],
+                    )
+                    for action in parsed['actions']
+                )
+
+            ChecklistItem.objects.bulk_create(items, batch_size=1000)
+            ActionPlanItem.objects.bulk_create(actions, batch_size=1000)
+
+    def record(self, path, status, message):
+        self.report.append((path, status, message))
+        if status == 'error':
+            self.totals['failed'] += 1
+            self.stderr.write(f'{path}: {message}')
+
+    def write_report(self, report_path):
+        with open(report_path, 'w', newline='', encoding='utf-8') as report_file:
+            writer = csv.writer(report_file)
+            writer.writerow(['File', 'Status', 'Message'])
+            writer.writerows(self.report)
+        self.stdout.write(f'Per-file report written to {report_path}')
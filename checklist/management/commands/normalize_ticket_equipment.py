@@ -0,0 +1,58 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from checklist.equipment import EquipmentMatcher
+from checklist.models import MaintenanceTicket
+
+
+class Command(BaseCommand):
+    help = 'Link maintenance tickets to catalog products and equipment categories from their free-text equipment'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--aliases', help='CSV of text,category rows mapping local names to categories')
+        parser.add_argument('--all', action='store_true', help='Re-match tickets that are already linked')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report matches without saving them')
+
+    def handle(self, *args, **options):
+        aliases = {}
+        if options['aliases']:
+            try:
+                with open(options['aliases'], newline='', encoding='utf-8') as alias_file:
+                    for row in csv.reader(alias_file):
+                        if len(row) >= 2 and row[0].strip() and row[1].strip():
+                            aliases[row[0]] = row[1]
+            except OSError as exc:
+                raise CommandError(f'Cannot read aliases: {exc}')
+
+        matcher = EquipmentMatcher(aliases=aliases)
+        tickets = MaintenanceTicket.objects.all()
+        if not options['all']:
+            tickets = tickets.filter(product__isnull=True, equipment_category__isnull=True)
+
+        changed = []
+        unmatched = 0
+        for ticket_id, store_id, equipment, product_id, category_id in tickets.values_list(
+            'id', 'visit__store_id', 'equipment', 'product_id', 'equipment_category_id'
+        ).iterator(chunk_size=options['batch_size']):
+            match = matcher.match(store_id, equipment)
+            if match == (None, None):
+                unmatched += 1
+                continue
+            if match != (product_id, category_id):
+                changed.append(MaintenanceTicket(id=ticket_id, product_id=match[0], equipment_category_id=match[1]))
+
+        products = sum(1 for ticket in changed if ticket.product_id)
+        summary = (f'{len(changed)} tickets ({products} to a product, {len(changed) - products} to a category only), '
+                   f'{unmatched} unmatched')
+        if options['dry_run']:
+            self.stdout.write(f'Would link {summary}')
+            return
+
+        with transaction.atomic():
+            MaintenanceTicket.objects.bulk_update(
+                changed, ['product', 'equipment_category'], batch_size=options['batch_size']
+            )
+        self.stdout.write(self.style.SUCCESS(f'Linked {summary}'))
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from checklist.sla import ROLLUP_WINDOW_DAYS, build_sla_rollup
+
+
+class Command(BaseCommand):
+    help = 'Recompute the nightly maintenance SLA rollup (time to close, on-time rate, backlog age)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Rollup date, YYYY-MM-DD (default: today)')
+        parser.add_argument('--window-days', type=int, default=ROLLUP_WINDOW_DAYS,
+                            help='Only tickets closed within this many days count towards close times')
+
+    def handle(self, *args, **options):
+        computed_on = None
+        if options['date']:
+            try:
+                computed_on = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--date must be YYYY-MM-DD')
+
+        rollups = build_sla_rollup(computed_on, options['window_days'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(rollups)} SLA rollup rows'))
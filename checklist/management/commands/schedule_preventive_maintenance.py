@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Subquery
+from django.utils import timezone
+
+from checklist.analytics import invalidate_store_analytics
+from checklist.models import AreaManagerVisit, MaintenanceTicket, MaintenanceTicketQuerySet, Product
+from checklist.search import index_instances
+
+
+class Command(BaseCommand):
+    help = 'Create preventive maintenance tickets for products whose service interval falls due'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lookahead-days', type=int, default=14,
+                            help='Create tickets for products due within this many days (default 14)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be created')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        horizon = today + timedelta(days=options['lookahead_days'])
+
+        # One query: products without an open ticket (NOT EXISTS anti-join),
+        # with their last completed service and the store's latest visit
+        open_tickets = MaintenanceTicket.objects.filter(
+            product=OuterRef('pk'), status__in=MaintenanceTicketQuerySet.OPEN_STATUSES
+        )
+        last_service = MaintenanceTicket.objects.filter(
+            product=OuterRef('pk'), status='completed'
+        ).order_by().values('product').annotate(last=Max('closed_date')).values('last')
+        latest_visit = AreaManagerVisit.objects.filter(
+            store=OuterRef('store_id'), is_draft=False
+        ).order_by('-date', '-id').values('id')[:1]
+
+        candidates = Product.objects.filter(maintenance_interval__gt=0).exclude(
+            Exists(open_tickets)
+        ).annotate(
+            last_service=Subquery(last_service), visit_id=Subquery(latest_visit)
+        ).values_list(
+            'id', 'name', 'model_number', 'category_id', 'installation_date',
+            'maintenance_interval', 'last_service', 'visit_id'
+        )
+
+        tickets = []
+        no_visit = 0
+        for (product_id, name, model_number, category_id, installed, interval,
+             last_service, visit_id) in candidates.iterator(chunk_size=options['batch_size']):
+            base = timezone.localdate(last_service) if last_service else installed
+            due = base + timedelta(days=interval) if base else today
+            if due > horizon:
+                continue
+            if visit_id is None:
+                # Tickets hang off a visit; stores never visited cannot take one yet
+                no_visit += 1
+                continue
+            label = f"{name} ({model_number})" if model_number else name
+            tickets.append(MaintenanceTicket(
+                visit_id=visit_id,
+                product_id=product_id,
+                equipment_category_id=category_id,
+                equipment=label[:100],
+                issue_description=f"Preventive maintenance for {label}, due every {interval} days.",
+                priority='medium',
+                due_date=due,
+                status='pending',
+            ))
+
+        if options['dry_run']:
+            self.stdout.write(f'Would create {len(tickets)} preventive tickets ({no_visit} products skipped: store never visited)')
+            return
+
+        with transaction.atomic():
+            created = MaintenanceTicket.objects.bulk_create(tickets, batch_size=options['batch_size'])
+            # bulk_create skips the post_save search indexing and analytics invalidation
+            visits = AreaManagerVisit.objects.in_bulk({ticket.visit_id for ticket in created})
+            for ticket in created:
+                ticket.visit = visits[ticket.visit_id]
+            index_instances(created)
+        invalidate_store_analytics()
+
+        if no_visit:
+            self.stdout.write(self.style.WARNING(f'Skipped {no_visit} products at stores with no submitted visit'))
+        self.stdout.write(self.style.SUCCESS(f'Created {len(created)} preventive maintenance tickets'))
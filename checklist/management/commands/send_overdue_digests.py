@@ -0,0 +1,104 @@
+from collections import defaultdict
+from datetime import datetime
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from checklist.models import ActionPlanItem, MaintenanceTicket
+
+RECIPIENT_FIELDS = ('visit__manager_id', 'visit__manager__email', 'visit__manager__first_name',
+                    'visit__manager__username')
+
+
+class Command(BaseCommand):
+    help = 'Email every manager a digest of their overdue action items and maintenance tickets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Treat this date (YYYY-MM-DD) as today')
+        parser.add_argument('--base-url', default='', help='Prefix for links in the email, e.g. https://example.com')
+        parser.add_argument('--dry-run', action='store_true', help='Render digests but do not send them')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                today = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--date must be YYYY-MM-DD')
+        else:
+            today = timezone.now().date()
+
+        messages = []
+        skipped = 0
+        for digest in self.collect(today).values():
+            if not digest['email']:
+                skipped += 1
+                continue
+            messages.append(self.build_message(digest, today, options['base_url'].rstrip('/')))
+
+        if options['dry_run']:
+            for message in messages:
+                self.stdout.write(f'{message.to[0]}: {message.subject}')
+            self.stdout.write(self.style.SUCCESS(f'Rendered {len(messages)} digests (dry run)'))
+            return
+
+        sent = 0
+        if messages:
+            # One connection for the whole run
+            with get_connection() as connection:
+                sent = connection.send_messages(messages) or 0
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'Skipped {skipped} managers without an email address'))
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} overdue digests'))
+
+    def collect(self, today):
+        """Group overdue actions and tickets by manager with one query per model"""
+        digests = defaultdict(lambda: {'email': '', 'name': '', 'actions': [], 'tickets': []})
+
+        actions = ActionPlanItem.objects.overdue(today).order_by('visit__manager_id', 'timeframe').values(
+            'id', 'what', 'who', 'timeframe', 'priority', 'visit__store__name', *RECIPIENT_FIELDS
+        )
+        for action in actions.iterator():
+            digest = self.digest_for(digests, action)
+            action['days_overdue'] = (today - action['timeframe']).days
+            digest['actions'].append(action)
+
+        tickets = MaintenanceTicket.objects.overdue(today).order_by('visit__manager_id', 'due_date').values(
+            'id', 'equipment', 'issue_description', 'due_date', 'priority', 'status', 'visit__store__name',
+            *RECIPIENT_FIELDS
+        )
+        for ticket in tickets.iterator():
+            digest = self.digest_for(digests, ticket)
+            ticket['days_overdue'] = (today - ticket['due_date']).days
+            digest['tickets'].append(ticket)
+
+        return digests
+
+    @staticmethod
+    def digest_for(digests, row):
+        digest = digests[row['visit__manager_id']]
+        digest['email'] = row['visit__manager__email']
+        digest['name'] = row['visit__manager__first_name'] or row['visit__manager__username']
+        return digest
+
+    @staticmethod
+    def build_message(digest, today, base_url):
+        context = {
+            **digest,
+            'today': today,
+            'action_plan_url': base_url + reverse('checklist:action_plan'),
+            'maintenance_url': base_url + reverse('checklist:maintenance_list'),
+        }
+        subject = (f"Overdue: {len(digest['actions'])} action item{'s' if len(digest['actions']) != 1 else ''}, "
+                   f"{len(digest['tickets'])} maintenance ticket{'s' if len(digest['tickets']) != 1 else ''}")
+        message = EmailMultiAlternatives(
+            subject=subject,
+            body=render_to_string('checklist/email/overdue_digest.txt', context),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[digest['email']],
+        )
+        message.attach_alternative(render_to_string('checklist/email/overdue_digest.html', context), 'text/html')
+        return message
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from checklist.access import sync_profile_stores
+
+
+class Command(BaseCommand):
+    help = ('Rebuild Profile.stores for every user from their areas (Profile.areas and Area.users); '
+            'superusers get every active store. Takes effect in running web workers at once through the '
+            'shared cache; with a per-process cache backend only after the access cache TTL (1h) or a restart')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-extra', action='store_true',
+                            help='Keep stores assigned directly that no area grants')
+        parser.add_argument('--dry-run', action='store_true', help='Report the changes without saving them')
+
+    def handle(self, *args, **options):
+        added, removed = sync_profile_stores(prune=not options['keep_extra'], dry_run=options['dry_run'])
+        users = len({profile_id for profile_id, _ in added | removed})
+        summary = f'{len(added)} store assignments added, {len(removed)} removed across {users} users'
+        if options['dry_run']:
+            self.stdout.write(f'Would sync: {summary}')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Synced: {summary}'))
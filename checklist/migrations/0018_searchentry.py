@@ -0,0 +1,79 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS checklist_search_fts USING fts5(
+        title, body, content='checklist_searchentry', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS checklist_search_ai AFTER INSERT ON checklist_searchentry BEGIN
+        INSERT INTO checklist_search_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS checklist_search_ad AFTER DELETE ON checklist_searchentry BEGIN
+        INSERT INTO checklist_search_fts(checklist_search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS checklist_search_au AFTER UPDATE ON checklist_searchentry BEGIN
+        INSERT INTO checklist_search_fts(checklist_search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO checklist_search_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS checklist_search_au',
+    'DROP TRIGGER IF EXISTS checklist_search_ad',
+    'DROP TRIGGER IF EXISTS checklist_search_ai',
+    'DROP TABLE IF EXISTS checklist_search_fts',
+]
+
+POSTGRES_FORWARD = [
+    """ALTER TABLE checklist_searchentry ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED""",
+    'CREATE INDEX checklist_searchentry_vector_idx ON checklist_searchentry USING GIN (search_vector)',
+]
+
+POSTGRES_REVERSE = [
+    'DROP INDEX IF EXISTS checklist_searchentry_vector_idx',
+    'ALTER TABLE checklist_searchentry DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_fulltext(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD})
+
+
+def drop_fulltext(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklist', '0017_rename_description_maintenanceticket_issue_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('action', 'Action Item'), ('ticket', 'Maintenance Ticket'), ('visit', 'Visit Notes'), ('store', 'Store')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('store', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='checklist.store')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_entry')],
+            },
+        ),
+        migrations.RunPython(create_fulltext, drop_fulltext),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklist', '0018_searchentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='actionplanitem',
+            index=models.Index(fields=['status', 'timeframe'], name='action_status_timeframe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='actionplanitem',
+            index=models.Index(fields=['-created_at', '-id'], name='action_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='areamanagervisit',
+            index=models.Index(condition=models.Q(('is_draft', False)), fields=['manager', '-date'], name='visit_manager_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='areamanagervisit',
+            index=models.Index(condition=models.Q(('is_draft', False)), fields=['store', '-date'], name='visit_store_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='areamanagervisit',
+            index=models.Index(condition=models.Q(('is_draft', False)), fields=['-date'], name='visit_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='checklistitem',
+            index=models.Index(fields=['visit', 'answer'], name='checklistitem_visit_answer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenanceticket',
+            index=models.Index(fields=['status', 'due_date'], name='ticket_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenanceticket',
+            index=models.Index(fields=['-created_date'], name='ticket_created_idx'),
+        ),
+    ]
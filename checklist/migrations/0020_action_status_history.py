@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:54
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def seed_closed_items(apps, schema_editor):
+    """
+    Items closed before history existed get one open -> closed row at their
+    last update, the best available approximation of when they were closed.
+    """
+    ActionPlanItem = apps.get_model('checklist', 'ActionPlanItem')
+    ActionItemStatusChange = apps.get_model('checklist', 'ActionItemStatusChange')
+    closed = ActionPlanItem.objects.filter(status='closed').values_list('id', 'updated_at')
+    ActionItemStatusChange.objects.bulk_create(
+        [
+            ActionItemStatusChange(action_item_id=item_id, from_status='open', to_status='closed', changed_at=updated_at)
+            for item_id, updated_at in closed.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklist', '0019_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActionItemStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('open', 'Open'), ('in_progress', 'In Progress'), ('closed', 'Closed')], max_length=20)),
+                ('to_status', models.CharField(choices=[('open', 'Open'), ('in_progress', 'In Progress'), ('closed', 'Closed')], max_length=20)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('action_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_changes', to='checklist.actionplanitem')),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['changed_at', 'id'],
+                'indexes': [models.Index(fields=['action_item', 'changed_at'], name='action_change_item_idx'), models.Index(fields=['to_status', 'changed_at'], name='action_change_status_idx')],
+            },
+        ),
+        migrations.RunPython(seed_closed_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.6 on 2026-10-19 04:57
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def merge_duplicate_actions(apps, schema_editor):
+    """
+    Link existing items to their question by the generated "what" text, then
+    fold open duplicates per (store, question) into the oldest item: their
+    occurrences are added to it and their remarks, responsible person and due
+    date are appended to its remarks before they are deleted.
+
+    Not reversible: the merged items are gone, only their text survives in
+    the remarks of the item they were folded into.
+    """
+    ActionPlanItem = apps.get_model('checklist', 'ActionPlanItem')
+    ChecklistQuestion = apps.get_model('checklist', 'ChecklistQuestion')
+    SearchEntry = apps.get_model('checklist', 'SearchEntry')
+
+    question_by_text = {
+        f"{category_name} - Q{number}: {text}": question_id
+        for question_id, category_name, number, text in ChecklistQuestion.objects.values_list(
+            'id', 'category__name', 'number', 'text'
+        ).iterator()
+    }
+
+    items = list(ActionPlanItem.objects.values_list(
+        'id', 'what', 'status', 'visit__store_id', 'visit__date', 'occurrences', 'remarks', 'who', 'timeframe'
+    ))
+    to_update = []
+    open_groups = defaultdict(list)
+    for item_id, what, status, store_id, visit_date, occurrences, remarks, who, timeframe in items:
+        item = ActionPlanItem(id=item_id, question_id=question_by_text.get(what), last_seen=visit_date)
+        to_update.append(item)
+        if item.question_id and status != 'closed':
+            open_groups[(store_id, item.question_id)].append(
+                (item_id, visit_date, occurrences, remarks, who, timeframe)
+            )
+    ActionPlanItem.objects.bulk_update(to_update, ['question', 'last_seen'], batch_size=1000)
+
+    survivors = []
+    duplicate_ids = []
+    for group in open_groups.values():
+        if len(group) < 2:
+            continue
+        group.sort()
+        survivor, duplicates = group[0], group[1:]
+        merged = [
+            f"[Merged #{item_id}, visit {visit_date}, {who or 'unassigned'}, due {timeframe}] {remarks}".rstrip()
+            for item_id, visit_date, _, remarks, who, timeframe in duplicates
+        ]
+        survivors.append(ActionPlanItem(
+            id=survivor[0],
+            occurrences=sum(occurrences for _, _, occurrences, _, _, _ in group),
+            last_seen=max(visit_date for _, visit_date, _, _, _, _ in group),
+            remarks='\n'.join(part for part in [survivor[3]] + merged if part),
+        ))
+        duplicate_ids.extend(item_id for item_id, _, _, _, _, _ in duplicates)
+
+    ActionPlanItem.objects.bulk_update(survivors, ['occurrences', 'last_seen', 'remarks'], batch_size=1000)
+    for start in range(0, len(duplicate_ids), 500):
+        batch = duplicate_ids[start:start + 500]
+        SearchEntry.objects.filter(kind='action', object_id__in=batch).delete()
+        ActionPlanItem.objects.filter(id__in=batch).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklist', '0020_action_status_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='actionplanitem',
+            name='last_seen',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='actionplanitem',
+            name='occurrences',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='actionplanitem',
+            name='question',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='action_items', to='checklist.checklistquestion'),
+        ),
+        migrations.AddIndex(
+            model_name='actionplanitem',
+            index=models.Index(fields=['question', 'status'], name='action_question_status_idx'),
+        ),
+        # No reverse: deleted duplicates cannot be restored (see merge_duplicate_actions)
+        migrations.RunPython(merge_duplicate_actions),
+    ]
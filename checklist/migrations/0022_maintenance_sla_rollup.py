@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklist', '0021_consolidate_repeat_actions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceSLARollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('computed_on', models.DateField()),
+                ('group_by', models.CharField(choices=[('all', 'All tickets'), ('store', 'Store'), ('area', 'Area'), ('equipment', 'Equipment'), ('priority', 'Priority')], max_length=20)),
+                ('group_key', models.CharField(blank=True, max_length=100)),
+                ('label', models.CharField(max_length=200)),
+                ('closed_count', models.PositiveIntegerField(default=0)),
+                ('avg_close_hours', models.FloatField(blank=True, null=True)),
+                ('p50_close_hours', models.FloatField(blank=True, null=True)),
+                ('p90_close_hours', models.FloatField(blank=True, null=True)),
+                ('on_time_rate', models.FloatField(blank=True, help_text='Share of closed tickets with a due date closed on time (0-100)', null=True)),
+                ('open_count', models.PositiveIntegerField(default=0)),
+                ('age_0_7', models.PositiveIntegerField(default=0)),
+                ('age_8_30', models.PositiveIntegerField(default=0)),
+                ('age_31_90', models.PositiveIntegerField(default=0)),
+                ('age_over_90', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-computed_on', 'group_by', 'label'],
+                'constraints': [models.UniqueConstraint(fields=('computed_on', 'group_by', 'group_key'), name='unique_sla_rollup')],
+            },
+        ),
+    ]
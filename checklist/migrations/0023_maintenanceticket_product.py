@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklist', '0022_maintenance_sla_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maintenanceticket',
+            name='product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='maintenance_tickets', to='checklist.product'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenanceticket',
+            index=models.Index(fields=['product', 'status'], name='ticket_product_status_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklist', '0023_maintenanceticket_product'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='maintenanceticket',
+            name='equipment_category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='maintenance_tickets', to='checklist.equipmentcategory'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenanceticket',
+            index=models.Index(fields=['equipment_category', 'created_date'], name='ticket_category_created_idx'),
+        ),
+    ]
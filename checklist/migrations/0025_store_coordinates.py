@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklist', '0024_maintenanceticket_equipment_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+    ]
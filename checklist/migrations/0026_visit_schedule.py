@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 05:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklist', '0025_store_coordinates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='area',
+            name='visit_frequency_days',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Target days between visits to each store (default 30)', null=True),
+        ),
+        migrations.CreateModel(
+            name='VisitSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_visit', models.DateField(blank=True, null=True)),
+                ('last_score', models.IntegerField(blank=True, null=True)),
+                ('frequency_days', models.PositiveSmallIntegerField()),
+                ('due_date', models.DateField()),
+                ('computed_on', models.DateField()),
+                ('manager', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='visit_schedule', to=settings.AUTH_USER_MODEL)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='checklist.store')),
+            ],
+            options={
+                'ordering': ['manager', 'due_date'],
+                'indexes': [models.Index(fields=['manager', 'due_date'], name='schedule_manager_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('manager', 'store'), name='unique_visit_schedule')],
+            },
+        ),
+    ]
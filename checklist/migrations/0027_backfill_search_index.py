@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def backfill_search_index(apps, schema_editor):
+    """
+    Build the SearchEntry rows for everything saved before 0018 added the
+    index. Later saves keep it current through the model signals.
+    """
+    from checklist.search import rebuild_index
+
+    rebuild_index(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checklist', '0026_visit_schedule'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
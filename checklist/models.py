@@ -1,5 +1,7 @@
 from django.conf import settings  # Add this at the top
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Avg, Count, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -32,6 +34,7 @@ class Area(models.Model):
     description = models.TextField(blank=True)
     users = models.ManyToManyField(User, blank=True, related_name='assigned_areas', 
                                   help_text='Users who can access this area')
+    visit_frequency_days = models.PositiveSmallIntegerField(null=True, blank=True, help_text='Target days between visits to each store (default 30)')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -44,6 +47,42 @@ class Area(models.Model):
     def get_store_count(self):
         """Return count of stores in this area"""
         return self.stores.count()
+
+
+def _store_count_subquery(queryset):
+    """COUNT(*) of a per-store related queryset as a correlated subquery"""
+    counts = queryset.filter(visit__store=OuterRef('pk')).order_by().values('visit__store').annotate(
+        n=Count('pk')
+    ).values('n')
+    return Coalesce(Subquery(counts), 0)
+
+
+class StoreQuerySet(models.QuerySet):
+    def with_stats(self, today=None, manager=None):
+        """
+        Annotate each store with visit, action and maintenance figures.
+
+        Visit aggregates share one join on visits; action and ticket counts are
+        correlated subqueries so they do not multiply the visit rows. Average
+        score uses the stored AreaManagerVisit.overall_score. Pass manager to
+        limit the visit figures to that user's visits.
+        """
+        today = today or timezone.now().date()
+        submitted = Q(visits__is_draft=False)
+        if manager is not None:
+            submitted &= Q(visits__manager=manager)
+        open_tickets = MaintenanceTicket.objects.filter(status__in=['pending', 'in_progress'])
+        return self.annotate(
+            visit_count=Count('visits', filter=submitted),
+            avg_score=Avg('visits__overall_score', filter=submitted),
+            last_visit=Max('visits__date', filter=submitted),
+            open_actions=_store_count_subquery(ActionPlanItem.objects.filter(status='open')),
+            pending_tickets=_store_count_subquery(MaintenanceTicket.objects.filter(status='pending')),
+            in_progress_tickets=_store_count_subquery(MaintenanceTicket.objects.filter(status='in_progress')),
+            overdue_tickets=_store_count_subquery(open_tickets.filter(due_date__lt=today)),
+        )
+
+
 class Store(models.Model):
     name = models.CharField(max_length=100)
     address = models.TextField()
@@ -53,6 +92,11 @@ class Store(models.Model):
     is_active = models.BooleanField(default=True)
     area = models.ForeignKey(Area, on_delete=models.SET_NULL, null=True, blank=True, related_name='stores')
     equipment_categories = models.ManyToManyField('EquipmentCategory', blank=True)
+    # WGS84 coordinates for route planning; load with import_store_coordinates
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+
+    objects = StoreQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -77,6 +121,19 @@ class Product(models.Model):
 
 
 
+class AreaManagerVisitQuerySet(models.QuerySet):
+    def with_score(self):
+        """
+        Annotate score: the stored overall_score, or for visits saved without
+        one the percentage of passed checklist items, as calculate_score() does.
+        """
+        passed = Count('checklist_items', filter=Q(checklist_items__answer=True))
+        answered = NullIf(Count('checklist_items'), 0)
+        return self.annotate(score=Coalesce(
+            'overall_score', Cast(Round(passed * 100.0 / answered), models.IntegerField()), 0
+        ))
+
+
 # The main checklist visit
 class AreaManagerVisit(models.Model):
     store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='visits')
@@ -97,6 +154,16 @@ class AreaManagerVisit(models.Model):
     time_in = models.TimeField('Time In', default=timezone.now)
     time_out = models.TimeField('Time Out', blank=True, null=True)
 
+    objects = AreaManagerVisitQuerySet.as_manager()
+
+    class Meta:
+        # Partial on submitted visits: drafts are few and never listed by date
+        indexes = [
+            models.Index(fields=['manager', '-date'], condition=Q(is_draft=False), name='visit_manager_date_idx'),
+            models.Index(fields=['store', '-date'], condition=Q(is_draft=False), name='visit_store_date_idx'),
+            models.Index(fields=['-date'], condition=Q(is_draft=False), name='visit_date_idx'),
+        ]
+
     def __str__(self):
         return f"Visit to {self.store.name} on {self.date}"
 
@@ -126,9 +193,47 @@ class ChecklistItem(models.Model):
     comment = models.TextField(blank=True)
     requires_follow_up = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['visit', 'answer'], name='checklistitem_visit_answer_idx'),
+        ]
+
     def __str__(self):
         return f"{self.question.category.name} - Q{self.question.number}"
 
+class ActionPlanItemQuerySet(models.QuerySet):
+    OPEN_STATUSES = ('open', 'in_progress')
+
+    @classmethod
+    def overdue_q(cls, today=None):
+        """Q for items not yet closed past their timeframe"""
+        return Q(status__in=cls.OPEN_STATUSES, timeframe__lt=today or timezone.now().date())
+
+    def overdue(self, today=None):
+        return self.filter(self.overdue_q(today))
+
+    def set_status(self, status, user=None):
+        """
+        Move every item in the queryset to status and append one
+        ActionItemStatusChange per item whose status actually changed.
+        Returns the number of items changed.
+        """
+        with transaction.atomic():
+            changes = list(self.exclude(status=status).select_for_update().values_list('id', 'status'))
+            if not changes:
+                return 0
+            updated = ActionPlanItem.objects.filter(id__in=[item_id for item_id, _ in changes]).update(
+                status=status, updated_at=timezone.now()
+            )
+            ActionItemStatusChange.record(
+                [(item_id, old_status, status) for item_id, old_status in changes], user
+            )
+            # update() sends no post_save, so the cached open/overdue counts are dropped here
+            from .analytics import invalidate_store_analytics
+            transaction.on_commit(invalidate_store_analytics)
+        return updated
+
+
 # The action plan items
 class ActionPlanItem(models.Model):
     STATUS_CHOICES = [
@@ -143,6 +248,11 @@ class ActionPlanItem(models.Model):
     ]
     
     visit = models.ForeignKey(AreaManagerVisit, on_delete=models.CASCADE, related_name='action_items')
+    # Set for items raised by a failed checklist question; repeat failures at the
+    # same store bump occurrences/last_seen on the open item instead of adding rows
+    question = models.ForeignKey(ChecklistQuestion, on_delete=models.SET_NULL, null=True, blank=True, related_name='action_items')
+    occurrences = models.PositiveIntegerField(default=1)
+    last_seen = models.DateField(null=True, blank=True)
     what = models.TextField()
     who = models.CharField(max_length=100)
     timeframe = models.DateField()
@@ -152,11 +262,57 @@ class ActionPlanItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ActionPlanItemQuerySet.as_manager()
+
     def __str__(self):
         return f"Action: {self.what}"
 
+    def is_overdue(self, today=None):
+        """Python twin of ActionPlanItemQuerySet.overdue_q for a loaded item"""
+        return self.status in ActionPlanItemQuerySet.OPEN_STATUSES and self.timeframe < (today or timezone.now().date())
+
     class Meta:
         ordering = ['-priority', 'timeframe']
+        indexes = [
+            models.Index(fields=['question', 'status'], name='action_question_status_idx'),
+            models.Index(fields=['status', 'timeframe'], name='action_status_timeframe_idx'),
+            models.Index(fields=['-created_at', '-id'], name='action_created_idx'),
+        ]
+
+
+class ActionItemStatusChange(models.Model):
+    """
+    Append-only log of action item status transitions.
+
+    Rows are only ever inserted (see ActionItemStatusChange.record); time to
+    close and other SLA figures are computed from it in checklist/sla.py.
+    """
+    action_item = models.ForeignKey(ActionPlanItem, on_delete=models.CASCADE, related_name='status_changes')
+    from_status = models.CharField(max_length=20, choices=ActionPlanItem.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=ActionPlanItem.STATUS_CHOICES)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['changed_at', 'id']
+        indexes = [
+            models.Index(fields=['action_item', 'changed_at'], name='action_change_item_idx'),
+            models.Index(fields=['to_status', 'changed_at'], name='action_change_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Action #{self.action_item_id}: {self.from_status} -> {self.to_status}"
+
+    @classmethod
+    def record(cls, changes, user=None):
+        """Insert one row per (action_item_id, from_status, to_status) in a single query"""
+        now = timezone.now()
+        user = user if user is not None and user.is_authenticated else None
+        return cls.objects.bulk_create([
+            cls(action_item_id=item_id, from_status=old, to_status=new, changed_by=user, changed_at=now)
+            for item_id, old, new in changes
+            if old != new
+        ])
 
 
 class PriorityChoices(models.TextChoices):
@@ -164,6 +320,26 @@ class PriorityChoices(models.TextChoices):
     MEDIUM = 'medium', 'Medium'
     HIGH = 'high', 'High'
 
+class MaintenanceTicketQuerySet(models.QuerySet):
+    OPEN_STATUSES = ('pending', 'in_progress')
+
+    @classmethod
+    def overdue_q(cls, today=None):
+        """Q for open tickets past their due date"""
+        return Q(status__in=cls.OPEN_STATUSES, due_date__lt=today or timezone.now().date())
+
+    def overdue(self, today=None):
+        return self.filter(self.overdue_q(today))
+
+    def with_overdue(self, today=None):
+        """Annotate is_overdue_flag, computed in SQL"""
+        return self.annotate(is_overdue_flag=models.Case(
+            models.When(self.overdue_q(today), then=models.Value(True)),
+            default=models.Value(False),
+            output_field=models.BooleanField(),
+        ))
+
+
 class MaintenanceTicket(models.Model):
     visit = models.ForeignKey(
         'AreaManagerVisit',
@@ -176,6 +352,10 @@ class MaintenanceTicket(models.Model):
         ('completed', 'Completed')
     ]
     equipment = models.CharField(max_length=100)
+    # Set on preventive tickets and by normalize_ticket_equipment
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='maintenance_tickets')
+    # Catalog links for the free-text equipment; see normalize_ticket_equipment
+    equipment_category = models.ForeignKey(EquipmentCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='maintenance_tickets')
     issue_description = models.TextField()
     priority = models.CharField(
         max_length=10,
@@ -192,15 +372,33 @@ class MaintenanceTicket(models.Model):
     closed_date = models.DateTimeField(null=True, blank=True)
     attachments = models.FileField(upload_to='maintenance_attachments/', null=True, blank=True)
 
+    objects = MaintenanceTicketQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_date']
+        indexes = [
+            models.Index(fields=['status', 'due_date'], name='ticket_status_due_idx'),
+            models.Index(fields=['product', 'status'], name='ticket_product_status_idx'),
+            models.Index(fields=['equipment_category', 'created_date'], name='ticket_category_created_idx'),
+            models.Index(fields=['-created_date'], name='ticket_created_idx'),
+        ]
 
     def __str__(self):
         return f"Maintenance Ticket #{self.id} for {self.visit.store.name}"
 
+    def save(self, *args, **kwargs):
+        # closed_date drives the SLA figures, so keep it in step with status
+        if self.status == 'completed' and not self.closed_date:
+            self.closed_date = timezone.now()
+        elif self.status != 'completed':
+            self.closed_date = None
+        super().save(*args, **kwargs)
+
     @property
     def is_overdue(self):
-        if self.due_date and self.status != 'C':
+        if hasattr(self, 'is_overdue_flag'):
+            return self.is_overdue_flag
+        if self.due_date and self.status in MaintenanceTicketQuerySet.OPEN_STATUSES:
             return self.due_date < timezone.now().date()
         return False
 
@@ -211,4 +409,104 @@ class VisitAttachment(models.Model):
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"Attachment for visit {self.visit.id}"
\ No newline at end of file
+        return f"Attachment for visit {self.visit.id}"
+
+class SearchEntry(models.Model):
+    """
+    Denormalized, searchable text for actions, tickets, visit notes and stores.
+
+    Rows are kept current by signals (see checklist/signals.py). The full-text
+    structures are backend specific and created in migration 0018: an FTS5
+    table with sync triggers on SQLite, a generated tsvector column with a GIN
+    index on PostgreSQL.
+    """
+    KIND_CHOICES = [
+        ('action', 'Action Item'),
+        ('ticket', 'Maintenance Ticket'),
+        ('visit', 'Visit Notes'),
+        ('store', 'Store'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_entry'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id}: {self.title}"
+
+
+class MaintenanceSLARollup(models.Model):
+    """
+    Nightly snapshot of maintenance SLA figures per group.
+
+    Written by `manage.py rollup_maintenance_sla` (see checklist/sla.py) so
+    pages read a handful of precomputed rows instead of scanning tickets.
+    """
+    GROUP_CHOICES = [
+        ('all', 'All tickets'),
+        ('store', 'Store'),
+        ('area', 'Area'),
+        ('equipment', 'Equipment'),
+        ('priority', 'Priority'),
+    ]
+
+    computed_on = models.DateField()
+    group_by = models.CharField(max_length=20, choices=GROUP_CHOICES)
+    group_key = models.CharField(max_length=100, blank=True)
+    label = models.CharField(max_length=200)
+    closed_count = models.PositiveIntegerField(default=0)
+    avg_close_hours = models.FloatField(null=True, blank=True)
+    p50_close_hours = models.FloatField(null=True, blank=True)
+    p90_close_hours = models.FloatField(null=True, blank=True)
+    on_time_rate = models.FloatField(null=True, blank=True, help_text='Share of closed tickets with a due date closed on time (0-100)')
+    open_count = models.PositiveIntegerField(default=0)
+    age_0_7 = models.PositiveIntegerField(default=0)
+    age_8_30 = models.PositiveIntegerField(default=0)
+    age_31_90 = models.PositiveIntegerField(default=0)
+    age_over_90 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-computed_on', 'group_by', 'label']
+        constraints = [
+            models.UniqueConstraint(fields=['computed_on', 'group_by', 'group_key'], name='unique_sla_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_group_by_display()} {self.label} on {self.computed_on}"
+
+
+class VisitSchedule(models.Model):
+    """
+    When each area manager's stores are next due a visit.
+
+    Written nightly by `manage.py build_visit_schedule` (see
+    checklist/scheduling.py) and moved forward when a visit is submitted; a
+    manager's queue is their rows ordered by due_date.
+    """
+    manager = models.ForeignKey(User, on_delete=models.CASCADE, related_name='visit_schedule')
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name='+')
+    last_visit = models.DateField(null=True, blank=True)
+    last_score = models.IntegerField(null=True, blank=True)
+    frequency_days = models.PositiveSmallIntegerField()
+    due_date = models.DateField()
+    computed_on = models.DateField()
+
+    class Meta:
+        ordering = ['manager', 'due_date']
+        constraints = [
+            models.UniqueConstraint(fields=['manager', 'store'], name='unique_visit_schedule'),
+        ]
+        indexes = [
+            models.Index(fields=['manager', 'due_date'], name='schedule_manager_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.store} due {self.due_date} ({self.manager})"
@@ -0,0 +1,178 @@
+"""
+Visit route planning over store coordinates.
+
+Stores are projected onto a local plane (equirectangular, in km, centred on
+the stops being routed), which is accurate to well under 1% at area scale.
+A uniform grid over that plane answers nearest-store queries for the
+nearest-neighbour tour; 2-opt then removes crossing legs. Both run in
+memory, so a 50-store area plans in a few milliseconds.
+"""
+import math
+from datetime import timedelta
+
+from django.db.models import Max, Q
+from django.utils import timezone
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Stores without a submitted visit in this many days are due
+DEFAULT_DUE_DAYS = 30
+DEFAULT_MAX_STOPS = 10
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class Projection:
+    """Equirectangular projection to km around a reference latitude"""
+
+    def __init__(self, ref_lat):
+        self.x_scale = KM_PER_DEGREE * math.cos(math.radians(ref_lat))
+
+    def __call__(self, lat, lon):
+        return lon * self.x_scale, lat * KM_PER_DEGREE
+
+
+class StoreGrid:
+    """
+    Uniform grid of points (key, x, y) in projected km for nearest lookups.
+
+    nearest() scans rings of cells outwards from the query cell and stops
+    once no unscanned ring can hold anything closer than the best so far.
+    """
+
+    def __init__(self, points, cell_km=None):
+        points = list(points)
+        if cell_km is None:
+            # Aim for about one point per cell over the bounding box
+            xs = [x for _, x, _ in points] or [0]
+            ys = [y for _, _, y in points] or [0]
+            area = max(max(xs) - min(xs), 1e-3) * max(max(ys) - min(ys), 1e-3)
+            cell_km = max(math.sqrt(area / max(len(points), 1)), 0.05)
+        self.cell_km = cell_km
+        self.cells = {}
+        self.positions = {}
+        for key, x, y in points:
+            self.add(key, x, y)
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self.cell_km)), int(math.floor(y / self.cell_km))
+
+    def __len__(self):
+        return len(self.positions)
+
+    def add(self, key, x, y):
+        self.positions[key] = (x, y)
+        self.cells.setdefault(self._cell(x, y), set()).add(key)
+
+    def remove(self, key):
+        x, y = self.positions.pop(key)
+        cell = self._cell(x, y)
+        self.cells[cell].discard(key)
+        if not self.cells[cell]:
+            del self.cells[cell]
+
+    def nearest(self, x, y):
+        """(key, distance_km) of the closest point, or (None, None) if empty"""
+        if not self.positions:
+            return None, None
+        cx, cy = self._cell(x, y)
+        best_key, best = None, math.inf
+        ring = 0
+        # Beyond max_ring every occupied cell has been scanned
+        max_ring = max(max(abs(px - cx), abs(py - cy)) for px, py in self.cells)
+        while ring <= max_ring:
+            for gx in range(cx - ring, cx + ring + 1):
+                for gy in (range(cy - ring, cy + ring + 1) if abs(gx - cx) == ring else (cy - ring, cy + ring)):
+                    for key in self.cells.get((gx, gy), ()):
+                        px, py = self.positions[key]
+                        distance = math.hypot(px - x, py - y)
+                        if distance < best:
+                            best_key, best = key, distance
+            # Points in ring + 1 are at least ring cells away
+            if best <= ring * self.cell_km:
+                break
+            ring += 1
+        return best_key, best
+
+
+def two_opt(order, coords, max_passes=50):
+    """
+    Improve an open path in place by reversing segments while that shortens
+    it. order[0] stays the start; the end is free.
+    """
+    n = len(order)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 1):
+            a, b = coords[order[i - 1]], coords[order[i]]
+            for j in range(i + 1, n):
+                c = coords[order[j]]
+                d = coords[order[j + 1]] if j + 1 < n else None
+                before = math.dist(a, b) + (math.dist(c, d) if d else 0)
+                after = math.dist(a, c) + (math.dist(b, d) if d else 0)
+                if after < before - 1e-9:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    b = coords[order[i]]
+                    improved = True
+        if not improved:
+            break
+    return order
+
+
+def plan_route(stops, start=None):
+    """
+    Order stops, a list of (key, lat, lon), into a short open path.
+
+    start is an optional (lat, lon) the route begins from (e.g. the
+    manager's position); otherwise it begins at the first stop. Returns
+    (ordered keys, list of leg distances in km).
+    """
+    if not stops:
+        return [], []
+    lats = [lat for _, lat, _ in stops] + ([start[0]] if start else [])
+    project = Projection(sum(lats) / len(lats))
+    coords = {key: project(lat, lon) for key, lat, lon in stops}
+
+    grid = StoreGrid((key, x, y) for key, (x, y) in coords.items())
+    if start:
+        origin = '__start__'
+        coords[origin] = project(*start)
+    else:
+        origin = stops[0][0]
+        grid.remove(origin)
+    order = [origin]
+    while len(grid):
+        key, _ = grid.nearest(*coords[order[-1]])
+        grid.remove(key)
+        order.append(key)
+
+    two_opt(order, coords)
+    latlon = {key: (lat, lon) for key, lat, lon in stops}
+    if start:
+        latlon[origin] = start
+    legs = [round(haversine_km(*latlon[a], *latlon[b]), 2) for a, b in zip(order, order[1:])]
+    if start:
+        order = order[1:]
+    return order, legs
+
+
+def due_stores(stores, due_days=DEFAULT_DUE_DAYS, today=None):
+    """
+    Stores (a Store queryset) with coordinates and no submitted visit in the
+    last due_days, most overdue first (never visited first of all), as
+    dicts with id, name, address, latitude, longitude and last_visit.
+    """
+    today = today or timezone.localdate()
+    return list(
+        stores.filter(is_active=True, latitude__isnull=False, longitude__isnull=False).annotate(
+            last_visit=Max('visits__date', filter=Q(visits__is_draft=False))
+        ).filter(
+            Q(last_visit__isnull=True) | Q(last_visit__lte=today - timedelta(days=due_days))
+        ).order_by('last_visit', 'name').values('id', 'name', 'address', 'latitude', 'longitude', 'last_visit')
+    )
@@ -0,0 +1,147 @@
+"""
+Visit frequency scheduling.
+
+Each active store has a target gap between visits: its area's
+visit_frequency_days (DEFAULT_FREQUENCY_DAYS when unset), shortened when the
+last submitted visit scored poorly. store_targets() reads last visit, last
+score and area frequency for every store in one grouped query.
+
+build_visit_schedule() materializes the next due date per area manager and
+store into VisitSchedule for the dashboard; reschedule_store() moves a
+store's rows forward when a visit is submitted so the queue stays current
+between nightly runs.
+"""
+import heapq
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from users.models import Profile
+
+from .access import accessible_stores
+from .models import Area, AreaManagerVisit, Store, VisitSchedule
+
+DEFAULT_FREQUENCY_DAYS = 30
+
+# (score below, share of the area frequency): weak visits are followed up sooner
+SCORE_FREQUENCY_FACTORS = ((60, 0.5), (80, 0.75))
+
+# Roles whose assigned stores get a schedule
+SCHEDULED_ROLES = ('area_manager',)
+
+
+def frequency_days(area_days, last_score):
+    days = area_days or DEFAULT_FREQUENCY_DAYS
+    if last_score is not None:
+        for below, factor in SCORE_FREQUENCY_FACTORS:
+            if last_score < below:
+                return max(round(days * factor), 1)
+    return days
+
+
+def store_targets(stores, today=None):
+    """
+    Rows for the active stores in stores (a Store queryset) with id, name,
+    area_id, last_visit, last_score, frequency_days, due_date and
+    days_overdue. Never-visited stores are due today.
+    """
+    today = today or timezone.localdate()
+    latest_score = AreaManagerVisit.objects.with_score().filter(
+        store=OuterRef('pk'), is_draft=False
+    ).order_by('-date', '-id').values('score')[:1]
+    rows = list(stores.filter(is_active=True).annotate(
+        last_visit=Max('visits__date', filter=Q(visits__is_draft=False)),
+        last_score=Subquery(latest_score),
+    ).values('id', 'name', 'area_id', 'area__visit_frequency_days', 'last_visit', 'last_score'))
+
+    for row in rows:
+        row['frequency_days'] = frequency_days(row.pop('area__visit_frequency_days'), row['last_score'])
+        row['due_date'] = row['last_visit'] + timedelta(days=row['frequency_days']) if row['last_visit'] else today
+        row['days_overdue'] = (today - row['due_date']).days
+    return rows
+
+
+def _priority(row):
+    """Heap key: earliest due first, then never visited, then lowest last score"""
+    score = row['last_score']
+    return row['due_date'], score is not None, score if score is not None else 0, row['name']
+
+
+def manager_store_ids():
+    """{user_id: set of store ids} for SCHEDULED_ROLES, from direct, area and Area.users assignments"""
+    area_stores = {}
+    for store_id, area_id in Store.objects.filter(is_active=True, area__isnull=False).values_list('id', 'area_id'):
+        area_stores.setdefault(area_id, set()).add(store_id)
+
+    assigned = {}
+    for user_id, store_id in Profile.stores.through.objects.filter(
+        profile__role__in=SCHEDULED_ROLES
+    ).values_list('profile__user_id', 'store_id'):
+        assigned.setdefault(user_id, set()).add(store_id)
+    user_areas = list(Profile.areas.through.objects.filter(
+        profile__role__in=SCHEDULED_ROLES
+    ).values_list('profile__user_id', 'area_id'))
+    user_areas += Area.users.through.objects.filter(
+        user__profile__role__in=SCHEDULED_ROLES
+    ).values_list('user_id', 'area_id')
+    for user_id, area_id in user_areas:
+        assigned.setdefault(user_id, set()).update(area_stores.get(area_id, ()))
+    return assigned
+
+
+def build_visit_schedule(today=None):
+    """Replace every VisitSchedule row from current visits and assignments; returns the rows written"""
+    today = today or timezone.localdate()
+    targets = {row['id']: row for row in store_targets(Store.objects.all(), today)}
+    schedule = [
+        VisitSchedule(
+            manager_id=user_id, store_id=store_id, last_visit=targets[store_id]['last_visit'],
+            last_score=targets[store_id]['last_score'], frequency_days=targets[store_id]['frequency_days'],
+            due_date=targets[store_id]['due_date'], computed_on=today,
+        )
+        for user_id, store_ids in manager_store_ids().items()
+        for store_id in store_ids if store_id in targets
+    ]
+    with transaction.atomic():
+        VisitSchedule.objects.all().delete()
+        VisitSchedule.objects.bulk_create(schedule, batch_size=1000)
+    return schedule
+
+
+def reschedule_store(store_id):
+    """Recompute one store's due date on every manager's queue (after a visit is submitted or deleted)"""
+    rows = store_targets(Store.objects.filter(pk=store_id))
+    if not rows:
+        VisitSchedule.objects.filter(store_id=store_id).delete()
+        return
+    row = rows[0]
+    VisitSchedule.objects.filter(store_id=store_id).update(
+        last_visit=row['last_visit'], last_score=row['last_score'],
+        frequency_days=row['frequency_days'], due_date=row['due_date'],
+    )
+
+
+def next_visits(user, limit=5, today=None):
+    """
+    The user's most urgent stores as store_targets() rows. Area managers read
+    their materialized queue; anyone without one (admins, or before the first
+    nightly run) gets it computed live over the stores they can access.
+    """
+    today = today or timezone.localdate()
+    queued = list(
+        VisitSchedule.objects.filter(manager=user).order_by(
+            'due_date', F('last_score').asc(nulls_first=True), 'store__name'
+        ).values(
+            'store_id', 'store__name', 'store__area_id', 'last_visit', 'last_score', 'frequency_days', 'due_date'
+        )[:limit]
+    )
+    if queued:
+        return [{
+            'id': row['store_id'], 'name': row['store__name'], 'area_id': row['store__area_id'],
+            'last_visit': row['last_visit'], 'last_score': row['last_score'],
+            'frequency_days': row['frequency_days'], 'due_date': row['due_date'],
+            'days_overdue': (today - row['due_date']).days,
+        } for row in queued]
+    return heapq.nsmallest(limit, store_targets(accessible_stores(user), today), key=_priority)
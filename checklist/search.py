@@ -0,0 +1,258 @@
+"""
+Full-text search across action items, maintenance tickets, visit notes and stores.
+
+SearchEntry rows hold the searchable text; the backend specific index
+(FTS5 on SQLite, tsvector + GIN on PostgreSQL) is maintained by the database
+itself. Other backends fall back to icontains matching.
+"""
+import re
+from urllib.parse import urlencode
+
+from django.db import connection
+from django.urls import reverse
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import ActionPlanItem, AreaManagerVisit, MaintenanceTicket, SearchEntry, Store
+
+SEARCH_PAGE_SIZE = 20
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# -----------------------------
+# Document builders
+# -----------------------------
+def _join(*parts):
+    return '\n'.join(str(p).strip() for p in parts if p and str(p).strip())
+
+
+def document_for(instance):
+    """
+    Return (kind, store_id, title, body) for instance, or None if it should not be indexed.
+
+    Dispatches on the model name rather than the class so that historical
+    models in data migrations are indexed the same way.
+    """
+    model_name = instance._meta.model_name
+    if model_name == 'actionplanitem':
+        return 'action', instance.visit.store_id, instance.what[:255], _join(instance.remarks, instance.who)
+    if model_name == 'maintenanceticket':
+        return 'ticket', instance.visit.store_id, instance.equipment[:255], instance.issue_description
+    if model_name == 'areamanagervisit':
+        if instance.is_draft:
+            return None
+        body = _join(instance.general_notes, instance.run_out_items, instance.maintenance_needed, instance.notes)
+        if not body:
+            return None
+        return 'visit', instance.store_id, f"Visit on {instance.date}", body
+    if model_name == 'store':
+        return 'store', instance.pk, instance.name[:255], _join(instance.address, instance.manager_name)
+    return None
+
+
+KIND_MODELS = {
+    'action': ActionPlanItem,
+    'ticket': MaintenanceTicket,
+    'visit': AreaManagerVisit,
+    'store': Store,
+}
+MODEL_KINDS = {model: kind for kind, model in KIND_MODELS.items()}
+
+
+def result_url(entry):
+    """Link to the page showing the indexed object"""
+    if entry.kind == 'action':
+        return reverse('checklist:action_plan') + '?' + urlencode({'search': entry.title})
+    if entry.kind == 'ticket':
+        return reverse('checklist:maintenance_detail', args=[entry.object_id])
+    if entry.kind == 'visit':
+        return reverse('checklist:checklist_detail', args=[entry.object_id])
+    return reverse('checklist:store_detail', args=[entry.object_id])
+
+
+def index_instance(instance):
+    """Create, update or remove the SearchEntry for instance"""
+    kind = MODEL_KINDS.get(type(instance))
+    if kind is None:
+        return
+    document = document_for(instance)
+    if document is None:
+        SearchEntry.objects.filter(kind=kind, object_id=instance.pk).delete()
+        return
+    kind, store_id, title, body = document
+    SearchEntry.objects.update_or_create(
+        kind=kind, object_id=instance.pk,
+        defaults={'store_id': store_id, 'title': title, 'body': body},
+    )
+
+
+def index_instances(instances):
+    """index_instance() for many objects in two queries per model, e.g. after bulk_create/bulk_update"""
+    by_kind = {}
+    for instance in instances:
+        kind = MODEL_KINDS.get(type(instance))
+        if kind is not None:
+            by_kind.setdefault(kind, []).append(instance)
+    for kind, objects in by_kind.items():
+        SearchEntry.objects.filter(kind=kind, object_id__in=[obj.pk for obj in objects]).delete()
+        entries = []
+        for obj in objects:
+            document = document_for(obj)
+            if document is not None:
+                _, store_id, title, body = document
+                entries.append(SearchEntry(kind=kind, object_id=obj.pk, store_id=store_id, title=title, body=body))
+        SearchEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+def unindex_instance(instance):
+    kind = MODEL_KINDS.get(type(instance))
+    if kind is not None:
+        SearchEntry.objects.filter(kind=kind, object_id=instance.pk).delete()
+
+
+def rebuild_index(batch_size=1000, apps=None):
+    """
+    Rebuild every SearchEntry from scratch; returns the number of entries.
+
+    apps is a migration's historical app registry; the live models are used when it is None.
+    """
+    live_models = {model.__name__: model for model in (*KIND_MODELS.values(), SearchEntry)}
+
+    def model(name):
+        return apps.get_model('checklist', name) if apps else live_models[name]
+
+    entry_model = model('SearchEntry')
+    entry_model.objects.all().delete()
+    querysets = [
+        model('ActionPlanItem').objects.select_related('visit'),
+        model('MaintenanceTicket').objects.select_related('visit'),
+        model('AreaManagerVisit').objects.filter(is_draft=False),
+        model('Store').objects.all(),
+    ]
+    total = 0
+    for queryset in querysets:
+        entries = []
+        for instance in queryset.iterator(chunk_size=batch_size):
+            document = document_for(instance)
+            if document is None:
+                continue
+            kind, store_id, title, body = document
+            entries.append(entry_model(kind=kind, object_id=instance.pk, store_id=store_id, title=title, body=body))
+            if len(entries) >= batch_size:
+                entry_model.objects.bulk_create(entries)
+                total += len(entries)
+                entries = []
+        entry_model.objects.bulk_create(entries)
+        total += len(entries)
+    return total
+
+
+# -----------------------------
+# Querying
+# -----------------------------
+def _fts_ready():
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'checklist_search_fts'")
+        return cursor.fetchone() is not None
+
+
+def _fts5_query(query):
+    """Quote each token and prefix-match it, so user input cannot inject FTS5 syntax"""
+    tokens = TOKEN_RE.findall(query)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _postgres_tsquery(query):
+    tokens = TOKEN_RE.findall(query)
+    return ' & '.join(f"{token}:*" for token in tokens)
+
+
+def matching_entries(query):
+    """SearchEntry queryset matching query (unranked), usable as a subquery"""
+    query = (query or '').strip()
+    if not TOKEN_RE.search(query):
+        return SearchEntry.objects.none()
+
+    if _fts_ready():
+        if connection.vendor == 'sqlite':
+            return SearchEntry.objects.filter(id__in=RawSQL(
+                'SELECT rowid FROM checklist_search_fts WHERE checklist_search_fts MATCH %s',
+                [_fts5_query(query)]
+            ))
+        return SearchEntry.objects.extra(
+            where=["search_vector @@ to_tsquery('english', %s)"], params=[_postgres_tsquery(query)]
+        )
+
+    entries = SearchEntry.objects.all()
+    for token in TOKEN_RE.findall(query):
+        entries = entries.filter(Q(title__icontains=token) | Q(body__icontains=token))
+    return entries
+
+
+def search(query, store_ids=None, kinds=None, page=1, page_size=SEARCH_PAGE_SIZE):
+    """
+    Ranked search. store_ids=None means no store restriction.
+
+    Returns (entries, has_next); entries are SearchEntry objects with the
+    store selected and a ``rank`` attribute (higher is better).
+    """
+    query = (query or '').strip()
+    if not TOKEN_RE.search(query) or store_ids == set():
+        return [], False
+
+    page = max(int(page), 1)
+    offset = (page - 1) * page_size
+
+    conditions = []
+    params = []
+    if store_ids is not None:
+        placeholders = ', '.join(['%s'] * len(store_ids))
+        conditions.append(f'e.store_id IN ({placeholders})')
+        params.extend(store_ids)
+    if kinds:
+        placeholders = ', '.join(['%s'] * len(kinds))
+        conditions.append(f'e.kind IN ({placeholders})')
+        params.extend(kinds)
+    extra_where = ''.join(f' AND {condition}' for condition in conditions)
+
+    if _fts_ready() and connection.vendor == 'sqlite':
+        # bm25() is lower-is-better; title matches weigh 10x body matches
+        sql = (
+            'SELECT e.*, -bm25(checklist_search_fts, 10.0, 1.0) AS rank '
+            'FROM checklist_search_fts JOIN checklist_searchentry e ON e.id = checklist_search_fts.rowid '
+            f'WHERE checklist_search_fts MATCH %s{extra_where} '
+            'ORDER BY rank DESC, e.id DESC LIMIT %s OFFSET %s'
+        )
+        params = [_fts5_query(query), *params, page_size + 1, offset]
+    elif _fts_ready():
+        sql = (
+            "SELECT e.*, ts_rank(e.search_vector, to_tsquery('english', %s)) AS rank "
+            'FROM checklist_searchentry e '
+            f"WHERE e.search_vector @@ to_tsquery('english', %s){extra_where} "
+            'ORDER BY rank DESC, e.id DESC LIMIT %s OFFSET %s'
+        )
+        tsquery = _postgres_tsquery(query)
+        params = [tsquery, tsquery, *params, page_size + 1, offset]
+    else:
+        entries = matching_entries(query)
+        if store_ids is not None:
+            entries = entries.filter(store_id__in=store_ids)
+        if kinds:
+            entries = entries.filter(kind__in=kinds)
+        entries = list(entries.select_related('store').order_by('-updated_at', '-id')[offset:offset + page_size + 1])
+        for entry in entries:
+            entry.rank = 0
+        return entries[:page_size], len(entries) > page_size
+
+    entries = list(SearchEntry.objects.raw(sql, params))
+    has_next = len(entries) > page_size
+    entries = entries[:page_size]
+
+    stores = Store.objects.in_bulk({e.store_id for e in entries if e.store_id})
+    for entry in entries:
+        entry.store = stores.get(entry.store_id)
+    return entries, has_next
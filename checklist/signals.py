@@ -0,0 +1,95 @@
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from users.models import Profile
+
+from .access import invalidate_store_access
+from .analytics import invalidate_store_analytics, refresh_store_analytics_if_stale
+from .models import ActionPlanItem, Area, AreaManagerVisit, MaintenanceTicket, Store
+from .equipment import EquipmentMatcher
+from .scheduling import reschedule_store
+from .search import index_instance, unindex_instance
+
+# bulk_create/update() bypass these; run `manage.py rebuild_search_index` after bulk loads
+SEARCHABLE_MODELS = (ActionPlanItem, MaintenanceTicket, AreaManagerVisit, Store)
+
+
+@receiver(post_save)
+def update_search_entry(sender, instance, raw=False, **kwargs):
+    if sender in SEARCHABLE_MODELS and not raw:
+        index_instance(instance)
+
+
+@receiver(post_delete)
+def delete_search_entry(sender, instance, **kwargs):
+    if sender in SEARCHABLE_MODELS:
+        unindex_instance(instance)
+
+
+@receiver([post_save, post_delete], sender=Store)
+@receiver([post_save, post_delete], sender=AreaManagerVisit)
+def clear_maintenance_reference_data(sender, **kwargs):
+    from .views.maintenance_views import REFERENCE_CACHE_KEY
+    cache.delete(REFERENCE_CACHE_KEY)
+
+
+def _equipment_changed(ticket, update_fields):
+    if ticket._state.adding:
+        return True
+    if update_fields is not None:
+        return 'equipment' in update_fields
+    saved = MaintenanceTicket.objects.filter(pk=ticket.pk).values_list('equipment', flat=True).first()
+    return saved != ticket.equipment
+
+
+@receiver(pre_save, sender=MaintenanceTicket)
+def link_ticket_equipment(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    New tickets, and tickets whose equipment text changes, pick up a catalog
+    link. Other unmatched tickets are left to normalize_ticket_equipment.
+    """
+    if raw:
+        return
+    if instance.product_id:
+        if not instance.equipment_category_id:
+            instance.equipment_category_id = instance.product.category_id
+    elif not instance.equipment_category_id and instance.visit_id and _equipment_changed(instance, update_fields):
+        store_id = instance.visit.store_id
+        instance.product_id, instance.equipment_category_id = EquipmentMatcher(
+            store_ids=[store_id]
+        ).match(store_id, instance.equipment)
+
+
+@receiver(m2m_changed, sender=Profile.stores.through)
+@receiver(m2m_changed, sender=Profile.areas.through)
+@receiver(m2m_changed, sender=Area.users.through)
+@receiver([post_save, post_delete], sender=Profile)
+@receiver([post_save, post_delete], sender=Store)
+@receiver(post_delete, sender=Area)
+def clear_store_access(sender, **kwargs):
+    """Role, assignment or store area changes alter who sees which stores"""
+    if kwargs.get('action', 'post_').startswith('post_'):
+        invalidate_store_access()
+
+
+@receiver([post_save, post_delete], sender=AreaManagerVisit)
+@receiver([post_save, post_delete], sender=MaintenanceTicket)
+@receiver([post_save, post_delete], sender=ActionPlanItem)
+@receiver([post_save, post_delete], sender=Store)
+@receiver([post_save, post_delete], sender=Area)
+def clear_store_analytics(sender, instance, raw=False, **kwargs):
+    invalidate_store_analytics()
+    # Submitted visits rebuild right away so the management page stays warm
+    if sender is AreaManagerVisit and not raw and not instance.is_draft:
+        transaction.on_commit(refresh_store_analytics_if_stale)
+
+
+@receiver([post_save, post_delete], sender=AreaManagerVisit)
+def update_visit_schedule(sender, instance, raw=False, **kwargs):
+    """Move the store along its managers' queues; build_visit_schedule rebuilds everything nightly"""
+    if not raw and not instance.is_draft:
+        transaction.on_commit(partial(reschedule_store, instance.store_id))
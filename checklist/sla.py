@@ -0,0 +1,271 @@
+"""
+SLA analytics computed in SQL.
+
+Action item time to close comes from the ActionItemStatusChange history:
+the latest transition into 'closed' minus the item's created_at. Maintenance
+time to close is closed_date minus created_date. Percentiles are nearest-rank,
+computed with window functions so the same statement runs on SQLite (3.25+)
+and PostgreSQL.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import (
+    ActionItemStatusChange, ActionPlanItem, Area, AreaManagerVisit, MaintenanceSLARollup,
+    MaintenanceTicket, MaintenanceTicketQuerySet, PriorityChoices, Store,
+)
+
+DEFAULT_PERCENTILES = (50, 90, 95)
+
+# Closed tickets older than this are left out of the nightly rollup
+ROLLUP_WINDOW_DAYS = 90
+
+# group_by -> (key expression, label expression)
+ACTION_GROUPS = {
+    'store': ('s.id', 's.name'),
+    'area': ('a.id', "COALESCE(a.name, 'Unassigned')"),
+    'priority': ('i.priority', 'i.priority'),
+    'assignee': ('i.who', 'i.who'),
+}
+
+
+# group_by -> (key expression, label expression, ORM key, ORM label)
+TICKET_GROUPS = {
+    'all': ("''", "'All tickets'", None, None),
+    'store': ('s.id', 's.name', 'visit__store_id', 'visit__store__name'),
+    'area': ('a.id', "COALESCE(a.name, 'Unassigned')", 'visit__store__area_id', 'visit__store__area__name'),
+    'equipment': ('t.equipment', 't.equipment', 'equipment', 'equipment'),
+    'priority': ('t.priority', 't.priority', 'priority', 'priority'),
+}
+
+AGE_BUCKETS = (('age_0_7', 0, 7), ('age_8_30', 8, 30), ('age_31_90', 31, 90), ('age_over_90', 91, None))
+
+
+def _hours_between(start, end):
+    if connection.vendor == 'postgresql':
+        return f'EXTRACT(EPOCH FROM ({end} - {start})) / 3600.0'
+    return f'(julianday({end}) - julianday({start})) * 24.0'
+
+
+def _date_of(column):
+    if connection.vendor == 'postgresql':
+        return f'CAST({column} AS date)'
+    return f'date({column})'
+
+
+def _percentile_columns(percentiles):
+    """Nearest-rank percentile columns over a CTE with hours, rn and n"""
+    return ', '.join(
+        f'MIN(CASE WHEN rn >= n * {p / 100.0} THEN hours END) AS p{p}' for p in percentiles
+    )
+
+
+def action_close_percentiles(group_by='store', percentiles=DEFAULT_PERCENTILES,
+                             store_ids=None, closed_from=None, closed_to=None):
+    """
+    Time to close action items, in hours, per group.
+
+    group_by is one of ACTION_GROUPS. Returns a list of dicts with key,
+    label, closed, avg_hours and one p<N> entry per percentile, ordered by
+    label.
+    """
+    if group_by not in ACTION_GROUPS:
+        raise ValueError(f'Unknown group: {group_by}')
+    key_sql, label_sql = ACTION_GROUPS[group_by]
+
+    conditions = ["i.status = 'closed'"]
+    params = []
+    if store_ids is not None:
+        if not store_ids:
+            return []
+        conditions.append(f"s.id IN ({', '.join(['%s'] * len(store_ids))})")
+        params.extend(store_ids)
+    if closed_from is not None:
+        conditions.append('c.closed_at >= %s')
+        params.append(closed_from)
+    if closed_to is not None:
+        conditions.append('c.closed_at < %s')
+        params.append(closed_to)
+
+    percentile_columns = _percentile_columns(percentiles)
+    sql = f"""
+        WITH closed AS (
+            SELECT {key_sql} AS group_key, {label_sql} AS group_label,
+                   {_hours_between('i.created_at', 'c.closed_at')} AS hours
+            FROM {ActionPlanItem._meta.db_table} i
+            JOIN {AreaManagerVisit._meta.db_table} v ON v.id = i.visit_id
+            JOIN {Store._meta.db_table} s ON s.id = v.store_id
+            LEFT JOIN {Area._meta.db_table} a ON a.id = s.area_id
+            JOIN (
+                SELECT action_item_id, MAX(changed_at) AS closed_at
+                FROM {ActionItemStatusChange._meta.db_table}
+                WHERE to_status = 'closed'
+                GROUP BY action_item_id
+            ) c ON c.action_item_id = i.id
+            WHERE {' AND '.join(conditions)}
+        ),
+        ranked AS (
+            SELECT group_key, group_label, hours,
+                   ROW_NUMBER() OVER (PARTITION BY group_key ORDER BY hours) AS rn,
+                   COUNT(*) OVER (PARTITION BY group_key) AS n
+            FROM closed
+        )
+        SELECT group_key, group_label, MAX(n) AS closed, AVG(hours) AS avg_hours, {percentile_columns}
+        FROM ranked
+        GROUP BY group_key, group_label
+        ORDER BY group_label
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = ['key', 'label', 'closed', 'avg_hours'] + [f'p{p}' for p in percentiles]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    if group_by == 'priority':
+        labels = dict(ActionPlanItem.PRIORITY_CHOICES)
+        for row in rows:
+            row['label'] = labels.get(row['label'], row['label'])
+    for row in rows:
+        for column in columns[3:]:
+            if row[column] is not None:
+                row[column] = round(float(row[column]), 1)
+    return rows
+
+
+def ticket_close_stats(group_by='all', percentiles=(50, 90), closed_from=None, store_ids=None):
+    """
+    Completed maintenance tickets per group: count, average and percentile
+    hours to close, and on-time rate (closed on or before the due date, as a
+    percentage of closed tickets that had one).
+    """
+    if group_by not in TICKET_GROUPS:
+        raise ValueError(f'Unknown group: {group_by}')
+    key_sql, label_sql = TICKET_GROUPS[group_by][:2]
+
+    conditions = ["t.status = 'completed'", 't.closed_date IS NOT NULL']
+    params = []
+    if closed_from is not None:
+        conditions.append('t.closed_date >= %s')
+        params.append(closed_from)
+    if store_ids is not None:
+        if not store_ids:
+            return []
+        conditions.append(f"s.id IN ({', '.join(['%s'] * len(store_ids))})")
+        params.extend(store_ids)
+
+    sql = f"""
+        WITH closed AS (
+            SELECT {key_sql} AS group_key, {label_sql} AS group_label,
+                   {_hours_between('t.created_date', 't.closed_date')} AS hours,
+                   CASE WHEN t.due_date IS NULL THEN NULL
+                        WHEN {_date_of('t.closed_date')} <= t.due_date THEN 1 ELSE 0 END AS on_time
+            FROM {MaintenanceTicket._meta.db_table} t
+            JOIN {AreaManagerVisit._meta.db_table} v ON v.id = t.visit_id
+            JOIN {Store._meta.db_table} s ON s.id = v.store_id
+            LEFT JOIN {Area._meta.db_table} a ON a.id = s.area_id
+            WHERE {' AND '.join(conditions)}
+        ),
+        ranked AS (
+            SELECT group_key, group_label, hours, on_time,
+                   ROW_NUMBER() OVER (PARTITION BY group_key ORDER BY hours) AS rn,
+                   COUNT(*) OVER (PARTITION BY group_key) AS n
+            FROM closed
+        )
+        SELECT group_key, group_label, MAX(n) AS closed, AVG(hours) AS avg_hours,
+               100.0 * SUM(on_time) / NULLIF(COUNT(on_time), 0) AS on_time_rate,
+               {_percentile_columns(percentiles)}
+        FROM ranked
+        GROUP BY group_key, group_label
+        ORDER BY group_label
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = ['key', 'label', 'closed', 'avg_hours', 'on_time_rate'] + [f'p{p}' for p in percentiles]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    for row in rows:
+        row['key'] = '' if row['key'] is None else str(row['key'])
+        for column in columns[3:]:
+            if row[column] is not None:
+                row[column] = round(float(row[column]), 1)
+    return rows
+
+
+def ticket_backlog_ages(group_by='all', today=None, store_ids=None):
+    """Open tickets per group, bucketed by age in days, in one grouped query"""
+    if group_by not in TICKET_GROUPS:
+        raise ValueError(f'Unknown group: {group_by}')
+    key_field, label_field = TICKET_GROUPS[group_by][2:]
+    # Ages are measured at the end of today
+    now = timezone.now() if today is None else timezone.make_aware(
+        datetime.combine(today + timedelta(days=1), time.min)
+    )
+
+    buckets = {}
+    for name, low, high in AGE_BUCKETS:
+        bucket = Q(created_date__lte=now - timedelta(days=low))
+        if high is not None:
+            bucket &= Q(created_date__gt=now - timedelta(days=high + 1))
+        buckets[name] = Count('id', filter=bucket)
+
+    tickets = MaintenanceTicket.objects.filter(status__in=MaintenanceTicketQuerySet.OPEN_STATUSES)
+    if store_ids is not None:
+        tickets = tickets.filter(visit__store_id__in=store_ids)
+    if key_field is None:
+        rows = [{'key': '', 'label': 'All tickets', **tickets.aggregate(open=Count('id'), **buckets)}]
+    else:
+        rows = [
+            {'key': '' if row[key_field] is None else str(row[key_field]),
+             'label': row[label_field] or 'Unassigned',
+             **{k: row[k] for k in ['open', *buckets]}}
+            for row in tickets.order_by().values(key_field, label_field).annotate(open=Count('id'), **buckets)
+        ]
+    return rows
+
+
+def build_sla_rollup(computed_on=None, window_days=ROLLUP_WINDOW_DAYS):
+    """
+    Recompute every MaintenanceSLARollup group for computed_on (default today),
+    replacing rows already stored for that day. Returns the rows written.
+    """
+    computed_on = computed_on or timezone.localdate()
+    closed_from = timezone.now() - timedelta(days=window_days)
+    priority_labels = dict(PriorityChoices.choices)
+
+    rollups = []
+    for group_by in TICKET_GROUPS:
+        merged = {}
+        for row in ticket_close_stats(group_by, closed_from=closed_from):
+            merged[row['key']] = MaintenanceSLARollup(
+                computed_on=computed_on, group_by=group_by, group_key=row['key'], label=row['label'],
+                closed_count=row['closed'], avg_close_hours=row['avg_hours'],
+                p50_close_hours=row['p50'], p90_close_hours=row['p90'], on_time_rate=row['on_time_rate'],
+            )
+        for row in ticket_backlog_ages(group_by, today=computed_on):
+            rollup = merged.setdefault(row['key'], MaintenanceSLARollup(
+                computed_on=computed_on, group_by=group_by, group_key=row['key'], label=row['label'],
+            ))
+            rollup.open_count = row['open']
+            for name, _, _ in AGE_BUCKETS:
+                setattr(rollup, name, row[name])
+        for rollup in merged.values():
+            if group_by == 'priority':
+                rollup.label = priority_labels.get(rollup.group_key, rollup.label)
+            rollup.label = str(rollup.label)[:200]
+            rollup.group_key = rollup.group_key[:100]
+        rollups.extend(merged.values())
+
+    with transaction.atomic():
+        MaintenanceSLARollup.objects.filter(computed_on=computed_on).delete()
+        MaintenanceSLARollup.objects.bulk_create(rollups)
+    return rollups
+
+
+def latest_sla_rollup(group_by='all'):
+    """Rows of the most recent rollup for group_by"""
+    latest = MaintenanceSLARollup.objects.order_by('-computed_on').values_list('computed_on', flat=True).first()
+    if latest is None:
+        return []
+    return list(MaintenanceSLARollup.objects.filter(computed_on=latest, group_by=group_by))
@@ -1,2 +1,217 @@
+import json
+import re
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .analytics import AREA_KPI_CACHE_KEY, STORE_ANALYTICS_CACHE_KEY, get_area_kpis, get_store_analytics
+from .models import ActionPlanItem, AreaManagerVisit, ChecklistCategory, ChecklistQuestion, MaintenanceTicket, Store
+from .views.action_plan_views import ACTION_PAGE_SIZE, ActionPlanManager
+from .views.checklist_views import ChecklistManager
+from .views.maintenance_views import AUTOCOMPLETE_LIMIT, MaintenanceManager
+
+# Full table scans in EXPLAIN output. "SCAN t USING INDEX i" is an ordered index walk and is fine.
+SQLITE_FULL_SCAN = re.compile(r'\bSCAN (?!.*\bUSING (?:COVERING )?INDEX\b)(\w+)')
+POSTGRES_FULL_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+class CountingEmailBackend(EmailBackend):
+    """locmem backend that counts the connections opened"""
+    opened = 0
+
+    def open(self):
+        type(self).opened += 1
+        return super().open()
+
+
+def create_visit(store, manager, visit_date, **kwargs):
+    visit = AreaManagerVisit.objects.create(store=store, manager=manager, **kwargs)
+    # date is auto_now_add
+    AreaManagerVisit.objects.filter(pk=visit.pk).update(date=visit_date)
+    visit.date = visit_date
+    return visit
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN the querysets the list views build and fail on any full table scan"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password')
+        cls.store = Store.objects.create(name='Maadi', address='1 Road 9')
+        other = Store.objects.create(name='Zamalek', address='2 Road 26')
+        for store in (cls.store, other):
+            for days in (0, 20, 40):
+                visit = create_visit(store, cls.user, cls.today - timedelta(days=days))
+                ActionPlanItem.objects.create(visit=visit, what='Fix', who='Staff', timeframe=visit.date)
+                MaintenanceTicket.objects.create(
+                    visit=visit, equipment='Fridge', issue_description='Leak', due_date=visit.date
+                )
+
+    def assertUsesIndexes(self, queryset, allowed_scans=()):
+        if connection.vendor == 'postgresql':
+            pattern = POSTGRES_FULL_SCAN
+            # Small test tables make a seq scan the cheapest plan; only fail
+            # when no index can serve the query at all.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        elif connection.vendor == 'sqlite':
+            pattern = SQLITE_FULL_SCAN
+        else:
+            self.skipTest(f'Query plan checks are not supported on {connection.vendor}')
+        plan = queryset.explain()
+        scans = [table for table in pattern.findall(plan) if table.lower() not in allowed_scans]
+        self.assertFalse(scans, f'Full table scan in:\n{plan}')
+
+    def test_action_plan_filters(self):
+        for filters in (
+            {},
+            {'status': 'open'},
+            {'priority': 'high'},
+            {'store': str(self.store.pk)},
+            {'date_filter': self.today.isoformat()},
+            {'status': 'open', 'store': str(self.store.pk)},
+        ):
+            with self.subTest(filters=filters):
+                actions = ActionPlanManager.get_filtered_actions(self.user, filters)
+                self.assertUsesIndexes(actions[:ACTION_PAGE_SIZE + 1])
+
+    def test_maintenance_list_filters(self):
+        for filters in (
+            {'status': 'overdue'},
+            {'status': 'pending'},
+            {'store': str(self.store.pk)},
+            {'date_range': 'this_week'},
+            {'date_range': 'last_month'},
+        ):
+            filters = {'status': '', 'priority': '', 'store': '', 'date_range': '', **filters}
+            with self.subTest(filters=filters):
+                tickets = MaintenanceTicket.objects.with_overdue(self.today).select_related('visit__store').order_by(
+                    '-created_date'
+                )
+                self.assertUsesIndexes(MaintenanceManager.filter_tickets(tickets, filters, self.today)[:10])
+
+    def test_visit_search(self):
+        for query, store_ids in (
+            ('maadi', None),
+            ('2024-05', None),
+            ('maadi 2024', None),
+            ('maadi', [self.store.pk]),
+        ):
+            with self.subTest(query=query, store_ids=store_ids):
+                visits = MaintenanceManager.visit_search_queryset(query, store_ids)
+                # The name prefix is matched by scanning the small store table
+                # (aliased u0 in the subquery); visits must come from an index.
+                self.assertUsesIndexes(visits[:AUTOCOMPLETE_LIMIT], allowed_scans=('checklist_store', 'u0'))
+
+
+@override_settings(EMAIL_BACKEND='checklist.tests.CountingEmailBackend')
+class OverdueDigestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        store = Store.objects.create(name='Maadi', address='1 Road 9')
+        cls.managers = [
+            User.objects.create_user(f'manager{n}', f'manager{n}@example.com', 'password') for n in range(3)
+        ]
+        no_email = User.objects.create_user('no_email', '', 'password')
+        for manager in cls.managers + [no_email]:
+            visit = create_visit(store, manager, today - timedelta(days=10))
+            for status in ('open', 'in_progress', 'closed'):
+                ActionPlanItem.objects.create(
+                    visit=visit, what='Fix', who='Staff', timeframe=visit.date, status=status
+                )
+            MaintenanceTicket.objects.create(
+                visit=visit, equipment='Fridge', issue_description='Leak', due_date=visit.date
+            )
+        # Nothing overdue for this manager, so no digest
+        create_visit(store, User.objects.create_user('on_time', 'on_time@example.com', 'password'), today)
+
+    def setUp(self):
+        CountingEmailBackend.opened = 0
+
+    def test_one_digest_per_manager_over_one_connection(self):
+        with self.assertNumQueries(2):
+            call_command('send_overdue_digests', stdout=StringIO())
+
+        self.assertEqual(
+            sorted(recipient for message in mail.outbox for recipient in message.to),
+            sorted(manager.email for manager in self.managers),
+        )
+        for message in mail.outbox:
+            self.assertEqual(message.subject, 'Overdue: 2 action items, 1 maintenance ticket')
+        self.assertEqual(CountingEmailBackend.opened, 1)
+
+    def test_dry_run_sends_nothing(self):
+        out = StringIO()
+        call_command('send_overdue_digests', '--dry-run', stdout=out)
+        self.assertEqual(mail.outbox, [])
+        self.assertIn('Rendered 3 digests', out.getvalue())
+
+
+class ActionBoardAnalyticsTests(TestCase):
+    """Board edits go through update(), which sends no post_save"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password')
+        visit = create_visit(Store.objects.create(name='Maadi', address='1 Road 9'), cls.user, timezone.localdate())
+        cls.item = ActionPlanItem.objects.create(
+            visit=visit, what='Fix', who='Staff', timeframe=timezone.localdate() + timedelta(days=7)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def patch(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse('checklist:patch_action_item', args=[self.item.pk]),
+                json.dumps(fields), content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_status_and_timeframe_changes_drop_cached_analytics(self):
+        for fields in ({'status': 'closed'}, {'timeframe': (timezone.localdate() - timedelta(days=1)).isoformat()}):
+            with self.subTest(fields=fields):
+                get_store_analytics()
+                get_area_kpis()
+                self.patch(**fields)
+                self.assertIsNone(cache.get(STORE_ANALYTICS_CACHE_KEY))
+                self.assertIsNone(cache.get(AREA_KPI_CACHE_KEY))
+
+
+class RepeatFailureTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('manager', 'manager@example.com', 'password')
+        cls.store = Store.objects.create(name='Maadi', address='1 Road 9')
+        category = ChecklistCategory.objects.create(name='Hygiene')
+        cls.question = ChecklistQuestion.objects.create(category=category, text='Floors clean?', number=1)
+
+    def submit(self, comment):
+        request = RequestFactory().post('/', {f'comment_{self.question.id}': comment})
+        request.user = self.user
+        visit = AreaManagerVisit.objects.create(store=self.store, manager=self.user)
+        ChecklistManager.process_checklist_items(request, visit)
+
+    def test_repeat_failure_appends_its_comment_to_the_open_item(self):
+        self.submit('Dirty by the tills')
+        self.submit('Still dirty, now the back room too')
+
+        item = ActionPlanItem.objects.get()
+        self.assertEqual(item.occurrences, 2)
+        self.assertEqual(item.remarks, (
+            f'Dirty by the tills\n[Repeat, visit {timezone.now().date()}] Still dirty, now the back room too'
+        ))
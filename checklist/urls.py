@@ -1,24 +1,26 @@
 from django.urls import path
 from . import views
 from .views.data_export_views import import_questions, export_data, export_visit_excel, export_history_excel
-from .views.checklist_views import print_visit_report
+from .views.checklist_views import print_visit_report, print_visit_bundle
 from .views.dashboard_views import dashboard, manage_checklist_questions, edit_checklist_question
 from .views.checklist_views import (
     new_checklist, checklist_success, checklist_history, 
     checklist_detail, save_draft, load_draft, delete_draft
 )
 from .views.action_plan_views import (
-    action_plan, update_action_item, bulk_update_actions,
-    bulk_update_action_items_form
+    action_plan, action_plan_items_json, action_plan_board_json, patch_action_item,
+    update_action_item, bulk_update_actions, bulk_update_action_items_form
 )
 from .views.maintenance_views import (
-    NewMaintenanceView, edit_maintenance, maintenance_list
+    NewMaintenanceView, edit_maintenance, maintenance_list, recurring_failures_report, visit_autocomplete
 )
 from .views.store_views import (
     store_management, edit_store, toggle_store_status, store_list, store_detail
 )
 from .views.area_management_views import area_management, assign_store_to_area, assign_user_to_area
 from .views.reports_views import reports
+from .views.search_views import global_search
+from .views.route_views import todays_route
 from django.views.generic.base import RedirectView
 
 app_name = 'checklist'
@@ -38,6 +40,7 @@ urlpatterns = [
     path('export-visit-excel/<int:visit_id>/', export_visit_excel, name='export_visit_excel'),
     path('export-history-excel/', export_history_excel, name='export_history_excel'),
     path('print-visit-report/<int:visit_id>/', print_visit_report, name='print_visit_report'),
+    path('print-visit-report/bundle/', print_visit_bundle, name='print_visit_bundle'),
     
     # Draft Handling
     path('draft/save/', save_draft, name='save_draft'),
@@ -46,12 +49,17 @@ urlpatterns = [
     
     # Action Plan Management
     path('action-plan/', action_plan, name='action_plan'),
+    path('action-plan/api/items/', action_plan_items_json, name='action_plan_items_json'),
+    path('action-plan/api/items/<int:item_id>/', patch_action_item, name='patch_action_item'),
+    path('action-plan/api/board/', action_plan_board_json, name='action_plan_board_json'),
     path('action-plan/bulk-update/', bulk_update_action_items_form, name='bulk_update_action_items'),
     path('action-plan/bulk-update-ajax/', bulk_update_actions, name='bulk_update_actions_ajax'),
     path('action-plan/<int:item_id>/update/', update_action_item, name='update_action_item'),
     
     # Maintenance Management
     path('maintenance/', maintenance_list, name='maintenance_list'),
+    path('maintenance/api/visits/', visit_autocomplete, name='visit_autocomplete'),
+    path('maintenance/recurring-failures/', recurring_failures_report, name='recurring_failures'),
     path('maintenance/new/', views.new_maintenance, name='new_maintenance'),
     path('maintenance/new/<int:visit_id>/', NewMaintenanceView.as_view(), name='new_maintenance_with_visit'),
     path('maintenance/<int:ticket_id>/', views.maintenance_detail, name='maintenance_detail'),
@@ -65,6 +73,7 @@ urlpatterns = [
     # User-facing Stores
     path('my-stores/', store_list, name='store_list'),
     path('my-stores/<int:store_id>/', store_detail, name='store_detail'),
+    path('my-stores/route/', todays_route, name='todays_route'),
     
     path('manage-questions/', manage_checklist_questions, name='manage_checklist_questions'),
     path('edit-question/<int:question_id>/', edit_checklist_question, name='edit_checklist_question'),
@@ -76,6 +85,9 @@ urlpatterns = [
     # Reports
     path('reports/', reports, name='reports'),
 
+    # Search
+    path('search/', global_search, name='search'),
+
     # API Endpoints
     # Note: get_dashboard_stats was not in your original views - you can add it if needed
     # path('api/stats/', get_dashboard_stats, name='get_dashboard_stats'),
@@ -0,0 +1,87 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset"""
+
+    def __init__(self, items, has_next, next_cursor):
+        self.object_list = items
+        self.has_next = has_next
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_other_pages(self):
+        return self.has_next
+
+
+def encode_cursor(values):
+    payload = json.dumps([v.isoformat() if hasattr(v, 'isoformat') else v for v in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, model, ordering):
+    """Decode a cursor back into python values for the ordering fields"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError('Invalid cursor')
+    if not isinstance(raw, list) or len(raw) != len(ordering):
+        raise ValidationError('Invalid cursor')
+    return [
+        model._meta.get_field(field.lstrip('-')).to_python(value)
+        for field, value in zip(ordering, raw)
+    ]
+
+
+def _after(ordering, values):
+    """
+    Build the WHERE clause selecting rows strictly after values in ordering,
+    e.g. (a < x) OR (a = x AND b < y) for ordering ('-a', '-b').
+    """
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[index]})
+        for prev_field, prev_value in zip(ordering[:index], values[:index]):
+            step &= Q(**{prev_field.lstrip('-'): prev_value})
+        condition |= step
+    return condition
+
+
+def paginate_keyset(queryset, cursor=None, page_size=20, ordering=('-created_at', '-id')):
+    """
+    Return a KeysetPage of queryset ordered by ordering, starting after cursor.
+
+    The last ordering field must be unique (normally the primary key) so that
+    every row has a distinct position. Each page costs one indexed range
+    query of page_size + 1 rows, regardless of how deep the page is.
+    """
+    ordering = list(ordering)
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(_after(ordering, decode_cursor(cursor, queryset.model, ordering)))
+
+    items = list(queryset[:page_size + 1])
+    has_next = len(items) > page_size
+    items = items[:page_size]
+
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, field.lstrip('-')) for field in ordering])
+    return KeysetPage(items, has_next, next_cursor)
@@ -0,0 +1,177 @@
+"""
+Bulk upsert importer for checklist questions (CSV and XLSX)
+"""
+import csv
+from io import TextIOWrapper
+import logging
+from zipfile import BadZipFile
+
+from django.db import transaction
+from openpyxl.utils.exceptions import InvalidFileException
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ['Question Number', 'Category', 'Question Text', 'Is Active']
+SESSION_KEY = 'question_import_rows'
+
+# What reading a bad upload raises: invalid rows, a corrupt or renamed .xlsx,
+# or a CSV in another encoding
+READ_ERRORS = (ValueError, UnicodeDecodeError, BadZipFile, InvalidFileException)
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('true', 'yes', '1', 'y')
+
+
+def read_question_rows(uploaded_file, encoding='utf-8'):
+    """
+    Read an uploaded CSV or XLSX file into a list of plain row dicts.
+
+    The expected columns are the ones written by the question CSV export:
+    Question Number, Category, Question Text, Is Active.
+    """
+    name = (getattr(uploaded_file, 'name', '') or '').lower()
+    if name.endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(c).strip() if c is not None else '' for c in next(rows, [])]
+            records = [dict(zip(header, row)) for row in rows if any(c not in (None, '') for c in row)]
+        finally:
+            workbook.close()
+    else:
+        reader = csv.DictReader(TextIOWrapper(uploaded_file.file, encoding=encoding))
+        header = [h.strip() for h in (reader.fieldnames or [])]
+        records = [
+            {(k or '').strip(): v for k, v in row.items()}
+            for row in reader
+            if any((v or '').strip() for v in row.values() if isinstance(v, str))
+        ]
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f'Missing required columns: {", ".join(missing)}')
+
+    rows = []
+    for row_num, record in enumerate(records, start=2):
+        category = str(record['Category'] or '').strip()
+        text = str(record['Question Text'] or '').strip()
+        if not category or not text:
+            raise ValueError(f'Row {row_num}: Category and Question Text are required')
+        try:
+            number = int(float(str(record['Question Number']).strip()))
+        except (TypeError, ValueError):
+            raise ValueError(f'Row {row_num}: invalid Question Number {record["Question Number"]!r}')
+        rows.append({
+            'row': row_num,
+            'category': category,
+            'number': number,
+            'text': text,
+            'is_active': _as_bool(record['Is Active']),
+        })
+    return rows
+
+
+class QuestionImport:
+    """
+    Diff and apply a set of question rows against the database.
+
+    Questions are matched by (category name, number). Categories are resolved
+    in one query and existing questions in another; ``apply`` writes all
+    changes with bulk_create/bulk_update inside a single transaction.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.plan()
+
+    def plan(self):
+        from checklist.models import ChecklistCategory, ChecklistQuestion
+
+        # Later rows win when a file repeats the same (category, number)
+        latest = {}
+        self.duplicates = []
+        for row in self.rows:
+            key = (row['category'], row['number'])
+            if key in latest:
+                self.duplicates.append(row)
+            latest[key] = row
+
+        names = {category for category, _ in latest}
+        self.categories = {}
+        for category in ChecklistCategory.objects.filter(name__in=names).order_by('id'):
+            self.categories.setdefault(category.name, category)
+        self.new_categories = sorted(names - set(self.categories))
+
+        existing = {}
+        for question in ChecklistQuestion.objects.filter(
+            category__in=self.categories.values()
+        ).select_related('category').order_by('id'):
+            existing.setdefault((question.category.name, question.number), question)
+
+        self.creates = []
+        self.updates = []
+        self.unchanged = 0
+        for key, row in latest.items():
+            question = existing.get(key)
+            if question is None:
+                self.creates.append(row)
+                continue
+            changes = {}
+            if question.text != row['text']:
+                changes['text'] = (question.text, row['text'])
+            if question.is_active != row['is_active']:
+                changes['is_active'] = (question.is_active, row['is_active'])
+            if changes:
+                self.updates.append({'question': question, 'row': row, 'changes': changes})
+            else:
+                self.unchanged += 1
+
+    @property
+    def has_changes(self):
+        return bool(self.creates or self.updates)
+
+    def summary(self):
+        return {
+            'new_categories': len(self.new_categories),
+            'created': len(self.creates),
+            'updated': len(self.updates),
+            'unchanged': self.unchanged,
+            'duplicates': len(self.duplicates),
+        }
+
+    def apply(self):
+        """Write the planned changes and return the summary counts"""
+        from checklist.models import ChecklistCategory, ChecklistQuestion
+
+        with transaction.atomic():
+            created_categories = ChecklistCategory.objects.bulk_create(
+                [ChecklistCategory(name=name) for name in self.new_categories]
+            )
+            categories = {**self.categories, **{c.name: c for c in created_categories}}
+
+            ChecklistQuestion.objects.bulk_create([
+                ChecklistQuestion(
+                    category=categories[row['category']],
+                    number=row['number'],
+                    text=row['text'],
+                    is_active=row['is_active'],
+                )
+                for row in self.creates
+            ], batch_size=500)
+
+            updated = []
+            for update in self.updates:
+                question = update['question']
+                question.text = update['row']['text']
+                question.is_active = update['row']['is_active']
+                updated.append(question)
+            ChecklistQuestion.objects.bulk_update(updated, ['text', 'is_active'], batch_size=500)
+
+        summary = self.summary()
+        logger.info(f"Question import applied: {summary}")
+        return summary
@@ -0,0 +1,84 @@
+"""
+Workbook rendering for the monthly area report pack.
+
+Functions here take plain Python data and return bytes so they can run in
+worker processes without Django being set up.
+"""
+from io import BytesIO
+import re
+
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Font
+
+
+def safe_filename(value):
+    """Return value reduced to characters safe for file and archive names"""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', str(value)).strip('_') or 'unnamed'
+
+
+def _write_table(sheet, headers, rows):
+    sheet.append(headers)
+    for cell in sheet[sheet.max_row]:
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal='center')
+    for row in rows:
+        sheet.append(list(row))
+
+
+def render_store_workbook(payload):
+    """
+    Render one store's monthly workbook.
+
+    Returns (area_id, area_name, file_name, xlsx_bytes). The file name carries
+    the store id, since two stores' names can reduce to the same safe_filename().
+    """
+    workbook = Workbook()
+
+    summary = workbook.active
+    summary.title = 'Summary'
+    scores = [v['score'] for v in payload['visits'] if v['score'] is not None]
+    summary_rows = [
+        ('Store', payload['store']),
+        ('Area', payload['area']),
+        ('Month', payload['month']),
+        ('Visits', len(payload['visits'])),
+        ('Average Score', f"{round(sum(scores) / len(scores), 1)}%" if scores else 'N/A'),
+        ('Action Items Raised', len(payload['actions'])),
+        ('Open Action Items', sum(1 for a in payload['actions'] if a['status'] != 'closed')),
+        ('Maintenance Tickets', len(payload['tickets'])),
+    ]
+    for label, value in summary_rows:
+        summary.append([label, value])
+        summary.cell(row=summary.max_row, column=1).font = Font(bold=True)
+
+    _write_table(
+        workbook.create_sheet(title='Visits'),
+        ['Date', 'Manager', 'Time In', 'Time Out', 'Score'],
+        ((v['date'], v['manager'], v['time_in'], v['time_out'], v['score']) for v in payload['visits'])
+    )
+    _write_table(
+        workbook.create_sheet(title='Categories'),
+        ['Category', 'Checked', 'Compliant', 'Compliance %'],
+        (
+            (c['name'], c['total'], c['compliant'], round(c['compliant'] / c['total'] * 100, 1) if c['total'] else 0)
+            for c in payload['categories']
+        )
+    )
+    _write_table(
+        workbook.create_sheet(title='Action Plan'),
+        ['What', 'Who', 'Time Frame', 'Status', 'Priority'],
+        ((a['what'], a['who'], a['timeframe'], a['status'], a['priority']) for a in payload['actions'])
+    )
+    _write_table(
+        workbook.create_sheet(title='Maintenance'),
+        ['Equipment', 'Issue', 'Priority', 'Status', 'Due Date', 'Created'],
+        (
+            (t['equipment'], t['issue_description'], t['priority'], t['status'], t['due_date'], t['created_date'])
+            for t in payload['tickets']
+        )
+    )
+
+    buffer = BytesIO()
+    workbook.save(buffer)
+    file_name = f"{safe_filename(payload['store'])}_{payload['store_id']}_{payload['month']}.xlsx"
+    return payload['area_id'], payload['area'], file_name, buffer.getvalue()
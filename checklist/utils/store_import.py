@@ -0,0 +1,316 @@
+"""
+Bulk upsert importer for stores (CSV and XLSX)
+"""
+import csv
+from decimal import Decimal, InvalidOperation
+from io import TextIOWrapper
+import logging
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Lower, Replace
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = ['Name', 'Address']
+# Column -> row key; columns left out of a file leave existing values alone
+OPTIONAL_COLUMNS = {
+    'Area': 'area',
+    'Manager': 'manager_name',
+    'Phone': 'phone',
+    'Email': 'email',
+    'Active': 'is_active',
+    'Equipment Categories': 'equipment',
+    'Latitude': 'latitude',
+    'Longitude': 'longitude',
+}
+SESSION_KEY = 'store_import_rows'
+
+# Plain store fields compared and written as-is
+STORE_FIELDS = ['manager_name', 'phone', 'email', 'is_active', 'latitude', 'longitude']
+
+
+def _text(value):
+    return ' '.join(str(value).split()) if value is not None else ''
+
+
+def _key(value):
+    return _text(value).lower()
+
+
+def _loose_key(field):
+    """
+    Lower-cased field with spaces and tabs removed: a superset filter for
+    _key() matches, which SQL cannot collapse runs of whitespace for. Compare
+    _key() in Python on the rows it returns.
+    """
+    return Replace(Replace(Lower(field), Value(' '), Value('')), Value('\t'), Value(''))
+
+
+def _squashed(keys):
+    return {key.replace(' ', '') for key in keys}
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('true', 'yes', '1', 'y', 'active')
+
+
+def _as_coordinate(value, bound, row_num, column):
+    if _text(value) == '':
+        return None
+    try:
+        number = Decimal(_text(value)).quantize(Decimal('0.000001'))
+    except InvalidOperation:
+        raise ValueError(f'Row {row_num}: invalid {column} {value!r}')
+    if not -bound <= number <= bound:
+        raise ValueError(f'Row {row_num}: {column} {value!r} is out of range')
+    # Kept as text so the rows can be stored in the session between preview and confirm
+    return str(number)
+
+
+def read_store_rows(uploaded_file, encoding='utf-8'):
+    """
+    Read an uploaded CSV or XLSX file into a list of plain row dicts.
+
+    Name and Address are required; Area, Manager, Phone, Email, Active,
+    Equipment Categories (separated by ; or ,), Latitude and Longitude are
+    optional.
+    """
+    name = (getattr(uploaded_file, 'name', '') or '').lower()
+    if name.endswith('.xlsx'):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(c).strip() if c is not None else '' for c in next(rows, [])]
+            records = [dict(zip(header, row)) for row in rows if any(c not in (None, '') for c in row)]
+        finally:
+            workbook.close()
+    else:
+        reader = csv.DictReader(TextIOWrapper(uploaded_file.file, encoding=encoding))
+        header = [h.strip() for h in (reader.fieldnames or [])]
+        records = [
+            {(k or '').strip(): v for k, v in row.items()}
+            for row in reader
+            if any((v or '').strip() for v in row.values() if isinstance(v, str))
+        ]
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f'Missing required columns: {", ".join(missing)}')
+    present = {column: key for column, key in OPTIONAL_COLUMNS.items() if column in header}
+
+    from checklist.models import Store
+    phone_field = Store._meta.get_field('phone')
+
+    rows = []
+    for row_num, record in enumerate(records, start=2):
+        row = {'row': row_num, 'name': _text(record['Name']), 'address': _text(record['Address'])}
+        if not row['name'] or not row['address']:
+            raise ValueError(f'Row {row_num}: Name and Address are required')
+        for column, key in present.items():
+            value = record.get(column)
+            if key == 'is_active':
+                row[key] = _as_bool(value)
+            elif key == 'equipment':
+                names = _text(value).replace(';', ',').split(',')
+                row[key] = sorted({_text(n) for n in names if _text(n)}, key=str.lower)
+            elif key in ('latitude', 'longitude'):
+                row[key] = _as_coordinate(value, 90 if key == 'latitude' else 180, row_num, column)
+            else:
+                row[key] = _text(value)
+        try:
+            if row.get('phone'):
+                phone_field.run_validators(row['phone'])
+            if row.get('email'):
+                validate_email(row['email'])
+        except ValidationError as e:
+            raise ValueError(f'Row {row_num}: {" ".join(e.messages)}')
+        rows.append(row)
+    return rows
+
+
+class StoreImport:
+    """
+    Diff and apply a set of store rows against the database.
+
+    Stores are matched by name and address (case and spacing ignored). Areas,
+    equipment categories, matching stores and their equipment links are each
+    resolved in one query; ``apply`` writes everything with bulk_create,
+    bulk_update and one delete inside a single transaction.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.plan()
+
+    def plan(self):
+        from checklist.models import Area, EquipmentCategory, Store
+
+        # Later rows win when a file repeats the same store
+        latest = {}
+        self.duplicates = []
+        for row in self.rows:
+            key = (_key(row['name']), _key(row['address']))
+            if key in latest:
+                self.duplicates.append(row)
+            latest[key] = row
+
+        area_names = {_key(row['area']): row['area'] for row in latest.values() if row.get('area')}
+        self.areas = {
+            _key(area.name): area
+            for area in Area.objects.annotate(key=_loose_key('name')).filter(key__in=_squashed(area_names))
+            if _key(area.name) in area_names
+        }
+        self.new_areas = sorted((name for key, name in area_names.items() if key not in self.areas), key=str.lower)
+
+        category_names = {_key(name): name for row in latest.values() for name in row.get('equipment', ())}
+        self.categories = {}
+        for category in EquipmentCategory.objects.annotate(key=_loose_key('name')).filter(
+            key__in=_squashed(category_names)
+        ).order_by('id'):
+            if _key(category.name) in category_names:
+                self.categories.setdefault(_key(category.name), category)
+        self.new_categories = sorted(
+            (name for key, name in category_names.items() if key not in self.categories), key=str.lower
+        )
+
+        existing = {}
+        for store in Store.objects.annotate(key=_loose_key('name')).filter(
+            key__in=_squashed(name for name, _ in latest)
+        ).select_related('area').order_by('id'):
+            key = (_key(store.name), _key(store.address))
+            if key in latest:
+                existing.setdefault(key, store)
+
+        # store id -> {category key: (through row id, category id, category name)}
+        self.links = {}
+        through = Store.equipment_categories.through
+        for link_id, store_id, category_id, category_name in through.objects.filter(
+            store__in=existing.values()
+        ).values_list('id', 'store_id', 'equipmentcategory_id', 'equipmentcategory__name'):
+            self.links.setdefault(store_id, {})[_key(category_name)] = (link_id, category_id, category_name)
+
+        self.creates = []
+        self.updates = []
+        self.unchanged = 0
+        for key, row in latest.items():
+            store = existing.get(key)
+            if store is None:
+                self.creates.append(row)
+                continue
+            changes = {}
+            for field in STORE_FIELDS:
+                if field not in row:
+                    continue
+                before = getattr(store, field)
+                after = row[field]
+                if field in ('latitude', 'longitude'):
+                    after = Decimal(after) if after is not None else None
+                if before != after:
+                    changes[field] = (before, after)
+            if 'area' in row and _key(store.area.name if store.area else '') != _key(row['area']):
+                changes['area'] = (store.area.name if store.area else '', row['area'])
+            if 'equipment' in row:
+                current = self.links.get(store.pk, {})
+                if set(current) != {_key(name) for name in row['equipment']}:
+                    before = sorted((name for _, _, name in current.values()), key=str.lower)
+                    changes['equipment'] = (', '.join(before) or '-', ', '.join(row['equipment']) or '-')
+            if changes:
+                self.updates.append({'store': store, 'row': row, 'changes': changes})
+            else:
+                self.unchanged += 1
+
+    @property
+    def has_changes(self):
+        return bool(self.creates or self.updates)
+
+    def summary(self):
+        return {
+            'new_areas': len(self.new_areas),
+            'new_categories': len(self.new_categories),
+            'created': len(self.creates),
+            'updated': len(self.updates),
+            'unchanged': self.unchanged,
+            'duplicates': len(self.duplicates),
+        }
+
+    def apply(self):
+        """Write the planned changes and return the summary counts"""
+        from checklist.models import Area, EquipmentCategory, Store
+
+        with transaction.atomic():
+            areas = {**self.areas, **{
+                _key(area.name): area
+                for area in Area.objects.bulk_create([Area(name=name) for name in self.new_areas])
+            }}
+            categories = {**self.categories, **{
+                _key(category.name): category
+                for category in EquipmentCategory.objects.bulk_create(
+                    [EquipmentCategory(name=name) for name in self.new_categories]
+                )
+            }}
+
+            def area_for(row):
+                return areas[_key(row['area'])] if row.get('area') else None
+
+            created = Store.objects.bulk_create([
+                Store(
+                    name=row['name'], address=row['address'], area=area_for(row),
+                    **{field: row[field] for field in STORE_FIELDS if field in row},
+                )
+                for row in self.creates
+            ], batch_size=500)
+
+            updated, fields = [], set()
+            for update in self.updates:
+                store, row = update['store'], update['row']
+                for field in update['changes']:
+                    if field == 'area':
+                        store.area = area_for(row)
+                    elif field != 'equipment':
+                        setattr(store, field, row[field])
+                    if field != 'equipment':
+                        fields.add(field)
+                updated.append(store)
+            if fields:
+                Store.objects.bulk_update(updated, sorted(fields), batch_size=500)
+
+            # Equipment links: insert what is missing, delete what a row no longer lists
+            through = Store.equipment_categories.through
+            new_links, stale_links = [], []
+            for store, row in list(zip(created, self.creates)) + [
+                (update['store'], update['row']) for update in self.updates if 'equipment' in update['changes']
+            ]:
+                wanted = {_key(name) for name in row.get('equipment', ())}
+                current = self.links.get(store.pk, {})
+                new_links += [
+                    through(store_id=store.pk, equipmentcategory_id=categories[key].pk)
+                    for key in wanted - set(current)
+                ]
+                stale_links += [current[key][0] for key in set(current) - wanted]
+            through.objects.bulk_create(new_links, batch_size=1000)
+            if stale_links:
+                through.objects.filter(id__in=stale_links).delete()
+
+        # bulk_create/update skip the model signals these normally hang off.
+        # From manage.py import_stores they reach the web workers only because
+        # the cache is shared (settings.CACHES)
+        from checklist.access import invalidate_store_access
+        from checklist.analytics import invalidate_store_analytics
+        from checklist.search import index_instances
+        from checklist.views.maintenance_views import REFERENCE_CACHE_KEY
+        invalidate_store_access()
+        invalidate_store_analytics()
+        cache.delete(REFERENCE_CACHE_KEY)
+        index_instances(created + updated)
+
+        summary = self.summary()
+        logger.info(f"Store import applied: {summary}")
+        return summary
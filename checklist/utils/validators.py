@@ -12,6 +12,7 @@ def validate_store_access(user, store_id):
     """
     Validate that user has access to the specified store
     """
+    from checklist.access import has_store_access
     from checklist.models import Store
     
     if not hasattr(user, 'profile'):
@@ -21,11 +22,7 @@ def validate_store_access(user, store_id):
     if not store:
         raise ValidationError("Store not found or inactive")
     
-    profile = user.profile
-    if profile.role in ['admin', 'area_management', 'store_selector']:
-        return store
-    
-    if store not in profile.stores.all():
+    if not has_store_access(user, store.id):
         raise ValidationError("You don't have access to this store")
     
     return store
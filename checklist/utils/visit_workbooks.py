@@ -0,0 +1,261 @@
+"""
+Parsing utilities for the paper "Area Manger Visit.xlsx" checklist template.
+
+This module deliberately avoids importing Django models so it can run inside
+worker processes of a ProcessPoolExecutor without any app setup.
+"""
+from datetime import date, datetime, time
+import re
+
+from openpyxl import load_workbook
+
+CHECKLIST_SHEET = 'Checklist'
+ACTION_PLAN_SHEET = 'Action Plan'
+
+HEADER_LABELS = {
+    'month': 'month of',
+    'day': 'day',
+    'store': 'store',
+    'time': 'time',
+}
+
+# Column offsets (0-based) of the two side-by-side question blocks
+QUESTION_BLOCKS = [
+    {'text': 1, 'yes': 3, 'no': 4},
+    {'text': 5, 'yes': 7, 'no': 8},
+]
+
+# Column offsets (0-based) on the action plan sheet
+ACTION_COLUMNS = {'what': 0, 'who': 4, 'timeframe': 7, 'remarks': 11}
+
+MONTH_FORMATS = ['%B %Y', '%b %Y', '%m/%Y', '%m-%Y', '%Y-%m', '%B-%Y', '%b-%Y']
+TIME_FORMATS = ['%H:%M', '%H:%M:%S', '%I:%M %p', '%I:%M%p']
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y']
+
+
+class WorkbookFormatError(ValueError):
+    """Raised when a workbook does not follow the paper checklist template"""
+
+
+def normalize_key(value):
+    """
+    Normalize a category or store name for case/whitespace-insensitive lookups
+    """
+    return ' '.join(str(value or '').split()).lower()
+
+
+def _clean(value):
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _is_marked(value):
+    """A Yes/No cell counts as ticked when it holds anything but blank/false"""
+    value = _clean(value)
+    if value in ('', None, False, 0):
+        return False
+    if isinstance(value, str) and value.lower() in ('0', 'false', 'n', 'no', '-'):
+        return False
+    return True
+
+
+def _strip_bullet(text):
+    return re.sub(r'^[•\-\*\s]+', '', str(text)).strip()
+
+
+def _parse_header_row(row):
+    """
+    Extract "Month of:", "Day:", "Store:" and "Time:" values from the header row.
+
+    Values may be typed after the colon in the label cell itself or in the
+    following cell(s) up to the next label.
+    """
+    header = {}
+    cells = list(row)
+    for index, cell in enumerate(cells):
+        if not isinstance(cell, str) or ':' not in cell:
+            continue
+        label, _, remainder = cell.partition(':')
+        label = normalize_key(label)
+        key = next((k for k, v in HEADER_LABELS.items() if v == label), None)
+        if key is None:
+            continue
+        value = remainder.strip()
+        if not value:
+            for following in cells[index + 1:]:
+                if isinstance(following, str) and ':' in following:
+                    break
+                if _clean(following) != '':
+                    value = _clean(following)
+                    break
+        header[key] = value
+    return header
+
+
+def parse_month(value):
+    """Return the first day of the month described by value, or None"""
+    if isinstance(value, datetime):
+        return value.date().replace(day=1)
+    if isinstance(value, date):
+        return value.replace(day=1)
+    text = ' '.join(str(value or '').split())
+    for fmt in MONTH_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_time(value):
+    """Return a time for a Time: cell, or None"""
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    text = str(value or '').strip().upper()
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_date(value):
+    """Return a date for a TIME FRAME cell, or None"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_checklist_sheet(sheet):
+    header = {}
+    answers = []
+    categories = [None] * len(QUESTION_BLOCKS)
+
+    for row in sheet.iter_rows(values_only=True):
+        row = list(row) + [None] * (9 - len(row))
+        first = _clean(row[0])
+
+        if not header and any(isinstance(c, str) and 'month of' in c.lower() for c in row):
+            header = _parse_header_row(row)
+            continue
+
+        if isinstance(first, str) and normalize_key(first) == 'no':
+            # Column header row ("No", "Category", ..., "Yes", "No")
+            continue
+
+        if first == '':
+            # Category row: names sit in the text column of each block
+            names = [_clean(row[block['text']]) for block in QUESTION_BLOCKS]
+            if any(names):
+                categories = [name or None for name in names]
+            continue
+
+        try:
+            number = int(first)
+        except (TypeError, ValueError):
+            continue
+
+        for block_index, block in enumerate(QUESTION_BLOCKS):
+            category = categories[block_index]
+            if not category or _clean(row[block['text']]) == '':
+                continue
+            yes, no = _is_marked(row[block['yes']]), _is_marked(row[block['no']])
+            if yes == no:
+                # Unanswered (or ticked both ways); nothing reliable to import
+                continue
+            answers.append({
+                'category': category,
+                'number': number,
+                'text': _strip_bullet(row[block['text']]),
+                'answer': yes,
+            })
+
+    return header, answers
+
+
+def _parse_action_plan_sheet(sheet):
+    actions = []
+    header_seen = False
+    for row in sheet.iter_rows(values_only=True):
+        row = list(row) + [None] * (12 - len(row))
+        if not header_seen:
+            header_seen = normalize_key(row[ACTION_COLUMNS['what']]) == 'what'
+            continue
+        what = _clean(row[ACTION_COLUMNS['what']])
+        if what == '':
+            continue
+        actions.append({
+            'what': str(what),
+            'who': str(_clean(row[ACTION_COLUMNS['who']])),
+            'timeframe': parse_date(row[ACTION_COLUMNS['timeframe']]),
+            'remarks': str(_clean(row[ACTION_COLUMNS['remarks']])),
+        })
+    return actions
+
+
+def parse_visit_workbook(path):
+    """
+    Parse one filled paper checklist workbook into plain Python data.
+
+    Returns a dict with ``path`` plus either ``error`` (str) or the keys
+    ``store``, ``month``, ``visit_date``, ``time_in``, ``answers`` and
+    ``actions``. Never raises, so it is safe to map across a process pool.
+    """
+    path = str(path)
+    workbook = None
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        if CHECKLIST_SHEET not in workbook.sheetnames:
+            raise WorkbookFormatError(f'Missing "{CHECKLIST_SHEET}" sheet')
+
+        header, answers = _parse_checklist_sheet(workbook[CHECKLIST_SHEET])
+        actions = []
+        if ACTION_PLAN_SHEET in workbook.sheetnames:
+            actions = _parse_action_plan_sheet(workbook[ACTION_PLAN_SHEET])
+
+        store = _clean(header.get('store'))
+        if not store:
+            raise WorkbookFormatError('Store name is empty')
+
+        month_start = parse_month(header.get('month'))
+        if month_start is None:
+            raise WorkbookFormatError(f'Unrecognised "Month of" value: {header.get("month")!r}')
+
+        day = header.get('day')
+        try:
+            day = int(day) if day not in ('', None) else 1
+            visit_date = month_start.replace(day=day)
+        except (TypeError, ValueError):
+            raise WorkbookFormatError(f'Invalid "Day" value: {header.get("day")!r}')
+
+        if not answers:
+            raise WorkbookFormatError('No answered checklist questions found')
+
+        return {
+            'path': path,
+            'store': str(store),
+            'month': visit_date.strftime('%B %Y'),
+            'visit_date': visit_date,
+            'time_in': parse_time(header.get('time')),
+            'answers': answers,
+            'actions': actions,
+        }
+    except Exception as e:
+        return {'path': path, 'error': str(e) or e.__class__.__name__}
+    finally:
+        if workbook is not None:
+            workbook.close()
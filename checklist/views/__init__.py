@@ -5,18 +5,22 @@ from .store_views import *
 from .dashboard_views import *
 from .base import *
 from .data_export_views import export_data, import_questions
+from .search_views import global_search
+from .route_views import todays_route
 __all__ = [
     # Checklist Views
     'new_checklist', 'handle_checklist_submission', 'checklist_success',
     'checklist_history', 'checklist_drafts', 'checklist_detail',
-    'save_draft', 'load_draft', 'delete_draft',
+    'save_draft', 'load_draft', 'delete_draft', 'print_visit_bundle',
     
     # Action Plan Views
-    'action_plan', 'update_action_item', 'bulk_update_actions',
+    'action_plan', 'action_plan_items_json', 'action_plan_board_json', 'patch_action_item',
+    'update_action_item', 'bulk_update_actions',
     'bulk_update_action_items_form',
     
     # Maintenance Views
-    'NewMaintenanceView', 'edit_maintenance', 'maintenance_list',
+    'NewMaintenanceView', 'edit_maintenance', 'maintenance_list', 'recurring_failures_report',
+    'visit_autocomplete',
     
     # Store Views
     'store_management', 'edit_store', 'toggle_store_status',
@@ -25,4 +29,10 @@ __all__ = [
     'dashboard',
      # Data Export Views
     'export_data', 'import_questions',
+
+    # Search Views
+    'global_search',
+
+    # Route Views
+    'todays_route',
 ]
\ No newline at end of file
@@ -1,20 +1,27 @@
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.shortcuts import render, redirect, get_object_or_404
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_http_methods, require_POST
 from django.http import JsonResponse
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
+from django.db import transaction
 import json
 import logging
 
-from ..models import ActionPlanItem, Store
+from ..models import ActionItemStatusChange, ActionPlanItem, ActionPlanItemQuerySet, SearchEntry, Store
+from ..analytics import invalidate_store_analytics
 from ..forms import ActionPlanItemForm
+from ..search import matching_entries
+from ..utils.pagination import paginate_keyset
 from .base import BaseViewMixin, handle_ajax_response
 
 logger = logging.getLogger(__name__)
 
+ACTION_PAGE_SIZE = 20
+
 
 class ActionPlanManager(BaseViewMixin):
     """Manager class for action plan operations"""
@@ -24,7 +31,7 @@ class ActionPlanManager(BaseViewMixin):
         """Get filtered action items based on request parameters"""
         action_items = ActionPlanItem.objects.filter(
             visit__manager=user
-        ).select_related('visit__store').order_by('-created_at')
+        ).select_related('visit__store').order_by('-created_at', '-id')
 
         # Apply filters
         status_filter = filters.get('status', '')
@@ -45,7 +52,14 @@ class ActionPlanManager(BaseViewMixin):
                 action_items = action_items.filter(timeframe=filter_date)
             except (ValueError, TypeError):
                 pass
-        if search_query:
+        if search_query and SearchEntry.objects.exists():
+            entries = matching_entries(search_query)
+            action_items = action_items.filter(
+                Q(id__in=entries.filter(kind='action').values('object_id')) |
+                Q(visit__store_id__in=entries.filter(kind='store').values('object_id'))
+            )
+        elif search_query:
+            # Search index not built yet (see rebuild_search_index)
             action_items = action_items.filter(
                 Q(what__icontains=search_query) |
                 Q(visit__store__name__icontains=search_query)
@@ -55,12 +69,49 @@ class ActionPlanManager(BaseViewMixin):
     
     @staticmethod
     def calculate_action_stats(action_items, today):
-        """Calculate statistics for action items"""
+        """Calculate statistics for action items in a single aggregate query"""
+        return action_items.order_by().aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='closed')),
+            open=Count('id', filter=Q(status='open')),
+            overdue=Count('id', filter=ActionPlanItemQuerySet.overdue_q(today)),
+        )
+
+    @staticmethod
+    def get_filters(params):
+        """Read the action list filters from request parameters"""
         return {
-            'total': action_items.count(),
-            'completed': action_items.filter(status='completed').count(),
-            'open': action_items.filter(status='open').count(),
-            'overdue': action_items.filter(status='open', timeframe__lt=today).count(),
+            'status': params.get('status', ''),
+            'priority': params.get('priority', ''),
+            'store': params.get('store', ''),
+            'date_filter': params.get('date_filter', ''),
+            'search': params.get('search', ''),
+        }
+
+    @staticmethod
+    def column_counts(action_items):
+        """Item count per status column in one grouped query"""
+        counts = dict.fromkeys(dict(ActionPlanItem.STATUS_CHOICES), 0)
+        for row in action_items.order_by().values('status').annotate(n=Count('id')):
+            counts[row['status']] = row['n']
+        return counts
+
+    @staticmethod
+    def serialize_action(item, today):
+        """JSON representation of an action item"""
+        return {
+            'id': item.id,
+            'what': item.what,
+            'who': item.who,
+            'store': item.visit.store.name,
+            'store_id': item.visit.store_id,
+            'status': item.status,
+            'priority': item.priority,
+            'timeframe': item.timeframe.isoformat(),
+            'overdue': item.is_overdue(today),
+            'occurrences': item.occurrences,
+            'last_seen': item.last_seen.isoformat() if item.last_seen else None,
+            'created_at': item.created_at.isoformat(),
         }
 
 
@@ -73,21 +124,29 @@ def action_plan(request):
         today = timezone.now().date()
 
         # Get filter parameters
-        filters = {
-            'status': request.GET.get('status', ''),
-            'priority': request.GET.get('priority', ''),
-            'store': request.GET.get('store', ''),
-            'date_filter': request.GET.get('date_filter', ''),
-            'search': request.GET.get('search', ''),
-        }
+        filters = manager.get_filters(request.GET)
 
         # Get filtered actions
         action_items_list = manager.get_filtered_actions(request.user, filters)
 
-        # Pagination
-        paginator = Paginator(action_items_list, 20)
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
+        # Pagination: keyset on (created_at, id) when a cursor is requested,
+        # otherwise numbered pages
+        cursor_mode = 'cursor' in request.GET
+        first_query = next_query = ''
+        if cursor_mode:
+            try:
+                page_obj = paginate_keyset(action_items_list, request.GET.get('cursor'), ACTION_PAGE_SIZE)
+            except ValidationError:
+                page_obj = paginate_keyset(action_items_list, None, ACTION_PAGE_SIZE)
+            query = request.GET.copy()
+            query['cursor'] = ''
+            first_query = query.urlencode()
+            query['cursor'] = page_obj.next_cursor or ''
+            next_query = query.urlencode()
+        else:
+            paginator = Paginator(action_items_list, ACTION_PAGE_SIZE)
+            page_number = request.GET.get('page')
+            page_obj = paginator.get_page(page_number)
 
         # Calculate statistics
         stats = manager.calculate_action_stats(action_items_list, today)
@@ -97,6 +156,9 @@ def action_plan(request):
 
         context = {
             'page_obj': page_obj,
+            'cursor_mode': cursor_mode,
+            'first_query': first_query,
+            'next_query': next_query,
             'stats': stats,
             'stores': stores,
             'filters': filters,
@@ -120,6 +182,147 @@ def action_plan(request):
         return render(request, 'checklist/action_plan.html', context)
 
 
+@login_required
+@handle_ajax_response
+def action_plan_items_json(request):
+    """JSON list of action items with keyset pagination on (created_at, id)"""
+    manager = ActionPlanManager()
+    today = timezone.now().date()
+
+    try:
+        page_size = min(max(int(request.GET.get('page_size', ACTION_PAGE_SIZE)), 1), 100)
+    except ValueError:
+        page_size = ACTION_PAGE_SIZE
+
+    action_items = manager.get_filtered_actions(request.user, manager.get_filters(request.GET))
+    try:
+        page = paginate_keyset(action_items, request.GET.get('cursor'), page_size)
+    except ValidationError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid cursor'}, status=400)
+
+    return JsonResponse({
+        'status': 'success',
+        'items': [manager.serialize_action(item, today) for item in page],
+        'has_next': page.has_next,
+        'next_cursor': page.next_cursor,
+    })
+
+
+@login_required
+@handle_ajax_response
+def action_plan_board_json(request):
+    """
+    Kanban board: one column per status, each with its own keyset cursor.
+
+    ?columns=open,closed limits the response to those columns and
+    ?cursor_<status>=... pages a single column.
+    """
+    manager = ActionPlanManager()
+    today = timezone.now().date()
+
+    try:
+        page_size = min(max(int(request.GET.get('page_size', ACTION_PAGE_SIZE)), 1), 100)
+    except ValueError:
+        page_size = ACTION_PAGE_SIZE
+
+    filters = manager.get_filters(request.GET)
+    filters['status'] = ''
+    action_items = manager.get_filtered_actions(request.user, filters)
+
+    statuses = dict(ActionPlanItem.STATUS_CHOICES)
+    requested = [s for s in request.GET.get('columns', '').split(',') if s in statuses] or list(statuses)
+    counts = manager.column_counts(action_items)
+
+    columns = []
+    for status in requested:
+        try:
+            page = paginate_keyset(
+                action_items.filter(status=status), request.GET.get(f'cursor_{status}'), page_size
+            )
+        except ValidationError:
+            return JsonResponse({'status': 'error', 'message': f'Invalid cursor for {status}'}, status=400)
+        columns.append({
+            'status': status,
+            'label': statuses[status],
+            'count': counts[status],
+            'items': [manager.serialize_action(item, today) for item in page],
+            'has_next': page.has_next,
+            'next_cursor': page.next_cursor,
+        })
+
+    return JsonResponse({'status': 'success', 'columns': columns, 'counts': counts})
+
+
+# Fields the board may change in place
+BOARD_EDITABLE_FIELDS = ('status', 'priority', 'timeframe')
+
+
+@login_required
+@require_http_methods(['PATCH'])
+@handle_ajax_response
+def patch_action_item(request, item_id):
+    """
+    Partial update from the board. Body is a JSON object of
+    BOARD_EDITABLE_FIELDS; the response carries only the changed fields and
+    the refreshed column counts.
+    """
+    manager = ActionPlanManager()
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid JSON data'}, status=400)
+    if not isinstance(data, dict) or not data:
+        return JsonResponse({'status': 'error', 'message': 'No fields to update'}, status=400)
+
+    unknown = set(data) - set(BOARD_EDITABLE_FIELDS)
+    if unknown:
+        return JsonResponse({
+            'status': 'error', 'message': f"Fields cannot be updated here: {', '.join(sorted(unknown))}"
+        }, status=400)
+
+    item_qs = ActionPlanItem.objects.filter(id=item_id, visit__manager=request.user)
+    item = get_object_or_404(item_qs)
+
+    changes = {}
+    errors = {}
+    for name, value in data.items():
+        field = ActionPlanItem._meta.get_field(name)
+        try:
+            value = field.clean(value, item)
+        except ValidationError as e:
+            errors[name] = e.messages
+            continue
+        if getattr(item, name) != value:
+            changes[name] = value
+    if errors:
+        return JsonResponse({'status': 'error', 'errors': errors}, status=400)
+
+    if changes:
+        with transaction.atomic():
+            if 'status' in changes:
+                item_qs.set_status(changes['status'], request.user)
+            other = {name: value for name, value in changes.items() if name != 'status'}
+            if other:
+                item_qs.update(updated_at=timezone.now(), **other)
+                # A new timeframe can make the item overdue; update() sends no post_save
+                transaction.on_commit(invalidate_store_analytics)
+
+    response = {'id': item.id}
+    for name, value in changes.items():
+        setattr(item, name, value)
+        response[name] = value.isoformat() if hasattr(value, 'isoformat') else value
+    if {'status', 'timeframe'} & set(changes):
+        response['overdue'] = item.is_overdue()
+
+    filters = manager.get_filters(request.GET)
+    filters['status'] = ''
+    return JsonResponse({
+        'status': 'success',
+        'item': response,
+        'counts': manager.column_counts(manager.get_filtered_actions(request.user, filters)),
+    })
+
+
 @login_required
 def update_action_item(request, item_id):
     """Update an action item with validation and logging"""
@@ -133,15 +336,16 @@ def update_action_item(request, item_id):
         if request.method == 'POST':
             form = ActionPlanItemForm(request.POST, instance=action_item)
             if form.is_valid():
+                old_status = form.initial.get('status')
                 updated_item = form.save(commit=False)
-                
-                # Log status changes
-                if 'status' in form.changed_data:
-                    old_status = action_item.status
-                    new_status = updated_item.status
-                    logger.info(f"Action item {item_id} status changed from {old_status} to {new_status} by {request.user.username}")
-                
-                updated_item.save()
+
+                with transaction.atomic():
+                    updated_item.save()
+                    # Record status changes in the append-only history
+                    if 'status' in form.changed_data:
+                        ActionItemStatusChange.record(
+                            [(updated_item.id, old_status, updated_item.status)], request.user
+                        )
                 
                 messages.success(request, f'Action item "{updated_item.what[:50]}..." updated successfully!')
                 
@@ -191,15 +395,19 @@ def bulk_update_actions(request):
         if user_actions.count() != len(action_ids):
             return JsonResponse({'status': 'error', 'message': 'Some action items not found or unauthorized'})
         
-        # Perform bulk update
-        updates = {}
-        if new_status:
-            updates['status'] = new_status
-        if new_priority:
-            updates['priority'] = new_priority
-        
-        if updates:
-            updated_count = user_actions.update(**updates)
+        if new_status and new_status not in dict(ActionPlanItem.STATUS_CHOICES):
+            return JsonResponse({'status': 'error', 'message': 'Invalid status'})
+        if new_priority and new_priority not in dict(ActionPlanItem.PRIORITY_CHOICES):
+            return JsonResponse({'status': 'error', 'message': 'Invalid priority'})
+
+        if new_status or new_priority:
+            with transaction.atomic():
+                if new_priority:
+                    user_actions.update(priority=new_priority, updated_at=timezone.now())
+                if new_status:
+                    # Writes the status history rows with one bulk insert
+                    user_actions.set_status(new_status, request.user)
+            updated_count = len(action_ids)
             logger.info(f"Bulk updated {updated_count} action items for user {request.user.username}")
             
             return JsonResponse({
@@ -239,7 +447,7 @@ def bulk_update_action_items_form(request):
 
     updated_count = 0
     if bulk_action == 'mark_completed':
-        updated_count = items_to_update.update(status='completed', completed_at=timezone.now())
+        updated_count = items_to_update.set_status('closed', request.user)
     elif bulk_action == 'set_high':
         updated_count = items_to_update.update(priority='high')
     elif bulk_action == 'set_medium':
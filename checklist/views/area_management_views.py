@@ -2,13 +2,23 @@ from django.contrib import messages
 from django.shortcuts import render, redirect
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from ..analytics import get_area_kpis
 from ..models import Area, Store
 
+@login_required
 def area_management(request):
-    """Main area management view"""
-    areas = Area.objects.all().prefetch_related('stores')
+    """Main area management view with cached per-area KPIs"""
+    areas = list(Area.objects.order_by('name').prefetch_related('stores', 'profile_set__user'))
+    kpis = get_area_kpis()
+    by_area = {row['area_id']: row for row in kpis['areas']}
+    for area in areas:
+        area.kpi = by_area.get(area.id)
     return render(request, 'checklist/area_management.html', {
-        'areas': areas
+        'areas': areas,
+        'unassigned_kpi': by_area.get(None),
+        'kpi_totals': kpis['totals'],
+        'kpis_computed_at': kpis['computed_at'],
+        'unassigned_stores': Store.objects.filter(area__isnull=True, is_active=True).order_by('name'),
     })
 
 def assign_store_to_area(request, area_id):
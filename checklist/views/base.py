@@ -3,7 +3,7 @@ from django.utils.decorators import method_decorator
 from django.contrib.auth.mixins import LoginRequiredMixin
 import logging
 
-# Correct import statement:
+from ..access import accessible_stores
 from ..models import Store
 
 # Set up logging
@@ -14,16 +14,8 @@ class BaseViewMixin:
     
     @classmethod
     def get_user_stores(cls, user):
-        """Get stores accessible by user based on role"""
-        # Remove the incorrect import from here
-        if not hasattr(user, 'profile'):
-            return Store.objects.none()
-            
-        profile = user.profile
-        if profile.role in ['admin', 'area_management', 'store_selector']:
-            return Store.objects.filter(is_active=True)
-        else:
-            return profile.stores.filter(is_active=True)
+        """Active stores the user can access (see checklist.access)"""
+        return accessible_stores(user, Store.objects.filter(is_active=True))
 
 
 class StaffRequiredMixin(LoginRequiredMixin):
@@ -1,4 +1,4 @@
-from django.db.models import Q, Count, Avg
+from django.db.models import F, Q, Count, Avg, Prefetch
 from django.contrib import messages
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.shortcuts import render, redirect, get_object_or_404
@@ -16,10 +16,14 @@ from collections import OrderedDict
 # Correct import statement:
 from ..models import ChecklistItem, Store, ActionPlanItem, AreaManagerVisit, VisitAttachment, ChecklistCategory, ChecklistQuestion
 from ..forms import VisitForm, ActionPlanItemForm
+from ..search import index_instances
 from .base import BaseViewMixin, handle_ajax_response
 
 logger = logging.getLogger(__name__)
 
+# Largest bundle rendered inside a request; bigger ones go through build_report_bundle
+PRINT_BUNDLE_MAX_VISITS = 100
+
 
 class ChecklistManager(BaseViewMixin):
     """Manager class for checklist operations"""
@@ -47,6 +51,19 @@ class ChecklistManager(BaseViewMixin):
         total_questions = 0
         positive_answers = 0
         questions = ChecklistQuestion.objects.filter(is_active=True)
+        today = timezone.now().date()
+
+        # Drafts only record answers; actions are raised when a visit is submitted
+        raise_actions = not visit.is_draft
+
+        # Open items already raised for this store, one per failed question
+        open_actions = {}
+        if raise_actions:
+            for item_id, question_id in ActionPlanItem.objects.filter(
+                visit__store_id=visit.store_id, question__isnull=False
+            ).exclude(status='closed').order_by('created_at', 'id').values_list('id', 'question_id'):
+                open_actions.setdefault(question_id, item_id)
+        repeat_comments = {}
     
         for question in questions:
             field_name = f"q_{question.id}"
@@ -88,26 +105,82 @@ class ChecklistManager(BaseViewMixin):
             
             # If answer is No and there's a comment, create an action item
             if not answer_value and comment_value:
-                ActionPlanItem.objects.create(
-                    visit=visit,
-                    what=f"{question.category.name} - Q{question.number}: {question.text}",
-                    who=request.user.get_full_name() or request.user.username,
-                    timeframe=timezone.now().date() + timedelta(days=7),
-                    status='open',
-                    priority='medium',
-                    remarks=comment_value
-                )
+                if raise_actions:
+                    if question.id in open_actions:
+                        # Repeat failure: count it and log its comment on the existing open item
+                        repeat_comments[open_actions[question.id]] = comment_value
+                    else:
+                        ActionPlanItem.objects.create(
+                            visit=visit,
+                            question=question,
+                            what=f"{question.category.name} - Q{question.number}: {question.text}",
+                            who=request.user.get_full_name() or request.user.username,
+                            timeframe=today + timedelta(days=7),
+                            status='open',
+                            priority='medium',
+                            remarks=comment_value,
+                            last_seen=today
+                        )
+                        created_actions += 1
                 checklist_item.requires_follow_up = True
                 checklist_item.save()
-                created_actions += 1
             total_questions += 1
             if answer_value:
                 positive_answers += 1
 
+        if repeat_comments:
+            repeats = list(ActionPlanItem.objects.select_related('visit').filter(id__in=repeat_comments))
+            now = timezone.now()
+            for item in repeats:
+                line = f"[Repeat, visit {today}] {repeat_comments[item.id]}"
+                item.remarks = f"{item.remarks}\n{line}" if item.remarks else line
+                item.occurrences = F('occurrences') + 1
+                item.last_seen = today
+                item.updated_at = now
+            ActionPlanItem.objects.bulk_update(repeats, ['remarks', 'occurrences', 'last_seen', 'updated_at'])
+            # bulk_update skips the post_save search indexing of the remarks
+            index_instances(repeats)
+
         visit.overall_score = round((positive_answers / total_questions) * 100) if total_questions > 0 else 0
         visit.save()
         return created_actions
 
+    @staticmethod
+    def get_printable_visits(visits):
+        """Load visits with everything the print templates need in three queries"""
+        return visits.select_related('store', 'manager').prefetch_related(
+            Prefetch(
+                'checklist_items',
+                queryset=ChecklistItem.objects.select_related('question__category').order_by(
+                    'question__category__name', 'question__number'
+                )
+            ),
+            Prefetch('action_items', queryset=ActionPlanItem.objects.order_by('timeframe')),
+        )
+
+    @staticmethod
+    def filter_visits_for_print(visits, params):
+        """Narrow visits by explicit ids or by store/manager/date filters"""
+        ids = [i for i in params.getlist('visit_ids') + params.get('ids', '').split(',') if i.strip().isdigit()]
+        if ids:
+            return visits.filter(id__in=ids)
+
+        for param, field in (('store', 'store_id'), ('manager', 'manager_id')):
+            value = params.get(param, '').strip()
+            if not value:
+                continue
+            if not value.isdigit():
+                raise ValidationError(f'{param.capitalize()} must be an id')
+            visits = visits.filter(**{field: int(value)})
+        try:
+            if params.get('date_from'):
+                visits = visits.filter(date__gte=datetime.strptime(params['date_from'], '%Y-%m-%d').date())
+            if params.get('date_to'):
+                visits = visits.filter(date__lte=datetime.strptime(params['date_to'], '%Y-%m-%d').date())
+        except ValueError:
+            raise ValidationError('Dates must be in YYYY-MM-DD format')
+        return visits
+
 
 @login_required
 def new_checklist(request):
@@ -496,12 +569,52 @@ def print_visit_report(request, visit_id):
     """
     Generate a PDF report for a specific visit
     """
-    visit = get_object_or_404(AreaManagerVisit, id=visit_id)
-    checklist_items = ChecklistItem.objects.filter(visit=visit)
+    visit = get_object_or_404(AreaManagerVisit.objects.select_related('store', 'manager'), id=visit_id)
+    checklist_items = ChecklistItem.objects.filter(visit=visit).select_related('question__category')
     action_items = ActionPlanItem.objects.filter(visit=visit)
     
     return render(request, 'checklist/visit_report.html', {
         'visit': visit,
         'checklist_items': checklist_items,
         'action_items': action_items,
-    })
\ No newline at end of file
+    })
+
+
+@login_required
+def print_visit_bundle(request):
+    """
+    Render many visits as one print-ready document with a page break per visit.
+
+    Accepts ``ids``/``visit_ids`` or store, manager and date filters. Bundles
+    larger than PRINT_BUNDLE_MAX_VISITS are built offline with the
+    build_report_bundle management command.
+    """
+    manager = ChecklistManager()
+    visits = AreaManagerVisit.objects.filter(
+        is_draft=False,
+        store__in=manager.get_user_stores(request.user)
+    )
+
+    try:
+        visits = manager.filter_visits_for_print(visits, request.GET)
+    except ValidationError as e:
+        messages.error(request, e.messages[0])
+        return redirect('checklist:checklist_history')
+
+    visit_count = visits.count()
+    if visit_count == 0:
+        messages.warning(request, "No visits matched the selection.")
+        return redirect('checklist:checklist_history')
+    if visit_count > PRINT_BUNDLE_MAX_VISITS:
+        messages.error(
+            request,
+            f"{visit_count} visits selected. Bundles over {PRINT_BUNDLE_MAX_VISITS} visits are generated "
+            f"by an administrator with the build_report_bundle command; please narrow the filter."
+        )
+        return redirect('checklist:checklist_history')
+
+    visits = manager.get_printable_visits(visits.order_by('store__name', 'date'))
+    return render(request, 'checklist/print_visit_bundle.html', {
+        'visits': visits,
+        'generated_at': timezone.now(),
+    })
@@ -1,4 +1,4 @@
-from django.db.models import Avg, Count, Q
+from django.db.models import Avg, Count, F, Q
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 from django.contrib.auth.decorators import login_required
@@ -11,6 +11,9 @@ from ..models import (
     MaintenanceTicket, Store, ChecklistQuestion, ChecklistCategory
 )
 from ..forms import ChecklistQuestionForm
+from ..access import accessible_store_ids
+from ..analytics import get_area_kpis
+from ..scheduling import next_visits
 from .base import BaseViewMixin
 
 logger = logging.getLogger(__name__)
@@ -147,7 +150,7 @@ class DashboardManager(BaseViewMixin):
         ).select_related('visit__store')
         
         open_actions = open_actions_query.order_by('timeframe')[:10]
-        overdue_actions = open_actions_query.filter(timeframe__lt=today)
+        overdue_actions = ActionPlanItem.objects.filter(visit__manager=user).overdue(today).select_related('visit__store')
         
         return {
             'open_actions': open_actions,
@@ -196,42 +199,44 @@ class DashboardManager(BaseViewMixin):
         }
 
     @staticmethod
-    def get_store_performance(user):
-        """Get store performance metrics"""
-        stores = Store.objects.filter(is_active=True)
-        
-        if hasattr(user, 'profile') and user.profile is not None:
-            if user.profile.role not in ['admin', 'area_management']:
-                stores = user.profile.stores.filter(is_active=True)
-        
-        store_performance = []
-        
-        for store in stores:
-            store_visits = AreaManagerVisit.objects.filter(
-                store=store, 
-                manager=user, 
-                is_draft=False
-            )
-            
-            if store_visits.exists():
-                # Calculate average score by iterating through visits
-                total_score = 0
-                visit_count = store_visits.count()
-                
-                for visit in store_visits:
-                    total_score += visit.calculate_score()
-                
-                avg_score = total_score / visit_count if visit_count > 0 else 0
-                
-                store_performance.append({
-                    'store': store,
-                    'visit_count': visit_count,
-                    'avg_score': round(avg_score, 1),
-                    'last_visit': store_visits.order_by('-date').first().date if store_visits.exists() else None,
-                })
-        
-        store_performance.sort(key=lambda x: x['avg_score'], reverse=True)
-        return store_performance
+    def get_area_overview(user, area_id=None):
+        """
+        Cached area KPI rows for the areas holding the user's stores, and the
+        selected row when area_id names one of them ('none' = unassigned).
+        """
+        kpis = get_area_kpis()
+        rows = kpis['areas']
+        store_ids = accessible_store_ids(user)
+        if store_ids is not None:
+            area_ids = set(Store.objects.filter(id__in=store_ids).values_list('area_id', flat=True))
+            rows = [row for row in rows if row['area_id'] in area_ids]
+        selected = next((row for row in rows if str(row['area_id']).lower() == area_id), None) if area_id else None
+        return {
+            'area_kpis': rows,
+            'area_kpi_totals': kpis['totals'] if store_ids is None else None,
+            'area_kpis_computed_at': kpis['computed_at'],
+            'selected_area': selected,
+        }
+
+    @staticmethod
+    def get_store_performance(user, area=None):
+        """
+        Visit count, average score and last visit for each store the user has
+        visited, best first, in one grouped query; optionally for one area row
+        from get_area_overview.
+        """
+        stores = BaseViewMixin.get_user_stores(user)
+        if area is not None:
+            stores = stores.filter(area_id=area['area_id']) if area['area_id'] else stores.filter(area__isnull=True)
+        stores = stores.with_stats(manager=user).filter(visit_count__gt=0).order_by(
+            F('avg_score').desc(nulls_last=True), 'name'
+        )
+        return [{
+            'store': store,
+            'visit_count': store.visit_count,
+            'avg_score': round(store.avg_score or 0, 1),
+            'last_visit': store.last_visit,
+        } for store in stores]
 
     @staticmethod
     def get_monthly_stats(user, today):
@@ -333,7 +338,9 @@ def dashboard(request):
         action_stats = manager.get_action_stats(user, basic_stats['today'])
         compliance_data = manager.get_compliance_data(user, basic_stats['thirty_days_ago'])
         maintenance_data = manager.get_maintenance_stats(user, basic_stats['today'])
-        store_performance = manager.get_store_performance(user)
+        area_overview = manager.get_area_overview(user, request.GET.get('area', '').lower())
+        store_performance = manager.get_store_performance(user, area_overview['selected_area'])
+        visit_queue = next_visits(user, today=basic_stats['today'])
         monthly_stats = manager.get_monthly_stats(user, basic_stats['today'])
         performance_trend = manager.get_performance_trend(compliance_data['chart_scores'])
 
@@ -358,6 +365,8 @@ def dashboard(request):
             **compliance_data,
             **maintenance_data,
             'store_performance': store_performance[:5],
+            **area_overview,
+            'visit_queue': visit_queue,
             'monthly_stats': monthly_stats,
             'performance_trend': performance_trend,
 
@@ -7,6 +7,7 @@ from django.contrib import messages
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment
 from ..models import AreaManagerVisit, ChecklistItem, ActionPlanItem
+from ..utils.question_import import QuestionImport, READ_ERRORS, read_question_rows, SESSION_KEY
 
 @login_required
 def export_visit_excel(request, visit_id):
@@ -114,13 +115,32 @@ def export_data(request):
 
 @user_passes_test(lambda u: u.is_superuser)
 def import_questions(request):
-    """Import checklist questions from CSV"""
-    if request.method == 'POST' and request.FILES.get('csv_file'):
-        csv_file = request.FILES['csv_file']
-        # Add your import logic here
-        messages.success(request, 'Questions imported successfully!')
+    """Import checklist questions from CSV or XLSX, previewing the diff before commit"""
+    if request.method == 'POST' and 'confirm' in request.POST:
+        rows = request.session.pop(SESSION_KEY, None)
+        if not rows:
+            messages.error(request, 'Nothing to import. Please upload the file again.')
+            return redirect('checklist:import_data')
+        summary = QuestionImport(rows).apply()
+        messages.success(
+            request,
+            f"Questions imported: {summary['created']} created, {summary['updated']} updated, "
+            f"{summary['unchanged']} unchanged."
+        )
         return redirect('checklist:manage_checklist_questions')
-    
+
+    if request.method == 'POST' and request.FILES.get('csv_file'):
+        try:
+            rows = read_question_rows(request.FILES['csv_file'], request.encoding or 'utf-8')
+        except READ_ERRORS as e:
+            messages.error(request, f'Error reading file: {str(e)}')
+            return render(request, 'checklist/import_questions.html')
+
+        preview = QuestionImport(rows)
+        request.session[SESSION_KEY] = rows
+        return render(request, 'checklist/import_questions.html', {'preview': preview})
+
+    request.session.pop(SESSION_KEY, None)
     return render(request, 'checklist/import_questions.html')
 
 
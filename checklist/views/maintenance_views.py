@@ -4,17 +4,147 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import CreateView
 from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from datetime import datetime, time, timedelta
 import logging
+import re
 
-from ..models import MaintenanceTicket, AreaManagerVisit, Store
+from ..models import MaintenanceTicket, MaintenanceTicketQuerySet, AreaManagerVisit, Store
 from ..forms import MaintenanceTicketForm, MaintenanceForm, MaintenanceTicketEditForm
+from ..access import accessible_store_ids
+from ..equipment import recurring_failures
+from ..sla import latest_sla_rollup
 from .base import LoginRequiredMixin
 
 logger = logging.getLogger(__name__)
 
+TREND_DAYS = 30
+RECURRING_DAYS = 30
+RECURRING_MIN_TICKETS = 2
+AUTOCOMPLETE_LIMIT = 20
+# 2024, 2024-05 or 2024-05-17; a trailing partial part (2024-0) is ignored
+DATE_PREFIX_RE = re.compile(r'^(\d{4})(?:-(\d{2})(?:-(\d{2}))?)?(?:-\d?)?$')
+REFERENCE_CACHE_KEY = 'maintenance_list_reference_data'
+REFERENCE_CACHE_TIMEOUT = 60 * 60
+
+
+def _start_of(day):
+    """Aware datetime for the start of day in the current timezone"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
 
 class MaintenanceManager:
     """Manager class for maintenance operations"""
+
+    @staticmethod
+    def get_trend(today, days=TREND_DAYS):
+        """New tickets per day for the last days, zero-filled, oldest first"""
+        start = today - timedelta(days=days - 1)
+        counts = {
+            row['day']: row['count']
+            for row in MaintenanceTicket.objects.filter(created_date__gte=_start_of(start)).annotate(
+                day=TruncDate('created_date')
+            ).order_by().values('day').annotate(count=Count('id'))
+        }
+        return [
+            {'day': (start + timedelta(days=n)).isoformat(), 'count': counts.get(start + timedelta(days=n), 0)}
+            for n in range(days)
+        ]
+
+    @staticmethod
+    def date_prefix_range(token):
+        """[start, end) dates for a date prefix token, or None if it is not one"""
+        match = DATE_PREFIX_RE.match(token)
+        if not match:
+            return None
+        year, month, day = (int(part) if part else None for part in match.groups())
+        try:
+            if day:
+                start = datetime(year, month, day).date()
+                return start, start + timedelta(days=1)
+            if month:
+                start = datetime(year, month, 1).date()
+                return start, (start + timedelta(days=32)).replace(day=1)
+            return datetime(year, 1, 1).date(), datetime(year + 1, 1, 1).date()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def search_visits(query, store_ids=None, limit=AUTOCOMPLETE_LIMIT):
+        """
+        Latest submitted visits whose store name starts with the text part of
+        query and whose date starts with its date part ("maadi 2024-05").
+
+        The name prefix resolves against the small store table; visits are then
+        read newest first from the (store, -date) or (-date) partial index,
+        with a date prefix turned into a date range.
+        """
+        return list(MaintenanceManager.visit_search_queryset(query, store_ids)[:limit])
+
+    @staticmethod
+    def visit_search_queryset(query, store_ids=None):
+        """The unevaluated, newest first queryset behind search_visits"""
+        visits = AreaManagerVisit.objects.filter(is_draft=False)
+        if store_ids is not None:
+            visits = visits.filter(store_id__in=store_ids)
+
+        words = []
+        for token in query.split():
+            date_range = MaintenanceManager.date_prefix_range(token)
+            if date_range:
+                visits = visits.filter(date__gte=date_range[0], date__lt=date_range[1])
+            else:
+                words.append(token)
+        if words:
+            visits = visits.filter(store__in=Store.objects.filter(name__istartswith=' '.join(words)).values('id'))
+
+        return visits.order_by('-date', '-id').values('id', 'date', 'store__name')
+
+    @staticmethod
+    def filter_tickets(tickets, filters, today):
+        """Narrow tickets by the maintenance list's status, priority, store and date_range filters"""
+        if filters['status'] == 'overdue':
+            tickets = tickets.overdue(today)
+        elif filters['status']:
+            tickets = tickets.filter(status=filters['status'])
+
+        if filters['priority']:
+            tickets = tickets.filter(priority=filters['priority'])
+
+        if filters['store']:
+            tickets = tickets.filter(visit__store__id=filters['store'])
+
+        if filters['date_range']:
+            # Compare created_date against datetime bounds so the index can be used
+            if filters['date_range'] == 'today':
+                tickets = tickets.filter(created_date__gte=_start_of(today))
+            elif filters['date_range'] == 'this_week':
+                tickets = tickets.filter(created_date__gte=_start_of(today - timedelta(days=today.weekday())))
+            elif filters['date_range'] == 'this_month':
+                tickets = tickets.filter(created_date__gte=_start_of(today.replace(day=1)))
+            elif filters['date_range'] == 'last_month':
+                this_month = today.replace(day=1)
+                last_month = (this_month - timedelta(days=1)).replace(day=1)
+                tickets = tickets.filter(created_date__gte=_start_of(last_month), created_date__lt=_start_of(this_month))
+        return tickets
+
+    @staticmethod
+    def get_reference_data():
+        """Visit and store dropdown options, cached until a visit or store changes"""
+        data = cache.get(REFERENCE_CACHE_KEY)
+        if data is None:
+            data = {
+                'visits': list(AreaManagerVisit.objects.order_by('-date', '-id').values(
+                    'id', 'date', 'store__name'
+                )[:50]),
+                'stores': list(Store.objects.filter(is_active=True).order_by('name').values('id', 'name')),
+            }
+            cache.set(REFERENCE_CACHE_KEY, data, REFERENCE_CACHE_TIMEOUT)
+        return data
     
     @staticmethod
     def get_paginated_maintenance(page_number, items_per_page=10):
@@ -43,6 +173,11 @@ class NewMaintenanceView(LoginRequiredMixin, CreateView):
     template_name = 'checklist/new_maintenance.html'
     success_url = '/checklist/maintenance/'
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['store_ids'] = accessible_store_ids(self.request.user)
+        return kwargs
+
     def get_initial(self):
         initial = super().get_initial()
         visit_id = self.kwargs.get('visit_id')
@@ -92,7 +227,7 @@ def new_maintenance(request):
     View for creating a new maintenance ticket (standalone version)
     """
     if request.method == 'POST':
-        form = MaintenanceTicketForm(request.POST, request.FILES)
+        form = MaintenanceTicketForm(request.POST, request.FILES, store_ids=accessible_store_ids(request.user))
         if form.is_valid():
             ticket = form.save()
             messages.success(request, "Maintenance ticket created successfully!")
@@ -100,19 +235,35 @@ def new_maintenance(request):
         else:
             messages.error(request, "Please correct the errors below.")
     else:
-        form = MaintenanceTicketForm()
+        form = MaintenanceTicketForm(store_ids=accessible_store_ids(request.user))
     
     return render(request, 'checklist/new_maintenance.html', {'form': form})
 
 
+@login_required
+def visit_autocomplete(request):
+    """Visits for the maintenance form's visit picker, matched by store name and date prefix"""
+    try:
+        limit = min(max(int(request.GET.get('limit', AUTOCOMPLETE_LIMIT)), 1), 50)
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+    visits = MaintenanceManager.search_visits(
+        request.GET.get('q', '').strip(), accessible_store_ids(request.user), limit
+    )
+    return JsonResponse({
+        'status': 'success',
+        'results': [
+            {'id': visit['id'], 'label': f"Visit to {visit['store__name']} on {visit['date']}"}
+            for visit in visits
+        ],
+    })
+
+
 @login_required
 def maintenance_list(request):
     """Display paginated list of maintenance tickets with filtering"""
-    from django.db.models import Count, Q
-    from datetime import datetime, timedelta
-    from ..models import Store
-    
-    tickets = MaintenanceTicket.objects.all().select_related('visit__store').order_by('-created_date')
+    today = timezone.localdate()
+    tickets = MaintenanceTicket.objects.with_overdue(today).select_related('visit__store').order_by('-created_date')
     
     # Apply filters
     filters = {
@@ -122,38 +273,17 @@ def maintenance_list(request):
         'date_range': request.GET.get('date_range', '')
     }
     
-    if filters['status']:
-        tickets = tickets.filter(status=filters['status'])
-        
-    if filters['priority']:
-        tickets = tickets.filter(priority=filters['priority'])
-        
-    if filters['store']:
-        tickets = tickets.filter(visit__store__id=filters['store'])
-        
-    if filters['date_range']:
-        today = datetime.now().date()
-        if filters['date_range'] == 'today':
-            tickets = tickets.filter(created_date__date=today)
-        elif filters['date_range'] == 'this_week':
-            start_week = today - timedelta(days=today.weekday())
-            tickets = tickets.filter(created_date__date__gte=start_week)
-        elif filters['date_range'] == 'this_month':
-            tickets = tickets.filter(created_date__year=today.year, created_date__month=today.month)
-        elif filters['date_range'] == 'last_month':
-            last_month = today.replace(day=1) - timedelta(days=1)
-            tickets = tickets.filter(created_date__year=last_month.year, created_date__month=last_month.month)
-    
-    # Calculate statistics
-    all_tickets = MaintenanceTicket.objects.all()
-    stats = {
-        'total': all_tickets.count(),
-        'pending': all_tickets.filter(status='pending').count(),
-        'in_progress': all_tickets.filter(status='in_progress').count(),
-        'completed': all_tickets.filter(status='completed').count(),
-        'overdue': all_tickets.filter(due_date__lt=datetime.now().date(), status__in=['pending', 'in_progress']).count(),
-        'high_priority': all_tickets.filter(priority='high').count(),
-    }
+    tickets = MaintenanceManager.filter_tickets(tickets, filters, today)
+
+    # Calculate statistics in a single aggregate query
+    stats = MaintenanceTicket.objects.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+        in_progress=Count('id', filter=Q(status='in_progress')),
+        completed=Count('id', filter=Q(status='completed')),
+        overdue=Count('id', filter=MaintenanceTicketQuerySet.overdue_q(today)),
+        high_priority=Count('id', filter=Q(priority='high')),
+    )
     
     # Pagination
     paginator = Paginator(tickets, 10)
@@ -166,29 +296,32 @@ def maintenance_list(request):
     except EmptyPage:
         page_obj = paginator.page(paginator.num_pages)
     
-    # Get trend data for last 30 days
-    from django.db.models import Count
-    from django.db.models.functions import TruncDate
-    
-    thirty_days_ago = datetime.now().date() - timedelta(days=30)
-    trend_data = MaintenanceTicket.objects.filter(
-        created_date__date__gte=thirty_days_ago
-    ).extra(
-        select={'day': 'date(created_date)'}
-    ).values('day').annotate(
-        count=Count('id')
-    ).order_by('day')
-    
-    # Get available visits and stores
-    visits = AreaManagerVisit.objects.select_related('store').order_by('-date')[:50]
-    stores = Store.objects.filter(is_active=True).order_by('name')
-    
     context = {
         'page_obj': page_obj,
         'stats': stats,
         'filters': filters,
-        'visits': visits,
-        'stores': stores,
-        'trend_data': list(trend_data),
+        'trend_data': MaintenanceManager.get_trend(today),
+        'sla_rows': latest_sla_rollup('priority') + latest_sla_rollup('all'),
+        **MaintenanceManager.get_reference_data(),
+    }
+    return render(request, 'checklist/maintenance_list.html', context)
+
+
+def _positive_int(value, default):
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return default
+
+
+@login_required
+def recurring_failures_report(request):
+    """Equipment with repeated tickets at the same store within a window"""
+    days = _positive_int(request.GET.get('days'), RECURRING_DAYS)
+    min_tickets = max(_positive_int(request.GET.get('min'), RECURRING_MIN_TICKETS), 2)
+    context = {
+        'rows': recurring_failures(days, min_tickets, accessible_store_ids(request.user)),
+        'days': days,
+        'min_tickets': min_tickets,
     }
-    return render(request, 'checklist/maintenance_list.html', context)
\ No newline at end of file
+    return render(request, 'checklist/recurring_failures.html', context)
@@ -11,6 +11,9 @@ from ..models import (
     MaintenanceTicket,
     Store,
 )
+from ..sla import ACTION_GROUPS, action_close_percentiles
+
+SLA_WINDOW_DAYS = 90
 
 
 @login_required
@@ -27,4 +30,16 @@ def reports(request):
         'in_progress_tickets': MaintenanceTicket.objects.filter(status='in_progress').count(),
         'stores': Store.objects.filter(is_active=True).count(),
     }
+
+    sla_group = request.GET.get('sla_by', 'store')
+    if sla_group not in ACTION_GROUPS:
+        sla_group = 'store'
+    context.update({
+        'sla_group': sla_group,
+        'sla_groups': list(ACTION_GROUPS),
+        'sla_window_days': SLA_WINDOW_DAYS,
+        'action_sla': action_close_percentiles(
+            sla_group, closed_from=timezone.now() - timedelta(days=SLA_WINDOW_DAYS)
+        ),
+    })
     return render(request, 'checklist/reports.html', context)
@@ -0,0 +1,71 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.urls import reverse
+
+from ..access import accessible_stores
+from ..routing import DEFAULT_DUE_DAYS, DEFAULT_MAX_STOPS, due_stores, plan_route
+
+# Upper bound on stops per route; 2-opt is quadratic per pass
+MAX_ROUTE_STOPS = 50
+
+
+def _bounded_int(value, default, low, high):
+    try:
+        return min(max(int(value), low), high)
+    except (TypeError, ValueError):
+        return default
+
+
+@login_required
+def todays_route(request):
+    """
+    Ordered visit route over the user's stores that are due a visit.
+
+    Optional query parameters: lat and lon (start position, otherwise the
+    most overdue store), area, due_days and limit.
+    """
+    due_days = _bounded_int(request.GET.get('due_days'), DEFAULT_DUE_DAYS, 0, 365)
+    limit = _bounded_int(request.GET.get('limit'), DEFAULT_MAX_STOPS, 1, MAX_ROUTE_STOPS)
+
+    start = None
+    if request.GET.get('lat') or request.GET.get('lon'):
+        try:
+            start = (float(request.GET['lat']), float(request.GET['lon']))
+        except (KeyError, ValueError):
+            start = None
+        if start is None or not (-90 <= start[0] <= 90 and -180 <= start[1] <= 180):
+            return JsonResponse({'status': 'error', 'message': 'lat and lon must be valid coordinates'}, status=400)
+
+    stores = accessible_stores(request.user)
+    area = request.GET.get('area')
+    if area == 'none':
+        stores = stores.filter(area__isnull=True)
+    elif area and area.isdigit():
+        stores = stores.filter(area_id=area)
+
+    due = due_stores(stores, due_days)
+    stops = {store['id']: store for store in due[:limit]}
+    order, legs = plan_route(
+        [(store_id, float(store['latitude']), float(store['longitude'])) for store_id, store in stops.items()],
+        start,
+    )
+    if not start:
+        # The route starts at the first store, so it has no leg of its own
+        legs = [0] + legs
+
+    return JsonResponse({
+        'status': 'success',
+        'due_days': due_days,
+        'due_stores': len(due),
+        'total_km': round(sum(legs), 2),
+        'stops': [{
+            'id': store_id,
+            'name': stops[store_id]['name'],
+            'address': stops[store_id]['address'],
+            'latitude': float(stops[store_id]['latitude']),
+            'longitude': float(stops[store_id]['longitude']),
+            'last_visit': stops[store_id]['last_visit'],
+            'leg_km': leg,
+            'url': reverse('checklist:store_detail', args=[store_id]),
+        } for store_id, leg in zip(order, legs)],
+    })
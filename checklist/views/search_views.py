@@ -0,0 +1,48 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from ..access import accessible_store_ids
+from ..models import SearchEntry
+from ..search import SEARCH_PAGE_SIZE, result_url, search
+
+
+@login_required
+def global_search(request):
+    """Ranked full-text search over actions, tickets, visit notes and stores"""
+    query = request.GET.get('q', '').strip()
+    kinds = [k for k in request.GET.getlist('kind') if k in dict(SearchEntry.KIND_CHOICES)]
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except (TypeError, ValueError):
+        page = 1
+
+    results, has_next = search(query, accessible_store_ids(request.user), kinds, page, SEARCH_PAGE_SIZE)
+    for entry in results:
+        entry.url = result_url(entry)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'status': 'success',
+            'query': query,
+            'page': page,
+            'has_next': has_next,
+            'results': [{
+                'kind': entry.kind,
+                'id': entry.object_id,
+                'title': entry.title,
+                'store': entry.store.name if entry.store else None,
+                'snippet': entry.body[:200],
+                'rank': entry.rank,
+                'url': entry.url,
+            } for entry in results],
+        })
+
+    return render(request, 'checklist/search.html', {
+        'query': query,
+        'kinds': kinds,
+        'kind_choices': SearchEntry.KIND_CHOICES,
+        'results': results,
+        'page': page,
+        'has_next': has_next,
+    })
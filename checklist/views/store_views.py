@@ -1,10 +1,11 @@
-from django.db.models import Q, Count, Avg
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.core.exceptions import ValidationError
 import logging
 
+from ..access import has_store_access
+from ..analytics import get_store_analytics
 from ..models import Store, AreaManagerVisit
 from ..forms import StoreForm
 from .base import BaseViewMixin
@@ -15,45 +16,28 @@ logger = logging.getLogger(__name__)
 @login_required
 def store_list(request):
     """Public-facing store list for the current user with basic stats."""
-    stores = Store.objects.filter(is_active=True)
-    if hasattr(request.user, 'profile') and request.user.profile.role not in ['admin', 'area_management']:
-        stores = request.user.profile.stores.filter(is_active=True)
-
-    data = []
-    for s in stores:
-        visits = AreaManagerVisit.objects.filter(store=s, manager=request.user, is_draft=False)
-        avg = 0
-        last = None
-        if visits.exists():
-            total = sum(v.calculate_score() for v in visits)
-            avg = round(total / visits.count(), 1)
-            last_v = visits.order_by('-date').first()
-            last = last_v.date if last_v else None
-        data.append({'store': s, 'avg': avg, 'visits': visits.count(), 'last': last})
-
-    return render(request, 'checklist/stores_list.html', { 'stores': data })
+    # One annotated query; visit figures cover the user's own visits
+    stores = BaseViewMixin.get_user_stores(request.user).with_stats(manager=request.user).order_by('name')
+    return render(request, 'checklist/stores_list.html', {'stores': stores})
 
 
 @login_required
 def store_detail(request, store_id):
     """Public-facing store detail with visits summary."""
-    store = get_object_or_404(Store, id=store_id)
-    # Basic authorization: user must have access
-    if hasattr(request.user, 'profile') and request.user.profile.role not in ['admin', 'area_management']:
-        if store not in request.user.profile.stores.all():
-            messages.error(request, 'You do not have access to this store.')
-            return redirect('checklist:store_list')
-
-    visits = AreaManagerVisit.objects.filter(store=store, manager=request.user, is_draft=False).order_by('-date')[:20]
-    avg = 0
-    if visits.exists():
-        total = sum(v.calculate_score() for v in visits)
-        avg = round(total / visits.count(), 1)
+    if not has_store_access(request.user, store_id):
+        messages.error(request, 'You do not have access to this store.')
+        return redirect('checklist:store_list')
+    store = get_object_or_404(
+        Store.objects.select_related('area').with_stats(manager=request.user), id=store_id
+    )
+
+    visits = AreaManagerVisit.objects.filter(
+        store=store, manager=request.user, is_draft=False
+    ).select_related('manager').with_score().order_by('-date', '-id')[:20]
 
     return render(request, 'checklist/store_detail.html', {
         'store': store,
         'visits': visits,
-        'avg': avg,
     })
 
 
@@ -62,28 +46,8 @@ class StoreManager(BaseViewMixin):
     
     @staticmethod
     def get_store_analytics():
-        """Get comprehensive store analytics"""
-        stores = Store.objects.all().annotate(
-            visit_count=Count('areamanagervisit', filter=Q(areamanagervisit__is_draft=False)),
-            avg_score=Avg('areamanagervisit__calculate_score', filter=Q(areamanagervisit__is_draft=False)),
-        ).order_by('-is_active', 'name')
-        
-        # Calculate store statistics
-        total_stores = stores.count()
-        active_stores = stores.filter(is_active=True).count()
-        inactive_stores = stores.filter(is_active=False).count()
-        stores_with_visits = stores.filter(visit_count__gt=0).count()
-        
-        return {
-            'stores': stores,
-            'stats': {
-                'total': total_stores,
-                'active': active_stores,
-                'inactive': inactive_stores,
-                'with_visits': stores_with_visits,
-                'without_visits': total_stores - stores_with_visits,
-            }
-        }
+        """Per-store and per-area analytics, served from the cache (see checklist.analytics)"""
+        return get_store_analytics()
 
 
 @user_passes_test(lambda u: u.is_superuser)
@@ -106,6 +70,9 @@ def store_management(request):
             'stores': analytics['stores'],
             'form': form,
             'store_stats': analytics['stats'],
+            'area_totals': analytics['areas'],
+            'network_totals': analytics['totals'],
+            'analytics_computed_at': analytics['computed_at'],
         }
         
         return render(request, 'checklist/store_management.html', context)
@@ -133,6 +100,10 @@ def handle_store_creation(request):
             context = {
                 'stores': analytics['stores'],
                 'form': form,
+                'store_stats': analytics['stats'],
+                'area_totals': analytics['areas'],
+                'network_totals': analytics['totals'],
+                'analytics_computed_at': analytics['computed_at'],
             }
             return render(request, 'checklist/store_management.html', context)
     except ValidationError as e:
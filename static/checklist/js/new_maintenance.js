@@ -73,6 +73,63 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Visit picker: the select only holds the chosen visit, options are
+    // fetched from the autocomplete endpoint ("store name" and/or "2024-05")
+    const visitSelect = document.querySelector('select[data-autocomplete-url]');
+    if (visitSelect) {
+        const searchInput = document.createElement('input');
+        searchInput.type = 'search';
+        searchInput.className = 'form-control mb-2';
+        searchInput.placeholder = 'Search visits by store name or date (e.g. Maadi 2024-05)';
+        visitSelect.parentNode.insertBefore(searchInput, visitSelect);
+
+        let searchTimer = null;
+        let searchController = null;
+
+        function loadVisits(query) {
+            if (searchController) {
+                searchController.abort();
+            }
+            searchController = new AbortController();
+            const url = `${visitSelect.dataset.autocompleteUrl}?q=${encodeURIComponent(query)}`;
+            fetch(url, { signal: searchController.signal, headers: { 'Accept': 'application/json' } })
+                .then(response => response.json())
+                .then(data => {
+                    // Keep the placeholder and the current choice, replace the rest
+                    const current = visitSelect.selectedIndex > 0 ? visitSelect.options[visitSelect.selectedIndex] : null;
+                    const placeholder = visitSelect.options[0];
+                    visitSelect.innerHTML = '';
+                    visitSelect.appendChild(placeholder);
+                    if (current) {
+                        visitSelect.appendChild(current);
+                    }
+                    data.results.forEach(visit => {
+                        if (!current || String(visit.id) !== current.value) {
+                            visitSelect.appendChild(new Option(visit.label, visit.id));
+                        }
+                    });
+                    if (current) {
+                        visitSelect.value = current.value;
+                    }
+                })
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        console.error('Visit search failed:', error);
+                    }
+                });
+        }
+
+        searchInput.addEventListener('input', function() {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(() => loadVisits(this.value.trim()), 250);
+        });
+        visitSelect.addEventListener('focus', function() {
+            if (visitSelect.options.length <= 2 && !searchInput.value) {
+                loadVisits('');
+            }
+        }, { once: true });
+    }
+
     // Form submission handling
     const form = document.getElementById('maintenanceForm');
     if (form) {
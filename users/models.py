@@ -18,9 +18,8 @@ class Profile(models.Model):
     areas = models.ManyToManyField('checklist.Area', blank=True)  # New field for area access
 
     def has_store_access(self, store):
-        if self.role in ['admin', 'area_manager']:
-            return True
-        return store in self.stores.all() or store.area in self.areas.all()
+        from checklist.access import has_store_access
+        return has_store_access(self.user, store.pk)
 
     def __str__(self):
         return f'{self.user.username} ({self.get_role_display()})'